@@ -0,0 +1,150 @@
+"""Construction, copy and serialization throughput of the domain entities.
+
+Run:  python benchmarks/bench_domain_models.py [iterations]
+
+For every FrozenModel exported by ``optimed.core.domain`` the script times
+(ops/s, best of 3):
+
+  validate   Model(**fields)                – full Pydantic validation
+  trusted    Model.trusted(**fields)        – adapter-internal fast path
+  copy       obj.model_copy(update=...)
+  replace    obj.trusted_replace(...)
+  dump       obj.model_dump()
+  dump_json  obj.model_dump_json()
+
+With pydantic-core, validating small, already-typed models is about as
+cheap as the Python-level trusted path; trusted() pays off for models with
+private attributes or default factories and for large containers (the
+``[...]`` rows), while trusted_replace() beats model_copy() throughout.
+"""
+from __future__ import annotations
+
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import Any
+
+import optimed.core.domain as domain
+from optimed.core.domain import (
+    Notification,
+    BedStatus,
+    Channel,
+    ChatRole,
+    EncounterStatus,
+    EventType,
+    Severity,
+)
+from optimed.core.domain.mixins import FrozenModel
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# entity → (constructor fields, one field to change when copying)
+SAMPLES: dict[str, tuple[dict[str, Any], dict[str, Any]]] = {
+    "PatientContext": (
+        dict(patient_id="P1", name="Ada Lovelace", age=74, sex="female", care_unit="ICU",
+             vitals={"8867-4": "88 /min", "59408-5": "95 %"}, labs={"2823-3": "4.1 mmol/L"}, updated_at=NOW),
+        {"care_unit": "Ward B"},
+    ),
+    "Encounter": (
+        dict(encounter_id="E1", patient_id="P1", status=EncounterStatus.IN_PROGRESS, admit_ts=NOW),
+        {"status": EncounterStatus.DISCHARGED},
+    ),
+    "BedState": (
+        dict(bed_id="B1", care_unit="ICU", status=BedStatus.VACANT, since=NOW),
+        {"status": BedStatus.OCCUPIED},
+    ),
+    "InfoEvent": (
+        dict(event_id="EV1", patient_id="P1", type=EventType.LAB_CRIT, payload_json="{}", created_at=NOW),
+        {"payload_json": '{"k": 6.2}'},
+    ),
+    "Notification": (
+        dict(notification_id="N1", event_id="EV1", recipient_ids=["RN1", "MD1"], channel=Channel.TEAMS,
+             delivered_at=NOW),
+        {"ack_at": NOW},
+    ),
+    "CommThread": (
+        dict(thread_id="T1", owners=["RN1"], opened_at=NOW),
+        {"closed_at": NOW},
+    ),
+    "ChatMessage": (
+        dict(role=ChatRole.USER, content="Any critical labs for P1?", timestamp=NOW, metadata={"k": "v"}),
+        {"metadata": {"cache": "memory"}},
+    ),
+    "KPIEvent": (
+        dict(metric="heart_rate", value=88.0, unit="bpm", recorded_at=NOW, metric_source="P1"),
+        {"value": 91.0},
+    ),
+    "Alert": (
+        dict(alert_id="A1", message="K+ 6.2", severity=Severity.HIGH, subject_id="P1", created_at=NOW),
+        {"severity": Severity.CRITICAL},
+    ),
+    "DiagnosisResult": (
+        dict(patient_id="P1", primary_icd="E87.5", differential=["N17.9"], confidence=0.8, generated_at=NOW),
+        {"confidence": 0.9},
+    ),
+    "Measurement": (
+        dict(code="8867-4", value=88.0, unit="/min", observed_at=NOW),
+        {"value": 91.0},
+    ),
+    "LabThreshold": (
+        dict(code="2823-3", name="Potassium", unit="mmol/L", low=2.5, high=6.0, aliases=("K+", "potassium")),
+        {"high": 6.5},
+    ),
+    "CriticalLabHit": (
+        dict(patient_id="P1", code="2823-3", name="Potassium", value=6.4, unit="mmol/L", limit=6.0,
+             direction="high"),
+        {"value": 6.8},
+    ),
+}
+
+
+_NOTE = Notification(notification_id="N1", event_id="EV1", recipient_ids=["RN1"], channel=Channel.TEAMS,
+                     delivered_at=NOW)
+
+# container-heavy variants: validation cost grows with size, trusted() does not
+HEAVY: dict[str, tuple[str, dict[str, Any], dict[str, Any]]] = {
+    "PatientContext[40+40]": ("PatientContext", {
+        **SAMPLES["PatientContext"][0],
+        "vitals": {f"v{i}": f"{60 + i} /min" for i in range(40)},
+        "labs": {f"l{i}": f"{i / 10:.1f} mmol/L" for i in range(40)},
+    }, {"care_unit": "Ward B"}),
+    "CommThread[100]": ("CommThread", {
+        **SAMPLES["CommThread"][0], "notifications": [_NOTE] * 100,
+    }, {"closed_at": NOW}),
+}
+
+
+def _rate(fn, n: int) -> float:
+    return n / min(timeit.repeat(fn, number=n, repeat=3))
+
+
+def main(n: int = 20_000) -> None:
+    entities = [
+        name for name in domain.__all__
+        if isinstance(getattr(domain, name), type) and issubclass(getattr(domain, name), FrozenModel)
+    ]
+    missing = [name for name in entities if name not in SAMPLES]
+    if missing:
+        print(f"no sample for {', '.join(missing)} – skipped")
+    cases = [(name, name, *SAMPLES[name]) for name in entities if name in SAMPLES]
+    cases += [(label, entity, fields, change) for label, (entity, fields, change) in HEAVY.items()]
+
+    cols = ("validate", "trusted", "copy", "replace", "dump", "dump_json")
+    print(f"{'entity':<22}" + "".join(f"{c:>12}" for c in cols) + "   (ops/s)")
+    for label, name, fields, change in cases:
+        cls = getattr(domain, name)
+        obj = cls(**fields)
+        assert cls.trusted(**fields) == obj and obj.trusted_replace(**change) == obj.model_copy(update=change)
+        rates = (
+            _rate(lambda: cls(**fields), n),
+            _rate(lambda: cls.trusted(**fields), n),
+            _rate(lambda: obj.model_copy(update=change), n),
+            _rate(lambda: obj.trusted_replace(**change), n),
+            _rate(obj.model_dump, n),
+            _rate(obj.model_dump_json, n),
+        )
+        print(f"{label:<22}" + "".join(f"{r:>12,.0f}" for r in rates))
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
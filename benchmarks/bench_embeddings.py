@@ -0,0 +1,88 @@
+"""Embedding micro-batching and content-hash cache.
+
+Run:  python benchmarks/bench_embeddings.py [n_requests] [n_chunks]
+
+Part 1 – n_requests (default 2 000) concurrent single-text embed() calls
+against a simulated remote model (15 ms per call + 0.05 ms per text,
+at most 4 calls in flight), direct vs through MicroBatchingEmbedder.
+
+Part 2 – a guideline corpus of n_chunks (default 20 000) indexed into
+LocalVectorStore cold, then re-indexed after 1 % of chunks were edited,
+through CachingEmbedder.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from optimed.adapters.embeddings.batcher import MicroBatchingEmbedder
+from optimed.adapters.embeddings.cache import CachingEmbedder, index_texts
+from optimed.adapters.embeddings.hashing import HashingEmbedder
+from optimed.adapters.vector_local.store import LocalVectorStore
+
+DIM = 256
+
+
+class _RemoteModel(HashingEmbedder):
+    """HashingEmbedder behind a fake network round trip."""
+
+    def __init__(self) -> None:
+        super().__init__(DIM)
+        self._slots = asyncio.Semaphore(4)
+        self.texts = 0
+
+    async def embed(self, texts):
+        async with self._slots:
+            await asyncio.sleep(0.015 + 0.00005 * len(texts))
+        self.texts += len(texts)
+        return await super().embed(texts)
+
+
+async def _requests(n: int) -> None:
+    texts = [f"progress note {i}: patient stable, K+ {3 + i % 30 / 10:.1f} mmol/L" for i in range(n)]
+    direct = _RemoteModel()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(direct.embed([t]) for t in texts))
+    t_direct = time.perf_counter() - t0
+
+    batched = MicroBatchingEmbedder(_RemoteModel(), max_batch=64, max_wait=0.005)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(batched.embed([t]) for t in texts))
+    t_batched = time.perf_counter() - t0
+
+    print(f"{n} concurrent single-text calls")
+    print(f"  direct        : {t_direct:7.2f} s  {n / t_direct:8.0f} texts/s  ({n} model calls)")
+    print(f"  micro-batched : {t_batched:7.2f} s  {n / t_batched:8.0f} texts/s  "
+          f"({batched.stats.batches} model calls, mean batch {batched.stats.mean_batch:.1f})")
+
+
+async def _reindex(n: int) -> None:
+    model = _RemoteModel()
+    embedder = CachingEmbedder(MicroBatchingEmbedder(model, max_batch=256))
+    store = LocalVectorStore(dim=DIM)
+    corpus = {f"sepsis-{i}": f"section {i // 50} paragraph {i}: lactate, fluids, cultures, antibiotics" for i in range(n)}
+
+    t0 = time.perf_counter()
+    await index_texts(store, embedder, corpus, batch_size=2_048)
+    t_cold = time.perf_counter() - t0
+    cold_texts = model.texts
+
+    for i in range(0, n, 100):
+        corpus[f"sepsis-{i}"] += " (revised 2026)"
+    t0 = time.perf_counter()
+    await index_texts(store, embedder, corpus, batch_size=2_048)
+    t_warm = time.perf_counter() - t0
+
+    print(f"\nre-index {n} chunks")
+    print(f"  cold                 : {t_cold:7.2f} s  ({cold_texts} texts embedded)")
+    print(f"  after 1 % edited     : {t_warm:7.2f} s  ({model.texts - cold_texts} texts embedded)")
+
+
+async def main(n_requests: int = 2_000, n_chunks: int = 20_000) -> None:
+    await _requests(n_requests)
+    await _reindex(n_chunks)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(a) for a in sys.argv[1:])))
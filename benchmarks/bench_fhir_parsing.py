@@ -0,0 +1,88 @@
+"""Strict vs lean FHIR parsing throughput on large Observation bundles.
+
+Run:  python benchmarks/bench_fhir_parsing.py [n_entries ...]
+
+For each bundle size the raw JSON bytes are decoded and converted to a
+PatientContext with both parse modes of HAPIFHIRRepository; reported are
+Observation entries per second and peak traced memory.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from fhir.resources.patient import Patient # type: ignore[import-untyped]
+
+from optimed.adapters.fhir_hapi.repository import (
+    _bundle_resources,
+    _decode_json,
+    _lean_patient_ctx,
+    _to_patient_ctx,
+    _validate_observations,
+)
+
+PATIENT = {
+    "resourceType": "Patient",
+    "id": "bench",
+    "name": [{"given": ["Ada"], "family": "Lovelace"}],
+    "gender": "female",
+    "birthDate": "1950-12-10",
+}
+
+
+def _bundle(n: int) -> bytes:
+    codes = ["8867-4", "59408-5", "8480-6", "8462-4", "8310-5"]
+    entries = [
+        {"resource": {
+            "resourceType": "Observation",
+            "id": f"obs-{i}",
+            "status": "final",
+            "category": [{"coding": [{"system": "http://terminology.hl7.org/CodeSystem/observation-category",
+                                      "code": "vital-signs"}]}],
+            "code": {"coding": [{"system": "http://loinc.org", "code": codes[i % len(codes)]}]},
+            "subject": {"reference": "Patient/bench"},
+            "effectiveDateTime": f"2024-01-01T{i % 24:02d}:00:00+00:00",
+            "valueQuantity": {"value": 60 + i % 40, "unit": "/min",
+                              "system": "http://unitsofmeasure.org", "code": "/min"},
+        }}
+        for i in range(n)
+    ]
+    return json.dumps({"resourceType": "Bundle", "type": "searchset", "entry": entries}).encode()
+
+
+def _strict(raw: bytes) -> None:
+    resources = _bundle_resources(json.loads(raw))
+    _to_patient_ctx(Patient.model_validate(PATIENT), _validate_observations(resources))
+
+
+def _lean(raw: bytes) -> None:
+    _lean_patient_ctx(PATIENT, _bundle_resources(_decode_json(raw)))
+
+
+def _measure(fn: Callable[[bytes], None], raw: bytes, n: int, repeat: int = 3) -> tuple[float, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(raw)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return n / best, peak / 2**20
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'entries':>8} {'mode':>7} {'entries/s':>12} {'peak MiB':>9}")
+    for n in sizes:
+        raw = _bundle(n)
+        for name, fn in (("strict", _strict), ("lean", _lean)):
+            rate, peak = _measure(fn, raw, n)
+            print(f"{n:>8} {name:>7} {rate:>12,.0f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [500, 5_000, 50_000])
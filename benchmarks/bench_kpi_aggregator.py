@@ -0,0 +1,54 @@
+"""Rolling-window KPI aggregation at dashboard load.
+
+Run:  python benchmarks/bench_kpi_aggregator.py [events_per_second] [seconds]
+
+Simulates a KPI stream of 20 metrics × 500 sources arriving at the given
+rate (default 50 000 events/s) for the given span of simulated time and
+feeds it to KPIAggregator.add().  Reported are ingest throughput (must
+exceed the arrival rate to keep up) and the latency of a dashboard refresh
+that queries every metric across all three windows.
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from optimed.adapters.kpi_sink.aggregator import KPIAggregator
+
+METRICS = [f"metric_{i}" for i in range(20)]
+SOURCES = [f"patient_{i}" for i in range(500)]
+
+
+def main(rate: int = 50_000, seconds: int = 10) -> None:
+    rng = random.Random(0)
+    n = rate * seconds
+    metrics = [rng.choice(METRICS) for _ in range(n)]
+    sources = [rng.choice(SOURCES) for _ in range(n)]
+    values = [rng.lognormvariate(4, 0.4) for _ in range(n)]
+    t0 = 1_700_000_000.0
+    step = 1.0 / rate
+
+    agg = KPIAggregator()
+    add = agg.add
+    started = time.perf_counter()
+    for i in range(n):
+        add(metrics[i], values[i], t0 + i * step, sources[i])
+    elapsed = time.perf_counter() - started
+
+    now = t0 + seconds
+    q0 = time.perf_counter()
+    for m in METRICS:
+        for w in ("1m", "5m", "60m"):
+            agg.query(m, window=w, now=now)
+    refresh = time.perf_counter() - q0
+
+    print(f"{n:>10,d} events  {n / elapsed:>12,.0f} events/s  "
+          f"(target {rate:,d}/s, {'OK' if n / elapsed >= rate else 'BEHIND'})")
+    print(f"{len(agg.series()):>10,d} series  dashboard refresh ({len(METRICS) * 3} queries): "
+          f"{refresh * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,70 @@
+"""Memory and filter speed: list[KPIEvent] vs KPIEventBatch.
+
+Run:  python benchmarks/bench_kpi_batch.py [n_events]
+
+Builds n events (default 1 000 000) over 20 metrics and 2 000 sources,
+then reports traced memory for both representations and the time to
+select one metric for one hour.
+"""
+from __future__ import annotations
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from optimed.core.domain import KPIEvent, KPIEventBatch
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _events(n: int) -> list[KPIEvent]:
+    rng = random.Random(0)
+    return [
+        KPIEvent(
+            metric=f"metric_{rng.randrange(20)}",
+            value=rng.uniform(40, 180),
+            unit="bpm",
+            recorded_at=T0 + timedelta(milliseconds=i * 50),
+            metric_source=f"patient_{rng.randrange(2000)}",
+        )
+        for i in range(n)
+    ]
+
+
+def _best(fn, repeat: int = 5):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, result
+
+
+def main(n: int = 1_000_000) -> None:
+    tracemalloc.start()
+    events = _events(n)
+    list_mem = tracemalloc.get_traced_memory()[0]
+    batch = KPIEventBatch.from_events(events)
+    batch_mem = tracemalloc.get_traced_memory()[0] - list_mem
+    tracemalloc.stop()
+
+    since, until = T0 + timedelta(hours=5), T0 + timedelta(hours=6)
+    gc.collect()
+    gc.disable()      # keep collector pauses over the list out of the timings
+    list_s, picked = _best(lambda: [e for e in events if e.metric == "metric_3" and since <= e.recorded_at < until])
+    batch_s, columnar = _best(lambda: batch.filter(metric="metric_3", since=since, until=until))
+    gc.enable()
+    assert len(picked) == len(columnar)
+
+    print(f"{n:,d} events")
+    print(f"  memory  list[KPIEvent] {list_mem / 2**20:9.1f} MiB   KPIEventBatch {batch_mem / 2**20:7.1f} MiB"
+          f"   ({list_mem / batch_mem:.0f}x)")
+    print(f"  filter  list[KPIEvent] {list_s * 1000:9.1f} ms    KPIEventBatch {batch_s * 1000:7.1f} ms"
+          f"    ({list_s / batch_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""Batched vs per-call VectorStore API, and quantized storage.
+
+Run:  python benchmarks/bench_vector_batch.py [n_vectors] [dim]
+
+Part 1 – n vectors (default 200 000 x 128) ingested with one upsert()
+await per vector vs upsert_many() in blocks of 10 000, then 500 queries
+via similarity_search() vs one similarity_search_many(), exact and IVF.
+
+Part 2 – the same data stored as float32, float16 and int8 (exact
+re-ranking of the best rerank * top_k): resident matrix size, IVF QPS
+and recall@10 against exact float32 search.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from optimed.adapters.vector_local.store import LocalVectorStore
+
+K = 10
+BLOCK = 10_000
+
+
+def _clustered(n: int, dim: int, rng: np.random.Generator, centres: np.ndarray) -> np.ndarray:
+    out = centres[rng.integers(len(centres), size=n)]
+    out += 1.0 * rng.standard_normal((n, dim), dtype=np.float32)
+    return out
+
+
+def _recall(got, truth) -> float:
+    return float(np.mean([len({i for i, _ in g} & {i for i, _ in t}) / K for g, t in zip(got, truth)]))
+
+
+async def main(n: int = 200_000, dim: int = 128) -> None:
+    rng = np.random.default_rng(0)
+    centres = rng.standard_normal((1_000, dim), dtype=np.float32)
+    x = _clustered(n, dim, rng, centres)
+    ids = [f"v{i}" for i in range(n)]
+    queries = _clustered(500, dim, rng, centres)
+
+    print(f"{n:,d} x {dim} vectors, {len(queries)} queries, top_{K}")
+    single = LocalVectorStore(dim=dim, ivf_threshold=n + 1)
+    started = time.perf_counter()
+    for eid, vec in zip(ids, x):
+        await single.upsert(eid, vec)
+    one_s = time.perf_counter() - started
+
+    batched = LocalVectorStore(dim=dim, ivf_threshold=n + 1)
+    started = time.perf_counter()
+    for lo in range(0, n, BLOCK):
+        await batched.upsert_many(ids[lo:lo + BLOCK], x[lo:lo + BLOCK])
+    many_s = time.perf_counter() - started
+    print(f"  ingest   upsert        {n / one_s:10,.0f} vec/s   upsert_many {n / many_s:10,.0f} vec/s"
+          f"   ({one_s / many_s:.0f}x)")
+
+    for label in ("exact", "ivf"):
+        if label == "ivf":
+            batched.train()
+        started = time.perf_counter()
+        for q in queries:
+            await batched.similarity_search(q, top_k=K)
+        one_s = time.perf_counter() - started
+        started = time.perf_counter()
+        truth = await batched.similarity_search_many(queries, top_k=K)
+        many_s = time.perf_counter() - started
+        print(f"  {label:<6}   search        {len(queries) / one_s:10,.0f} QPS     search_many {len(queries) / many_s:10,.0f} QPS"
+              f"   ({one_s / many_s:.1f}x)")
+        if label == "exact":
+            exact_truth = truth
+
+    for mode in ("none", "float16", "int8"):
+        store = LocalVectorStore(dim=dim, quantization=mode, ivf_threshold=n + 1)   # type: ignore[arg-type]
+        for lo in range(0, n, BLOCK):
+            store.add(ids[lo:lo + BLOCK], x[lo:lo + BLOCK])
+        store.train()
+        started = time.perf_counter()
+        got = store.search(queries, top_k=K)
+        qps = len(queries) / (time.perf_counter() - started)
+        print(f"  {mode:<8} matrix {store.memory_bytes / 2**20:7.1f} MiB   ivf {qps:7,.0f} QPS"
+              f"   recall@{K} {_recall(got, exact_truth):.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(a) for a in sys.argv[1:])))
@@ -0,0 +1,76 @@
+"""Recall and QPS of LocalVectorStore: exact vs IVF.
+
+Run:  python benchmarks/bench_vector_store.py [n_vectors] [dim] [n_queries]
+
+Indexes n clustered vectors (default 1 000 000 x 64, 2 000 clusters, noisy –
+embeddings are clustered, uniform noise is IVF's worst case), then reports
+build/training time, exact search QPS, and IVF recall@10 against the
+exact results plus QPS for several nprobe settings, and save()/open()
+time.
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from optimed.adapters.vector_local.store import LocalVectorStore
+
+K = 10
+
+
+def _clustered(n: int, dim: int, rng: np.random.Generator, centres: np.ndarray) -> np.ndarray:
+    out = centres[rng.integers(len(centres), size=n)]
+    out += 1.0 * rng.standard_normal((n, dim), dtype=np.float32)
+    return out
+
+
+def main(n: int = 1_000_000, dim: int = 64, n_queries: int = 200) -> None:
+    rng = np.random.default_rng(0)
+    centres = rng.standard_normal((2_000, dim), dtype=np.float32)
+    store = LocalVectorStore(dim=dim, ivf_threshold=n + 1)      # train explicitly below
+
+    started = time.perf_counter()
+    for start in range(0, n, 100_000):
+        stop = min(n, start + 100_000)
+        store.add([f"v{i}" for i in range(start, stop)], _clustered(stop - start, dim, rng, centres))
+    add_s = time.perf_counter() - started
+
+    queries = _clustered(n_queries, dim, rng, centres)
+    started = time.perf_counter()
+    truth = store.search(queries, top_k=K)
+    exact_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    store.train()
+    train_s = time.perf_counter() - started
+
+    print(f"{n:,d} x {dim} float32 vectors ({store._vecs[:n].nbytes / 2**20:,.0f} MiB)")
+    print(f"  add        {n / add_s:12,.0f} vectors/s")
+    print(f"  train IVF  {train_s:12.1f} s    ({len(store._centroids):,d} lists)")   # type: ignore[arg-type]
+    print(f"  exact      {n_queries / exact_s:12,.1f} QPS  recall@{K} 1.000")
+    for nprobe in (4, 8, 16, 32, 64):
+        store.nprobe = nprobe
+        started = time.perf_counter()
+        got = store.search(queries, top_k=K)
+        qps = n_queries / (time.perf_counter() - started)
+        recall = np.mean([
+            len({i for i, _ in g} & {i for i, _ in t}) / K for g, t in zip(got, truth)
+        ])
+        print(f"  ivf {nprobe:>3}    {qps:12,.1f} QPS  recall@{K} {recall:.3f}")
+
+    with tempfile.TemporaryDirectory() as path:
+        started = time.perf_counter()
+        store.save(path)
+        save_s = time.perf_counter() - started
+        started = time.perf_counter()
+        again = LocalVectorStore.open(path)
+        again.search(queries[:1], top_k=K)
+        open_s = time.perf_counter() - started
+    print(f"  save {save_s:.1f} s, open + first query {open_s:.1f} s (no retraining)")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
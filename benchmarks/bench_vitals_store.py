@@ -0,0 +1,61 @@
+"""Append rate and dashboard refresh latency of VitalsStore.
+
+Run:  python benchmarks/bench_vitals_store.py [n_patients] [seconds]
+
+Feeds n patients (default 1 000) x 5 vital codes at 1 Hz for the given
+number of seconds (default 3 600), then times one census-wide snapshot()
+per code over the last 15 minutes and over the last 6 hours (rollups),
+plus a per-patient downsample() of the last hour.
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+import numpy as np
+
+from optimed.adapters.fhir_hapi.repository import VITAL_CODES
+from optimed.adapters.vitals_store.store import VitalsStore
+
+T0 = 1_699_999_800.0
+
+
+def _best(fn, repeat: int = 5):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, result
+
+
+def main(n: int = 1_000, seconds: int = 3_600) -> None:
+    store = VitalsStore(raw_capacity=1800)
+    codes = list(VITAL_CODES)
+    values = np.random.default_rng(0).uniform(40, 160, seconds).tolist()
+    pids = [f"P{p}" for p in range(n)]
+
+    started = time.perf_counter()
+    for s in range(seconds):
+        t, v = T0 + s, values[s]
+        for pid in pids:
+            for code in codes:
+                store.append(pid, code, v, t)
+    ingest_s = time.perf_counter() - started
+    total = n * len(codes) * seconds
+    now = T0 + seconds
+
+    recent_s, snap = _best(lambda: [store.snapshot(c, since=now - 900) for c in codes])
+    long_s, _ = _best(lambda: [store.snapshot(c, since=now - 6 * 3600) for c in codes])
+    ds_s, _ = _best(lambda: store.downsample("P0", codes[0], now - 3600, bucket_seconds=300))
+    assert len(snap[0]) == n
+
+    print(f"{n:,d} patients x {len(codes)} vitals x {seconds:,d} s = {total:,d} samples")
+    print(f"  append            {total / ingest_s:12,.0f} samples/s")
+    print(f"  snapshot 15 min   {recent_s * 1000:10.1f} ms  (all {len(codes)} codes, raw rings)")
+    print(f"  snapshot 6 h      {long_s * 1000:10.1f} ms  (all {len(codes)} codes, rollups)")
+    print(f"  downsample 1 h    {ds_s * 1e6:10.1f} µs  (one series, 5-min buckets)")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
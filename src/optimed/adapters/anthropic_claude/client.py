@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import os 
-from typing import Sequence, cast
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, AsyncIterator, Iterable, Sequence, cast
 
 import anthropic 
 from anthropic.types import Message, MessageParam
+from anthropic.types.messages import MessageBatch
+from anthropic.types.messages.batch_create_params import Request
 
 from optimed.core.domain import ChatMessage, ChatRole
 from optimed.core.ports import LLMClient
+from optimed.adapters.http_transport.factory import TransportFactory, default_transport
+from optimed.adapters.anthropic_claude.limiter import Priority, RateLimiter, llm_priority
 
 
 """
@@ -15,10 +24,54 @@ Adapter: Anthropic Claude
 Implements the LLMClient Protocol defined in core/ports.py.
 """
 
+# Put ChatMessage.metadata[CACHE_CONTROL_KEY] = "ephemeral" on a leading
+# message (e.g. the serialized PatientContext) to make it a cache breakpoint.
+CACHE_CONTROL_KEY = "cache_control"
+MAX_CACHE_BREAKPOINTS = 4  # API limit per request
+_EPHEMERAL = {"type": "ephemeral"}
+
+
+# Batches API unavailable (plan, region, proxy) → fall back to fan-out
+_BATCH_UNAVAILABLE_STATUS = {403, 404, 405, 501}
+
+# Rough chars-per-token ratio used to pre-debit the input-token bucket
+_CHARS_PER_TOKEN = 4
+
+# Full-jitter backoff for 5xx / connection errors retried under the limiter
+_RETRY_BASE_DELAY = 0.5
+_RETRY_MAX_DELAY = 8.0
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """One answer from chat_batch(), keyed by the caller's custom_id."""
+    custom_id: str
+    message: ChatMessage | None = None
+    error: str | None = None        # "errored" / "expired" / exception text
+
+    @property
+    def ok(self) -> bool:
+        return self.message is not None
+
+
+@dataclass
+class StreamStats:
+    streams: int = 0
+    total_ttft: float = 0.0   # seconds, request sent → first text delta
+    max_ttft: float = 0.0
+
+    @property
+    def mean_ttft(self) -> float:
+        return self.total_ttft / self.streams if self.streams else 0.0
+
 class AnthropicClaudeClient(LLMClient):
     """
     Thin async wrapper around the Anthropic Claude API.
     - Converts our domain-level ChatMessage list to Claude format
+    - Marks the system prompt / flagged messages for prompt caching
+    - Streams text deltas via chat_stream() (time-to-first-token tracked)
+    - Submits offline workloads via the Message Batches API (chat_batch)
+    - Optional client-side RateLimiter (token buckets, AIMD, priorities)
     - Returns a new ChatMessage(role="ASSISTANT", ...)
     """
 
@@ -27,14 +80,32 @@ class AnthropicClaudeClient(LLMClient):
             *,
             model: str = "claude-3-5-sonnet-20241022",
             api_key: str | None = None,
+            base_url: str | None = None,
             timeout: float | None = None,
+            transport: TransportFactory | None = None,
+            prompt_caching: bool = True,
+            limiter: RateLimiter | None = None,
+            rate_limit_retries: int = 3,
     ) -> None:
         
         self._client = anthropic.AsyncAnthropic(
             api_key=api_key or os.getenv("ANTHROPIC_API_KEY"),
+            base_url=base_url,
             timeout=timeout,
+            http_client=(transport or default_transport()).client(timeout=timeout),
+            # the limiter owns retries; SDK retries would bypass it
+            max_retries=0 if limiter is not None else anthropic.DEFAULT_MAX_RETRIES,
         )
         self._model = model
+        self._prompt_caching = prompt_caching
+        self._limiter = limiter
+        self._rate_limit_retries = rate_limit_retries
+        self.stream_stats = StreamStats()
+
+    @property
+    def model(self) -> str:
+        """Model name requests are sent to."""
+        return self._model
 
     async def chat(
             self,
@@ -45,45 +116,295 @@ class AnthropicClaudeClient(LLMClient):
         """
         • Pull out the *first* system prompt (optional)
         • Map USER / ASSISTANT turns → Claude’s schema
+        • Mark stable prefixes as cacheable (prompt caching)
         • Fire the request asynchronously
         • Wrap the assistant answer back into our ChatMessage VO
         """
+        kwargs = self._request_kwargs(messages, temperature, max_tokens)
+        if self._limiter is None:
+            response: Message = await self._client.messages.create(**kwargs)
+        else:
+            response = await self._limited_create(kwargs)
+        return self._to_chat_message(response)
+
+    async def chat_stream(
+            self,
+            messages: Sequence[ChatMessage],
+            temperature: float = 0.7,
+            max_tokens: int | None = None,
+    ) -> AsyncIterator[str | ChatMessage]:
+        """
+        • Same request as chat(), sent with server-sent events
+        • Yield each text delta as it arrives
+        • Finish with the complete ChatMessage (usage + time_to_first_token_ms)
+        """
+        kwargs = self._request_kwargs(messages, temperature, max_tokens)
+        ticket = None
+        if self._limiter is not None:
+            ticket = await self._limiter.acquire(_estimate_input_tokens(kwargs))
+
+        started = time.perf_counter()
+        ttft: float | None = None
+        try:
+            async with self._client.messages.stream(**kwargs) as stream:
+                async for text in stream.text_stream:
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    yield text
+                final = await stream.get_final_message()
+            if self._limiter is not None and ticket is not None:
+                self._limiter.release(
+                    ticket,
+                    input_tokens=_billed_input_tokens(final.usage),
+                    output_tokens=final.usage.output_tokens,
+                    headers=stream.response.headers,
+                )
+                ticket = None
+        except anthropic.RateLimitError as exc:
+            if self._limiter is not None and ticket is not None:
+                self._limiter.release(ticket, rate_limited=True, headers=exc.response.headers)
+                ticket = None
+            raise
+        finally:
+            if self._limiter is not None and ticket is not None:
+                self._limiter.release(ticket)   # failed or abandoned mid-stream
+
+        if ttft is None:  # empty completion – first byte was the end
+            ttft = time.perf_counter() - started
+        self.stream_stats.streams += 1
+        self.stream_stats.total_ttft += ttft
+        self.stream_stats.max_ttft = max(self.stream_stats.max_ttft, ttft)
+
+        reply = self._to_chat_message(final)
+        yield reply.trusted_replace(
+            metadata={**reply.metadata, "time_to_first_token_ms": f"{ttft * 1000:.1f}"}
+        )
+
+    async def chat_batch(
+            self,
+            requests: Iterable[tuple[str, Sequence[ChatMessage]]],
+            *,
+            temperature: float = 0.7,
+            max_tokens: int | None = None,
+            poll_interval: float = 30.0,
+            max_batch_size: int = 10_000,
+            fallback_concurrency: int = 4,
+            max_wait: float | None = None,
+    ) -> AsyncIterator[BatchResult]:
+        """
+        • Submit (custom_id, messages) pairs through the Message Batches API
+          (half price, separate rate limits from interactive traffic)
+        • Poll each batch until it has ended
+        • Stream BatchResult objects back as results are read
+        • If batches are unavailable, fan out to chat() with at most
+          *fallback_concurrency* requests in flight
+        • All chunks of *max_batch_size* are submitted before polling, so
+          they are processed side by side
+        • Anything still running when the caller stops iterating (or after
+          *max_wait* seconds overall → TimeoutError) is cancelled – open
+          batches and in-flight fallback requests alike
+        """
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        pending = list(requests)
+        submitted: dict[str, MessageBatch] = {}
+        fallback: list[tuple[str, Sequence[ChatMessage]]] = []
+        try:
+            for start in range(0, len(pending), max_batch_size):
+                chunk = pending[start:start + max_batch_size]
+                try:
+                    batch = await self._client.messages.batches.create(requests=cast("list[Request]", [
+                        {"custom_id": cid, "params": self._request_kwargs(msgs, temperature, max_tokens)}
+                        for cid, msgs in chunk
+                    ]))
+                except anthropic.APIStatusError as exc:
+                    if exc.status_code not in _BATCH_UNAVAILABLE_STATUS:
+                        raise
+                    fallback = pending[start:]
+                    break
+                submitted[batch.id] = batch
+
+            unread = list(submitted)
+            while unread:
+                for batch_id in [b for b in unread if submitted[b].processing_status == "ended"]:
+                    unread.remove(batch_id)
+                    async for item in await self._client.messages.batches.results(batch_id):
+                        yield self._batch_result(item)
+                if not unread:
+                    break
+                delay = poll_interval
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"{len(unread)} message batch(es) did not end within {max_wait}s")
+                    delay = min(delay, remaining)
+                await asyncio.sleep(delay)
+                for batch in await asyncio.gather(*(self._client.messages.batches.retrieve(b) for b in unread)):
+                    submitted[batch.id] = batch
+
+            if fallback:
+                async with contextlib.aclosing(self._fan_out(
+                    fallback, temperature, max_tokens, fallback_concurrency, deadline,
+                )) as results:
+                    async for result in results:
+                        yield result
+        finally:
+            for batch in submitted.values():
+                if batch.processing_status != "ended":
+                    # abandoned, timed out or failed while polling – stop paying for it
+                    with contextlib.suppress(anthropic.APIError):
+                        await self._client.messages.batches.cancel(batch.id)
+
+    def _batch_result(self, item: Any) -> BatchResult:
+        """One line of a batch results file → BatchResult."""
+        if item.result.type == "succeeded":
+            return BatchResult(item.custom_id, message=self._to_chat_message(item.result.message))
+        error = getattr(getattr(item.result, "error", None), "error", None)
+        return BatchResult(item.custom_id, error=str(getattr(error, "message", None) or item.result.type))
+
+    async def _fan_out(
+            self,
+            requests: list[tuple[str, Sequence[ChatMessage]]],
+            temperature: float,
+            max_tokens: int | None,
+            concurrency: int,
+            deadline: float | None = None,
+    ) -> AsyncGenerator[BatchResult, None]:
+        """chat_batch fallback: individual chat() calls, bounded concurrency.
+
+        Calls not finished when the consumer stops or *deadline* (monotonic
+        seconds) passes are cancelled.
+        """
+        limit = asyncio.Semaphore(concurrency)
+
+        async def _one(cid: str, msgs: Sequence[ChatMessage]) -> BatchResult:
+            async with limit:
+                try:
+                    with llm_priority(Priority.BACKGROUND):
+                        reply = await self.chat(msgs, temperature, max_tokens)
+                    return BatchResult(cid, message=reply)
+                except anthropic.APIError as exc:
+                    return BatchResult(cid, error=str(exc))
+
+        tasks = [asyncio.ensure_future(_one(cid, msgs)) for cid, msgs in requests]
+        try:
+            todo: set[asyncio.Future[BatchResult]] = set(tasks)
+            while todo:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, todo = await asyncio.wait(todo, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise TimeoutError(f"{len(todo)} fallback request(s) still running at the deadline")
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _limited_create(self, kwargs: dict[str, Any]) -> Message:
+        """messages.create() under the RateLimiter.
+
+        429s are re-queued behind the limiter's retry-after pause; 5xx and
+        connection errors are retried after a jittered backoff.  Both count
+        against *rate_limit_retries*.  Every response's rate-limit headers
+        are fed back to the limiter.
+        """
+        assert self._limiter is not None
+        estimate = _estimate_input_tokens(kwargs)
+        attempt = 0
+        while True:
+            attempt += 1
+            ticket = await self._limiter.acquire(estimate)
+            try:
+                raw = await self._client.messages.with_raw_response.create(**kwargs)
+                response: Message = await raw.parse()
+            except anthropic.RateLimitError as exc:
+                self._limiter.release(ticket, rate_limited=True, headers=exc.response.headers)
+                if attempt > self._rate_limit_retries:
+                    raise
+                continue   # re-queued; the limiter waits out retry-after
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as exc:
+                headers = exc.response.headers if isinstance(exc, anthropic.APIStatusError) else None
+                self._limiter.release(ticket, headers=headers)
+                transient = not isinstance(exc, anthropic.APIStatusError) or exc.status_code >= 500
+                if not transient or attempt > self._rate_limit_retries:
+                    raise
+                cap = min(_RETRY_MAX_DELAY, _RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                await asyncio.sleep(random.uniform(0, cap))   # "full jitter"
+                continue
+            except BaseException:
+                self._limiter.release(ticket)
+                raise
+            usage = response.usage
+            self._limiter.release(
+                ticket,
+                input_tokens=_billed_input_tokens(usage),
+                output_tokens=usage.output_tokens,
+                headers=raw.headers,
+            )
+            return response
+
+    def _request_kwargs(
+            self,
+            messages: Sequence[ChatMessage],
+            temperature: float,
+            max_tokens: int | None,
+    ) -> dict[str, Any]:
+        """Build the messages.create(...) arguments for a ChatMessage sequence.
+
+        With prompt caching on, the system prompt and every message whose
+        metadata has ``cache_control="ephemeral"`` become cache breakpoints.
+        Claude caches the whole prefix up to a breakpoint and allows at most
+        four, so only the last ones are kept.
+        """
         system_prompt: str | None = None
-        claude_msgs: list[dict[str, str]] = []
+        turns: list[ChatMessage] = []
 
         for msg in messages:
             if msg.role is ChatRole.SYSTEM and system_prompt is None:
                 system_prompt = msg.content
             else:
-                claude_msgs.append({
-                    "role": msg.role.value,
-                    "content": msg.content
-                })
-        
-        claude_msgs_typed = cast("list[MessageParam]", claude_msgs)
+                turns.append(msg)
 
-        response: Message | None = None
+        breakpoints: set[int] = set()
+        if self._prompt_caching:
+            marked = [
+                i for i, m in enumerate(turns)
+                if m.metadata.get(CACHE_CONTROL_KEY) == "ephemeral"
+            ]
+            budget = MAX_CACHE_BREAKPOINTS - (1 if system_prompt is not None else 0)
+            breakpoints = set(marked[-budget:]) if budget > 0 else set()
 
+        claude_msgs: list[dict[str, Any]] = []
+        for i, msg in enumerate(turns):
+            if i in breakpoints:
+                content: Any = [{"type": "text", "text": msg.content, "cache_control": _EPHEMERAL}]
+            else:
+                content = msg.content
+            claude_msgs.append({
+                "role": msg.role.value,
+                "content": content
+            })
+
+        kwargs: dict[str, Any] = {
+            "model": self._model,
+            "messages": cast("list[MessageParam]", claude_msgs),
+            "temperature": temperature,
+            "max_tokens": max_tokens or 4096,  # Claude's default max tokens
+        }
         if system_prompt is not None:
-            response = await self._client.messages.create(
-                model=self._model,
-                messages=claude_msgs_typed,
-                system=system_prompt,
-                temperature=temperature,
-                max_tokens=max_tokens or 4096,  # Claude's default max tokens
-            )
-        else:
-            response = await self._client.messages.create(
-                model=self._model,
-                messages=claude_msgs_typed,
-                temperature=temperature,
-                max_tokens=max_tokens or 4096,  # Claude's default max tokens
-            )
+            if self._prompt_caching:
+                kwargs["system"] = [{"type": "text", "text": system_prompt, "cache_control": _EPHEMERAL}]
+            else:
+                kwargs["system"] = system_prompt
+        return kwargs
 
+    def _to_chat_message(self, response: Message) -> ChatMessage:
+        """Wrap a Claude Message (text blocks + usage) into our ChatMessage."""
         assistant_text = "".join(
             getattr(block, "text", "") for block in response.content
             if getattr(block, "type", None) == "text"
         )
+        usage = response.usage
 
         return ChatMessage(
             role=ChatRole.ASSISTANT,
@@ -91,8 +412,26 @@ class AnthropicClaudeClient(LLMClient):
             metadata={
                 "model": self._model, 
                 "response_id": response.id,
-                "input_tokens": str(response.usage.input_tokens),
-                "output_tokens": str(response.usage.output_tokens)
+                "input_tokens": str(usage.input_tokens),
+                "output_tokens": str(usage.output_tokens),
+                "cache_creation_input_tokens": str(getattr(usage, "cache_creation_input_tokens", None) or 0),
+                "cache_read_input_tokens": str(getattr(usage, "cache_read_input_tokens", None) or 0),
                 },
         )
-    
\ No newline at end of file
+
+
+def _billed_input_tokens(usage: Any) -> int:
+    """Input tokens counted against the ITPM limit (cache reads are not)."""
+    return usage.input_tokens + (getattr(usage, "cache_creation_input_tokens", None) or 0)
+
+
+def _estimate_input_tokens(kwargs: dict[str, Any]) -> int:
+    """Cheap pre-flight estimate of a request's input tokens (~4 chars/token)."""
+    def _chars(content: Any) -> int:
+        if isinstance(content, str):
+            return len(content)
+        return sum(len(block.get("text", "")) for block in content)
+
+    chars = _chars(kwargs.get("system", ""))
+    chars += sum(_chars(m["content"]) for m in kwargs["messages"])
+    return chars // _CHARS_PER_TOKEN + 1
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Iterator, Mapping
+
+"""
+Client-side rate limiting for AnthropicClaudeClient.
+
+✓ Token buckets for requests/min, input tokens/min and output tokens/min,
+  settled with the real ``usage`` numbers after each call
+✓ AIMD in-flight limit: +1/limit per success, halved on every 429, with
+  admissions paused for the server's ``retry-after``
+✓ Buckets capped by the ``anthropic-ratelimit-*-remaining`` headers of
+  every response, so budget spent by other clients is seen before a 429
+✓ Priority queue – interactive chat is admitted before background jobs;
+  equal priorities are served first-come, first-served
+
+Usage::
+
+    llm = AnthropicClaudeClient(limiter=RateLimiter(requests_per_minute=50))
+    with llm_priority(Priority.BACKGROUND):
+        await llm.chat(...)
+"""
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 10
+
+
+_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Run the enclosed LLM calls at *priority* (defaults to INTERACTIVE)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Continuously refilling bucket sized to one minute of budget."""
+
+    def __init__(self, per_minute: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._clock = clock
+        self._tokens = self.capacity
+        self._last = clock()
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def wait_time(self, n: float) -> float:
+        """Seconds until *n* tokens (capped at capacity) are available."""
+        missing = min(n, self.capacity) - self.tokens
+        return max(0.0, missing / self._rate) if self._rate else float("inf")
+
+    def take(self, n: float) -> None:
+        """Debit *n* tokens; the balance may go negative (post-hoc usage)."""
+        self._refill()
+        self._tokens -= n
+
+    def cap(self, remaining: float) -> None:
+        """Server says only *remaining* are left – never believe we have more."""
+        self._refill()
+        self._tokens = min(self._tokens, remaining)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+
+@dataclass
+class LimiterStats:
+    admitted: int = 0
+    rate_limited: int = 0        # 429s reported back
+    queue_depth: int = 0         # callers waiting right now
+    max_queue_depth: int = 0
+    total_queue_wait: float = 0.0
+    in_flight: int = 0
+    limit: float = 0.0           # current AIMD concurrency limit
+
+
+@dataclass
+class Ticket:
+    """Admission receipt; hand it back to RateLimiter.release()."""
+    est_input_tokens: int
+    priority: Priority
+    admitted_at: float
+
+
+class RateLimiter:
+    """Token-bucket + AIMD concurrency limiter with a priority queue."""
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: float = 50,
+        input_tokens_per_minute: float = 40_000,
+        output_tokens_per_minute: float = 8_000,
+        initial_concurrency: float = 4,
+        min_concurrency: float = 1,
+        max_concurrency: float = 32,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        self._rpm = TokenBucket(requests_per_minute, clock=clock)
+        self._itpm = TokenBucket(input_tokens_per_minute, clock=clock)
+        self._otpm = TokenBucket(output_tokens_per_minute, clock=clock)
+        self._min = min_concurrency
+        self._max = max_concurrency
+        self._limit = initial_concurrency
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._seq = itertools.count()
+        self._waiters: list[tuple[int, int, float, int, asyncio.Future[Ticket]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self.stats = LimiterStats(limit=initial_concurrency)
+
+    async def acquire(self, est_input_tokens: int = 0, priority: Priority | None = None) -> Ticket:
+        """Wait until a request of *est_input_tokens* may be sent."""
+        prio = _priority.get() if priority is None else priority
+        fut: asyncio.Future[Ticket] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (prio, next(self._seq), self._clock(), est_input_tokens, fut))
+        self._update_queue_stats()
+        self._dispatch()
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release(fut.result())   # admitted just as we were cancelled
+            raise
+
+    def release(
+        self,
+        ticket: Ticket,
+        *,
+        input_tokens: int | None = None,
+        output_tokens: int | None = None,
+        rate_limited: bool = False,
+        headers: Mapping[str, str] | None = None,
+    ) -> None:
+        """Return a slot and settle the buckets with what was really used."""
+        self._in_flight -= 1
+        if input_tokens is not None:
+            self._itpm.take(input_tokens - ticket.est_input_tokens)
+        if output_tokens is not None:
+            self._otpm.take(output_tokens)
+
+        if headers is not None:
+            self._cap_remaining(headers)
+        if rate_limited:
+            self.stats.rate_limited += 1
+            self._limit = max(self._min, self._limit / 2)
+            self._pause(headers or {})
+        elif input_tokens is not None:
+            self._limit = min(self._max, self._limit + 1 / self._limit)
+
+        self.stats.in_flight = self._in_flight
+        self.stats.limit = self._limit
+        self._dispatch()
+
+    def _pause(self, headers: Mapping[str, str]) -> None:
+        """Stop admitting until the 429's retry-after has passed."""
+        try:
+            retry_after = float(headers.get("retry-after", "1"))
+        except ValueError:
+            retry_after = 1.0
+        self._paused_until = max(self._paused_until, self._clock() + retry_after)
+
+    def _cap_remaining(self, headers: Mapping[str, str]) -> None:
+        """Honour the anthropic-ratelimit-*-remaining headers."""
+        for header, bucket in (
+            ("anthropic-ratelimit-requests-remaining", self._rpm),
+            ("anthropic-ratelimit-input-tokens-remaining", self._itpm),
+            ("anthropic-ratelimit-output-tokens-remaining", self._otpm),
+        ):
+            if header in headers:
+                try:
+                    bucket.cap(float(headers[header]))
+                except ValueError:
+                    pass
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order while slots and budget allow."""
+        while self._waiters:
+            prio, _, queued_at, est, fut = self._waiters[0]
+            if fut.done():                       # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= int(self._limit):
+                break                            # a release() will re-dispatch
+            wait = max(
+                self._paused_until - self._clock(),
+                self._rpm.wait_time(1),
+                self._itpm.wait_time(est),
+                self._otpm.wait_time(1),
+            )
+            if wait > 0:
+                self._schedule(wait)
+                break
+            heapq.heappop(self._waiters)
+            self._rpm.take(1)
+            self._itpm.take(est)
+            self._in_flight += 1
+            now = self._clock()
+            self.stats.admitted += 1
+            self.stats.in_flight = self._in_flight
+            self.stats.total_queue_wait += now - queued_at
+            fut.set_result(Ticket(est, Priority(prio), now))
+        self._update_queue_stats()
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _update_queue_stats(self) -> None:
+        depth = sum(1 for w in self._waiters if not w[4].done())
+        self.stats.queue_depth = depth
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
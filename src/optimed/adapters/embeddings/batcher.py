@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from optimed.core.ports import EmbeddingProvider
+
+"""
+optimed.adapters.embeddings.batcher
+-----------------------------------
+
+Async micro-batching wrapper for any EmbeddingProvider.
+
+✓ embed() calls arriving within ``max_wait`` seconds share one model call
+✓ Flushes early once ``max_batch`` texts are queued; large calls are split
+✓ Duplicate texts inside a flush are embedded once
+✓ At most ``max_concurrency`` model calls in flight
+✓ A failing model call fails only the callers whose texts were in it
+✓ Batch-size counters via ``stats``
+
+Usage
+-----
+    embedder = MicroBatchingEmbedder(model, max_batch=64, max_wait=0.005)
+    vecs = await embedder.embed([note_text])   # from many tasks at once
+"""
+
+
+@dataclass
+class MicroBatchStats:
+    calls: int = 0           # embed() invocations
+    texts: int = 0           # texts submitted
+    batches: int = 0         # model calls made
+    embedded: int = 0        # texts sent to the model (after de-duplication)
+    largest_batch: int = 0
+
+    @property
+    def mean_batch(self) -> float:
+        return self.embedded / self.batches if self.batches else 0.0
+
+
+class MicroBatchingEmbedder(EmbeddingProvider):
+    """Coalesces concurrent embed() calls into batched inner calls."""
+
+    def __init__(
+        self,
+        inner: EmbeddingProvider,
+        *,
+        max_batch: int = 64,
+        max_wait: float = 0.005,
+        max_concurrency: int = 4,
+    ) -> None:
+        if max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        self._inner = inner
+        self._model = getattr(inner, "model", type(inner).__name__)
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._queue: list[tuple[str, asyncio.Future[np.ndarray]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task[None]] = set()
+        self.stats = MicroBatchStats()
+
+    @property
+    def dim(self) -> int:
+        return self._inner.dim
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        self.stats.calls += 1
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        futures: list[asyncio.Future[np.ndarray]] = []
+        for text in texts:
+            fut: asyncio.Future[np.ndarray] = loop.create_future()
+            self._queue.append((text, fut))
+            futures.append(fut)
+        self.stats.texts += len(texts)
+
+        if len(self._queue) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._max_wait, self._flush)
+        try:
+            rows = await asyncio.gather(*futures)
+        except BaseException:
+            # drop our texts from later batches and mark sibling errors as seen
+            for fut in futures:
+                if not fut.done():
+                    fut.cancel()
+                elif not fut.cancelled():
+                    fut.exception()
+            raise
+        return np.stack(rows)
+
+    async def flush(self) -> None:
+        """Send whatever is queued now and wait for every in-flight batch."""
+        self._flush()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            batch, self._queue = self._queue[:self._max_batch], self._queue[self._max_batch:]
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future[np.ndarray]]]) -> None:
+        live = [(text, fut) for text, fut in batch if not fut.done()]   # callers may have been cancelled
+        if not live:
+            return
+        unique = list(dict.fromkeys(text for text, _ in live))
+        async with self._slots:
+            try:
+                vecs = np.asarray(await self._inner.embed(unique), dtype=np.float32)
+                if vecs.shape != (len(unique), self.dim):
+                    raise ValueError(f"embedder returned shape {vecs.shape}, expected {(len(unique), self.dim)}")
+            except Exception as exc:
+                for _, fut in live:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                return
+        self.stats.batches += 1
+        self.stats.embedded += len(unique)
+        self.stats.largest_batch = max(self.stats.largest_batch, len(unique))
+        row_of = {text: i for i, text in enumerate(unique)}
+        for text, fut in live:
+            if not fut.done():
+                fut.set_result(vecs[row_of[text]])
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from optimed.core.ports import EmbeddingProvider, VectorStore
+
+from .text import normalize_text
+
+"""
+optimed.adapters.embeddings.cache
+---------------------------------
+
+Content-addressed embedding cache for any EmbeddingProvider.
+
+✓ Key = SHA-256 of (model, dim, normalized text) – whitespace / Unicode
+  form changes do not cause a re-embed, a model change does
+✓ In-memory LRU tier + optional SQLite tier (float32 BLOBs) that survives
+  restarts; no TTL – an embedding of the same text never goes stale
+✓ Only misses reach the model, de-duplicated, in one call per embed()
+✓ Concurrent identical misses share one upstream request
+✓ ``index_texts`` re-indexes a corpus paying only for changed chunks
+✓ Hit-rate counters via ``stats``
+
+Usage
+-----
+    embedder = CachingEmbedder(MicroBatchingEmbedder(model), disk_path="emb.sqlite")
+    await index_texts(store, embedder, {"sepsis-1": chunk_text, ...})
+"""
+
+
+@dataclass
+class EmbeddingCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0          # distinct texts sent to the model
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+
+_DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    key    TEXT PRIMARY KEY,
+    vector BLOB NOT NULL
+);
+"""
+
+_SQL_CHUNK = 500     # keep IN (...) under SQLite's bound-parameter limit
+
+
+def embedding_key(model: str, dim: int, text: str) -> str:
+    """Canonical hash of everything that determines the embedding."""
+    return hashlib.sha256(f"{model}\x1f{dim}\x1f{normalize_text(text)}".encode()).hexdigest()
+
+
+class CachingEmbedder(EmbeddingProvider):
+    """Wraps an EmbeddingProvider with a content-hash memory + disk cache."""
+
+    def __init__(
+        self,
+        inner: EmbeddingProvider,
+        *,
+        max_entries: int = 65536,
+        disk_path: str | None = None,
+    ) -> None:
+        self._inner = inner
+        self._model = getattr(inner, "model", type(inner).__name__)
+        self._max_entries = max_entries
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._pending: dict[str, asyncio.Task[dict[str, np.ndarray]]] = {}
+        self._db: sqlite3.Connection | None = None
+        if disk_path is not None:
+            self._db = sqlite3.connect(disk_path)
+            self._db.execute(_DISK_SCHEMA)
+            self._db.commit()
+        self.stats = EmbeddingCacheStats()
+
+    @property
+    def dim(self) -> int:
+        return self._inner.dim
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    def key(self, text: str) -> str:
+        return embedding_key(self._model, self.dim, text)
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        keys = [self.key(t) for t in texts]
+        text_of = dict(zip(keys, texts))          # one spelling per key; all share its vector
+        found = self._lookup(list(text_of))
+
+        waiting: dict[asyncio.Task[dict[str, np.ndarray]], None] = {}
+        missing: list[str] = []
+        for key in text_of:
+            if key in found:
+                continue
+            task = self._pending.get(key)
+            if task is None:
+                missing.append(key)
+            else:
+                waiting[task] = None
+        if missing:
+            self.stats.misses += len(missing)
+            task = asyncio.ensure_future(self._fetch(missing, [text_of[k] for k in missing]))
+            for key in missing:
+                self._pending[key] = task
+            task.add_done_callback(lambda _: [self._pending.pop(k, None) for k in missing])
+            waiting[task] = None
+        for fetched in await asyncio.gather(*(asyncio.shield(t) for t in waiting)):
+            found.update(fetched)
+
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            out[i] = found[key]
+        return out
+
+    def cached(self, texts: Sequence[str]) -> np.ndarray:
+        """Boolean per text: would embed() answer it without the model?"""
+        keys = [self.key(t) for t in texts]
+        present = set(self._lookup(list(dict.fromkeys(keys)), count=False))
+        return np.array([k in present for k in keys], dtype=bool)
+
+    async def _fetch(self, keys: list[str], texts: list[str]) -> dict[str, np.ndarray]:
+        vecs = np.asarray(await self._inner.embed(texts), dtype=np.float32)
+        if vecs.shape != (len(texts), self.dim):
+            raise ValueError(f"embedder returned shape {vecs.shape}, expected {(len(texts), self.dim)}")
+        fetched = dict(zip(keys, vecs))
+        self._store(fetched)
+        return fetched
+
+    def invalidate(self) -> None:
+        """Drop both tiers."""
+        self._memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM embedding_cache")
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _lookup(self, keys: list[str], *, count: bool = True) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        cold: list[str] = []
+        for key in keys:
+            vec = self._memory.get(key)
+            if vec is None:
+                cold.append(key)
+            else:
+                self._memory.move_to_end(key)
+                found[key] = vec
+        if count:
+            self.stats.memory_hits += len(found)
+
+        if self._db is not None and cold:
+            disk: dict[str, np.ndarray] = {}
+            for start in range(0, len(cold), _SQL_CHUNK):
+                chunk = cold[start:start + _SQL_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    vec = np.frombuffer(blob, dtype="<f4")
+                    if vec.shape == (self.dim,):
+                        disk[key] = vec
+            if count:
+                self.stats.disk_hits += len(disk)
+                self._remember(disk)
+            found.update(disk)
+        return found
+
+    def _store(self, fetched: dict[str, np.ndarray]) -> None:
+        self._remember(fetched)
+        if self._db is not None:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embedding_cache VALUES (?, ?)",
+                [(key, vec.astype("<f4").tobytes()) for key, vec in fetched.items()],
+            )
+            self._db.commit()
+
+    def _remember(self, entries: dict[str, np.ndarray]) -> None:
+        for key, vec in entries.items():
+            vec = vec.copy()
+            vec.flags.writeable = False
+            self._memory[key] = vec
+            self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+
+async def index_texts(
+    store: VectorStore,
+    embedder: EmbeddingProvider,
+    texts: Mapping[str, str],
+    metadata: Mapping[str, dict[str, str]] | None = None,
+    *,
+    batch_size: int = 512,
+) -> int:
+    """Embed and upsert every ``id → text`` entry; returns rows written.
+
+    With a CachingEmbedder unchanged chunks cost a hash and a lookup, so
+    re-indexing a whole guideline after an edit only embeds the changed
+    chunks.  Rows go to the store via ``upsert_many`` in *batch_size* blocks.
+    """
+    ids = list(texts)
+    for start in range(0, len(ids), batch_size):
+        block = ids[start:start + batch_size]
+        vecs = await embedder.embed([texts[i] for i in block])
+        meta = None if metadata is None else [metadata.get(i) for i in block]
+        await store.upsert_many(block, vecs, meta)
+    return len(ids)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+
+from optimed.core.ports import EmbeddingProvider
+
+from .text import normalize_text
+
+"""
+optimed.adapters.embeddings.hashing
+-----------------------------------
+
+Deterministic, dependency-free embedder for tests and offline runs.
+
+✓ Feature hashing of lower-cased word unigrams + bigrams (BLAKE2b, signed)
+✓ L2-normalized float32 rows – cosine-ready for LocalVectorStore
+✓ Same text → same vector on every machine and every run
+✓ Texts sharing words land close together; no model, no network
+
+Usage
+-----
+    embedder = HashingEmbedder(dim=256)
+    vecs = await embedder.embed(["K+ 6.4 mmol/L", "potassium high"])
+"""
+
+_TOKEN_RE = re.compile(r"\w+(?:[.+]\w*)*")
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token: str, dim: int) -> int:
+    """Signed bucket: index in [0, dim) times ±1, encoded as ±(index + 1)."""
+    h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+    index = (h >> 1) % dim
+    return index + 1 if h & 1 else -(index + 1)
+
+
+class HashingEmbedder(EmbeddingProvider):
+    """Bag-of-words feature hashing into *dim* buckets."""
+
+    def __init__(self, dim: int = 256, *, bigrams: bool = True) -> None:
+        if dim <= 0:
+            raise ValueError("dim must be positive")
+        self._dim = dim
+        self._bigrams = bigrams
+        self.calls = 0
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    @property
+    def model(self) -> str:
+        return f"hashing-v1-{self._dim}{'-bi' if self._bigrams else ''}"
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        self.calls += 1
+        return self.embed_sync(texts)
+
+    def embed_sync(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self._dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN_RE.findall(normalize_text(text).lower())
+            tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])] if self._bigrams else words
+            if not tokens:
+                continue
+            signed = np.fromiter((_bucket(t, self._dim) for t in tokens), dtype=np.int64, count=len(tokens))
+            np.add.at(out[row], np.abs(signed) - 1, np.sign(signed).astype(np.float32))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import unicodedata
+
+from optimed.core.domain import PatientContext
+
+"""
+optimed.adapters.embeddings.text
+--------------------------------
+
+Canonical text for embedding.
+
+✓ ``normalize_text`` – NFC + collapsed whitespace; what cache keys hash
+✓ ``patient_text`` – stable rendering of a PatientContext (no name, no
+  timestamps, sorted keys) so an unchanged chart maps to the same text
+"""
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalize and collapse runs of whitespace (case is preserved)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def patient_text(ctx: PatientContext) -> str:
+    """Clinical summary of *ctx* for embedding – identifiers and PHI-free."""
+    parts = [f"{ctx.age} y {ctx.sex}, care unit {ctx.care_unit}."]
+    if ctx.vitals:
+        parts.append("Vitals: " + "; ".join(f"{k} {v}" for k, v in sorted(ctx.vitals.items())) + ".")
+    if ctx.labs:
+        parts.append("Labs: " + "; ".join(f"{k} {v}" for k, v in sorted(ctx.labs.items())) + ".")
+    latest = {m.code: m for m in ctx.observations}          # oldest first → last wins
+    if latest:
+        parts.append("Latest: " + "; ".join(
+            f"{code} {m.value:g} {m.unit}".rstrip() for code, m in sorted(latest.items())
+        ) + ".")
+    return normalize_text(" ".join(parts))
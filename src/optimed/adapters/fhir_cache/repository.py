@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Sequence
+
+from optimed.core.domain import PatientContext
+from optimed.core.ports import ConditionalFHIRRepository, FHIRRepository
+
+"""
+optimed.adapters.fhir_cache.repository
+--------------------------------------
+
+Caching decorator for any FHIRRepository.
+
+✓ Bounded LRU of PatientContext objects with a freshness TTL
+✓ Expired entries are revalidated, not re-downloaded, when the wrapped
+  repository implements ConditionalFHIRRepository (Patient and
+  Observations unchanged since the stored version)
+✓ Bulk loads keep per-patient versions, so they revalidate the same way
+✓ Hard ``max_age`` bounds what revalidation cannot see (e.g. deleted
+  Observations)
+✓ Hit / miss / revalidation counters via ``stats``
+"""
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0            # served from a fresh entry
+    misses: int = 0          # not cached → full load
+    revalidations: int = 0   # expired entry confirmed unchanged
+    refreshes: int = 0       # expired entry changed, or past max_age → reloaded
+    evictions: int = 0       # dropped to respect max_entries
+
+    @property
+    def hit_rate(self) -> float:
+        served = self.hits + self.revalidations
+        total = served + self.misses + self.refreshes
+        return served / total if total else 0.0
+
+
+@dataclass
+class _Entry:
+    ctx: PatientContext
+    version: str | None
+    loaded_at: float      # last full load (Observations included)
+    fresh_until: float    # no revalidation needed before this
+
+
+class CachingFHIRRepository(FHIRRepository):
+    """Wraps a FHIRRepository with a TTL + LRU PatientContext cache."""
+
+    def __init__(
+        self,
+        inner: FHIRRepository,
+        *,
+        max_entries: int = 512,
+        ttl: float = 30.0,
+        max_age: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._inner = inner
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._max_age = max_age
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # Coalesces concurrent loads of the same patient into one request
+        self._pending: dict[str, asyncio.Task[PatientContext]] = {}
+        self.stats = CacheStats()
+
+    async def get_patient(self, patient_id: str) -> PatientContext:
+        entry = self._entries.get(patient_id)
+        if entry is not None and self._clock() < entry.fresh_until:
+            self._entries.move_to_end(patient_id)
+            self.stats.hits += 1
+            return entry.ctx
+
+        task = self._pending.get(patient_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(patient_id, entry))
+            self._pending[patient_id] = task
+            task.add_done_callback(lambda _: self._pending.pop(patient_id, None))
+        return await asyncio.shield(task)
+
+    async def get_patients(self, patient_ids: Sequence[str]) -> Sequence[PatientContext]:
+        """Serve fresh entries, revalidate expired ones, bulk-load the rest."""
+        inner = self._inner if isinstance(self._inner, ConditionalFHIRRepository) else None
+        now = self._clock()
+        ids = list(dict.fromkeys(patient_ids))
+        cached: dict[str, PatientContext] = {}
+        revalidate: list[str] = []
+        bulk: list[str] = []
+        for pid in ids:
+            entry = self._entries.get(pid)
+            if entry is None:
+                self.stats.misses += 1
+                bulk.append(pid)
+            elif now < entry.fresh_until:
+                self._entries.move_to_end(pid)
+                self.stats.hits += 1
+                cached[pid] = entry.ctx
+            elif inner is not None and entry.version is not None and now - entry.loaded_at < self._max_age:
+                revalidate.append(pid)         # counted by _load
+            else:
+                self.stats.refreshes += 1
+                bulk.append(pid)
+
+        async def _bulk() -> Sequence[tuple[PatientContext, str | None]]:
+            if not bulk:
+                return []
+            if inner is not None:
+                return await inner.get_patients_versioned(bulk)
+            return [(ctx, None) for ctx in await self._inner.get_patients(bulk)]
+
+        loaded, revalidated = await asyncio.gather(
+            _bulk(), asyncio.gather(*(self.get_patient(pid) for pid in revalidate)),
+        )
+        for ctx, version in loaded:
+            self._store(ctx.patient_id, ctx, version)
+            cached[ctx.patient_id] = ctx
+        cached.update(zip(revalidate, revalidated))
+        return [cached[pid] for pid in ids if pid in cached]
+
+    async def search_patients(self, query: str) -> Sequence[PatientContext]:
+        """Searches are not cached; results carry no vitals/labs anyway."""
+        return await self._inner.search_patients(query)
+
+    def iter_patients(self, query: str, *, page_size: int = 50) -> AsyncIterator[PatientContext]:
+        """Streaming searches pass straight through as well."""
+        return self._inner.iter_patients(query, page_size=page_size)
+
+    def invalidate(self, patient_id: str | None = None) -> None:
+        """Drop one patient, or everything when *patient_id* is None."""
+        if patient_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(patient_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def _load(self, patient_id: str, entry: _Entry | None) -> PatientContext:
+        inner = self._inner if isinstance(self._inner, ConditionalFHIRRepository) else None
+        expired_ok = entry is not None and self._clock() - entry.loaded_at < self._max_age
+
+        if inner is not None and entry is not None and expired_ok:
+            ctx, version = await inner.get_patient_if_changed(patient_id, entry.version)
+            if ctx is None:
+                self.stats.revalidations += 1
+                # invalidated or evicted while we awaited → answer, don't resurrect
+                if self._entries.get(patient_id) is entry:
+                    entry.fresh_until = self._clock() + self._ttl
+                    self._entries.move_to_end(patient_id)
+                return entry.ctx
+            self.stats.refreshes += 1
+        else:
+            if entry is None:
+                self.stats.misses += 1
+            else:
+                self.stats.refreshes += 1
+            if inner is not None:
+                ctx, version = await inner.get_patient_if_changed(patient_id, None)
+                assert ctx is not None
+            else:
+                ctx, version = await self._inner.get_patient(patient_id), None
+
+        self._store(patient_id, ctx, version)
+        return ctx
+
+    def _store(self, patient_id: str, ctx: PatientContext, version: str | None) -> None:
+        now = self._clock()
+        self._entries[patient_id] = _Entry(ctx, version, loaded_at=now, fresh_until=now + self._ttl)
+        self._entries.move_to_end(patient_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable
+
+import httpx
+from fhir.resources.patient import Patient # type: ignore[import-untyped]
+from fhir.resources.observation import Observation # type: ignore[import-untyped]
+from pydantic import ValidationError
+
+from optimed.core.domain import PatientContext
+from optimed.adapters.fhir_hapi.repository import FHIR_BASE_URL, _parse_fhir_time, _subject_id, _to_patient_ctx
+from optimed.adapters.http_transport.factory import TransportFactory, default_transport
+
+"""
+optimed.adapters.fhir_hapi.bulk_export
+--------------------------------------
+
+FHIR Bulk Data (``$export``) loader for nightly population jobs.
+
+✓ Kicks off ``Patient/$export`` and polls the status URL (honours Retry-After)
+✓ Streams the Patient / Observation NDJSON files line by line
+✓ Joins Observations to patients through an on-disk SQLite index, so memory
+  stays flat no matter how large the export is; each run gets its own index
+  file, and inserts / lookups run in a worker thread, off the event loop
+✓ Yields the same PatientContext objects as HAPIFHIRRepository.get_patient:
+  newest OBS_PER_CATEGORY readings per category, latest value per code
+"""
+
+# Observations kept per patient and category – matches the REST path
+OBS_PER_CATEGORY = 10
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS obs (
+    patient_id TEXT NOT NULL,
+    category   TEXT NOT NULL,
+    effective  REAL,              -- UTC epoch seconds, NULL if unknown
+    resource   TEXT NOT NULL
+);
+"""
+
+
+class BulkExportError(RuntimeError):
+    """The server rejected, failed or timed out a bulk export."""
+
+
+def _obs_category(raw: dict[str, Any]) -> str | None:
+    """Return "vital-signs" / "laboratory" for an Observation, else None."""
+    for cat in raw.get("category", []):
+        for coding in cat.get("coding", []):
+            if coding.get("code") in ("vital-signs", "laboratory"):
+                return coding["code"]
+    return None
+
+
+def _obs_effective(raw: dict[str, Any]) -> float | None:
+    """Observation time as UTC epoch seconds (None if unknown or partial).
+
+    Mixed offsets ("…+02:00" vs "…Z") sort correctly only once normalized.
+    """
+    ts = _parse_fhir_time(
+        raw.get("effectiveDateTime")
+        or raw.get("effectiveInstant")
+        or (raw.get("effectivePeriod") or {}).get("start")
+        or raw.get("issued")
+    )
+    return None if ts is None else ts.timestamp()
+
+
+class BulkExportLoader:
+    """Population-scale loader built on the FHIR Bulk Data ``$export`` API."""
+
+    def __init__(
+        self,
+        *,
+        base_url: str | None = None,
+        timeout: float = 30.0,
+        client: httpx.AsyncClient | None = None,
+        transport: TransportFactory | None = None,
+        poll_interval: float = 2.0,
+        max_wait: float = 3600.0,
+        index_dir: str | None = None,
+        batch_size: int = 1000,
+    ) -> None:
+        self._base = (base_url or FHIR_BASE_URL).rstrip("/")
+        self._client = client or (transport or default_transport()).client(
+            base_url=self._base, timeout=timeout, headers={"User-Agent": "OptiMedPrototype/0.1"},
+        )
+        self._poll_interval = poll_interval
+        self._max_wait = max_wait
+        self._index_dir = index_dir
+        self._batch_size = batch_size
+
+    async def kick_off(self, *, since: datetime | None = None) -> str:
+        """Start a Patient-level export and return the status (polling) URL."""
+        params = {"_type": "Patient,Observation", "_outputFormat": "application/fhir+ndjson"}
+        if since is not None:
+            params["_since"] = since.isoformat()
+        r = await self._client.get(
+            "/Patient/$export",
+            params=params,
+            headers={"Accept": "application/fhir+json", "Prefer": "respond-async"},
+        )
+        if r.status_code != 202:
+            r.raise_for_status()
+            raise BulkExportError(f"expected 202 from $export, got {r.status_code}")
+        status_url = r.headers.get("Content-Location")
+        if not status_url:
+            raise BulkExportError("$export response has no Content-Location")
+        return status_url
+
+    async def wait_for_manifest(self, status_url: str) -> dict[str, Any]:
+        """Poll *status_url* until the export completes and return its manifest."""
+        deadline = time.monotonic() + self._max_wait
+        while True:
+            r = await self._client.get(status_url, headers={"Accept": "application/json"})
+            if r.status_code == 200:
+                return r.json()
+            if r.status_code != 202:
+                r.raise_for_status()
+                raise BulkExportError(f"unexpected status {r.status_code} while polling")
+            if time.monotonic() >= deadline:
+                raise BulkExportError("bulk export did not finish within max_wait")
+            await asyncio.sleep(self._retry_after(r.headers.get("Retry-After")))
+
+    async def iter_ndjson(self, url: str) -> AsyncIterator[dict[str, Any]]:
+        """Stream one NDJSON output file, one decoded resource per line."""
+        async with self._client.stream("GET", url, headers={"Accept": "application/fhir+ndjson"}) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+    async def iter_patients(self, *, since: datetime | None = None) -> AsyncIterator[PatientContext]:
+        """Run a full export and stream the resulting PatientContext objects."""
+        manifest = await self.wait_for_manifest(await self.kick_off(since=since))
+        async for ctx in self.iter_manifest(manifest):
+            yield ctx
+
+    async def iter_manifest(self, manifest: dict[str, Any]) -> AsyncIterator[PatientContext]:
+        """Join the files of a completed export manifest into PatientContexts.
+
+        Observation files are indexed on disk first; Patient files are then
+        streamed and each patient is joined with its indexed Observations.
+        The index is a fresh file per run (in *index_dir* if given) and is
+        removed afterwards.
+        """
+        outputs = manifest.get("output", [])
+        obs_urls = [o["url"] for o in outputs if o.get("type") == "Observation"]
+        patient_urls = [o["url"] for o in outputs if o.get("type") == "Patient"]
+
+        index_dir = self._index_dir or tempfile.mkdtemp(prefix="optimed-export-")
+        fd, index_path = tempfile.mkstemp(prefix="observations-", suffix=".sqlite", dir=index_dir)
+        os.close(fd)
+        # only one thread touches the connection at a time (awaited to_thread calls)
+        db = sqlite3.connect(index_path, check_same_thread=False)
+        try:
+            db.execute(_INDEX_SCHEMA)
+            for url in obs_urls:
+                await self._index_observations(db, url)
+            await asyncio.to_thread(self._finish_index, db)
+
+            for url in patient_urls:
+                async for raw in self.iter_ndjson(url):
+                    try:
+                        patient = Patient.model_validate(raw)
+                    except ValidationError:
+                        continue
+                    if not patient.id:
+                        continue
+                    vitals, labs = await asyncio.to_thread(self._lookup, db, patient.id)
+                    yield _to_patient_ctx(patient, vitals, labs)
+        finally:
+            db.close()
+            if self._index_dir is None:
+                shutil.rmtree(index_dir, ignore_errors=True)
+            else:
+                with contextlib.suppress(OSError):
+                    os.remove(index_path)
+
+    async def close(self) -> None:
+        """Close the HTTP client."""
+        await self._client.aclose()
+
+    async def _index_observations(self, db: sqlite3.Connection, url: str) -> None:
+        rows: list[tuple[str, str, float | None, str]] = []
+        async for raw in self.iter_ndjson(url):
+            pid = _subject_id(raw)
+            category = _obs_category(raw)
+            if pid is None or category is None:
+                continue
+            rows.append((pid, category, _obs_effective(raw), json.dumps(raw)))
+            if len(rows) >= self._batch_size:
+                await asyncio.to_thread(self._insert, db, rows)
+                rows = []
+        await asyncio.to_thread(self._insert, db, rows)
+
+    @staticmethod
+    def _insert(db: sqlite3.Connection, rows: Iterable[tuple[str, str, float | None, str]]) -> None:
+        db.executemany("INSERT INTO obs VALUES (?, ?, ?, ?)", rows)
+
+    @staticmethod
+    def _finish_index(db: sqlite3.Connection) -> None:
+        db.execute("CREATE INDEX IF NOT EXISTS obs_patient ON obs (patient_id, effective)")
+        db.commit()
+
+    @staticmethod
+    def _lookup(db: sqlite3.Connection, pid: str) -> tuple[list[Observation], list[Observation]]:
+        """Most recent Observations per category, newest first like ``_sort=-date``."""
+        found: dict[str, list[Observation]] = {"vital-signs": [], "laboratory": []}
+        cur = db.execute(
+            "SELECT category, resource FROM obs WHERE patient_id = ? ORDER BY effective DESC",
+            (pid,),
+        )
+        for category, resource in cur:
+            bucket = found[category]
+            if len(bucket) >= OBS_PER_CATEGORY:
+                continue
+            try:
+                bucket.append(Observation.model_validate_json(resource))
+            except ValidationError:
+                continue
+        return found["vital-signs"], found["laboratory"]
+
+    def _retry_after(self, header: str | None) -> float:
+        try:
+            return max(0.0, float(header)) if header else self._poll_interval
+        except ValueError:
+            return self._poll_interval
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import contextlib
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncContextManager, Awaitable, Callable
+
+import httpx
+
+"""
+optimed.adapters.fhir_hapi.hedging
+----------------------------------
+
+Tail-latency control for the FHIR adapter's idempotent GETs.
+
+✓ Per-endpoint latency histograms (log buckets, decaying, O(1) memory)
+✓ Hedging: if no answer by the endpoint's p95 (configurable), send one
+  duplicate and take whichever finishes first
+✓ Retries with full-jitter exponential backoff, honouring Retry-After
+  (seconds or HTTP-date); a Retry-After beyond ``max_retry_after`` is
+  not waited out – the response is returned instead
+✓ A retry budget shared by retries *and* hedges, so neither can amplify
+  load during an outage
+✓ With a ``limit`` semaphore every attempt and hedge holds its own slot,
+  and backoff sleeps hold none
+
+Usage::
+
+    repo = HAPIFHIRRepository(hedging=HedgedRequester())
+"""
+
+# Statuses worth retrying for a GET – everything else is returned as-is
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with exponential decay.
+
+    Buckets grow by *growth* from *min_latency* up to *max_latency*, so the
+    relative error of a percentile is bounded by the growth factor.  Once
+    *max_samples* have been recorded all counts are halved, which keeps the
+    percentiles tracking recent behaviour.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_latency: float = 0.001,
+        max_latency: float = 120.0,
+        growth: float = 1.15,
+        max_samples: int = 2000,
+    ) -> None:
+        n = math.ceil(math.log(max_latency / min_latency, growth)) + 1
+        self._bounds = [min_latency * growth**i for i in range(n)]
+        self._counts = [0.0] * (n + 1)      # last bucket = overflow
+        self._max_samples = max_samples
+        self.count = 0.0
+
+    def record(self, seconds: float) -> None:
+        self._counts[bisect.bisect_left(self._bounds, seconds)] += 1
+        self.count += 1
+        if self.count >= self._max_samples:
+            self._counts = [c / 2 for c in self._counts]
+            self.count /= 2
+
+    def percentile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding quantile *q* (0–1); None if empty."""
+        if self.count <= 0:
+            return None
+        target = q * self.count
+        seen = 0.0
+        for i, c in enumerate(self._counts):
+            seen += c
+            if seen >= target and c > 0:
+                return self._bounds[min(i, len(self._bounds) - 1)]
+        return self._bounds[-1]
+
+    def snapshot(self) -> dict[str, float | None]:
+        return {
+            "count": self.count,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class RetryBudget:
+    """Token bucket limiting retries + hedges to a fraction of traffic.
+
+    Every original request deposits *ratio* tokens; time adds
+    *min_per_second* so a quiet service can still retry.  A retry or hedge
+    costs one token.
+    """
+
+    def __init__(
+        self,
+        *,
+        ratio: float = 0.1,
+        min_per_second: float = 1.0,
+        max_tokens: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ratio = ratio
+        self._min_per_second = min_per_second
+        self._max = max_tokens
+        self._clock = clock
+        self._tokens = max_tokens
+        self._last = clock()
+
+    def deposit(self) -> None:
+        self._refill()
+        self._tokens = min(self._max, self._tokens + self._ratio)
+
+    def try_withdraw(self) -> bool:
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self._max, self._tokens + (now - self._last) * self._min_per_second)
+        self._last = now
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    percentile: float = 0.95     # hedge after this endpoint percentile…
+    min_delay: float = 0.02      # …clamped to [min_delay, max_delay]
+    max_delay: float = 2.0
+    min_samples: int = 20        # no hedging until the histogram is warm
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0             # cap for computed backoff only
+    max_retry_after: float = 30.0      # longer server-requested waits → give up
+    statuses: frozenset[int] = RETRY_STATUSES
+
+
+@dataclass
+class HedgingStats:
+    requests: int = 0
+    hedges: int = 0              # duplicates sent
+    hedge_wins: int = 0          # … that answered first
+    retries: int = 0
+    budget_exhausted: int = 0    # retries/hedges denied by the budget
+    retry_after_exceeded: int = 0  # gave up: server asked to wait > max_retry_after
+
+
+@dataclass
+class _Timed:
+    response: httpx.Response
+    elapsed: float
+    hedge: bool = field(default=False)
+
+
+def retry_after_seconds(value: str | None, *, now: datetime | None = None) -> float | None:
+    """Retry-After as seconds from now: delta-seconds or an HTTP-date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+def endpoint_key(path: str) -> str:
+    """Histogram key: resource type, plus ``/{id}`` for reads.
+
+    "/Patient/123" → "/Patient/{id}", "/Observation" → "/Observation";
+    absolute next-page links are keyed by their path.
+    """
+    parts = [p for p in httpx.URL(path).path.split("/") if p]
+    if not parts:
+        return "/"
+    # Skip a base path such as "baseR4" when given an absolute URL
+    while len(parts) > 2:
+        parts.pop(0)
+    if len(parts) == 2 and not parts[1].startswith("$"):
+        return f"/{parts[0]}/{{id}}"
+    return "/" + "/".join(parts)
+
+
+class HedgedRequester:
+    """Sends GETs with hedging, budgeted retries and latency tracking."""
+
+    def __init__(
+        self,
+        *,
+        hedge: HedgePolicy | None = HedgePolicy(),
+        retry: RetryPolicy = RetryPolicy(),
+        budget: RetryBudget | None = None,
+    ) -> None:
+        self._hedge = hedge
+        self._retry = retry
+        self._budget = budget or RetryBudget()
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.stats = HedgingStats()
+
+    def histogram(self, key: str) -> LatencyHistogram:
+        h = self.histograms.get(key)
+        if h is None:
+            h = self.histograms[key] = LatencyHistogram()
+        return h
+
+    def hedge_delay(self, key: str) -> float | None:
+        """Seconds to wait before hedging *key*, or None to not hedge."""
+        if self._hedge is None:
+            return None
+        h = self.histograms.get(key)
+        if h is None or h.count < self._hedge.min_samples:
+            return None
+        p = h.percentile(self._hedge.percentile)
+        if p is None:
+            return None
+        return min(self._hedge.max_delay, max(self._hedge.min_delay, p))
+
+    async def get(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        *,
+        limit: asyncio.Semaphore | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """GET *path* on *client*; returns the final response (maybe an error).
+
+        *limit* is the caller's in-flight semaphore: each attempt and each
+        hedge acquires its own slot, so duplicates count against it.
+        """
+        key = endpoint_key(path)
+        self.stats.requests += 1
+        self._budget.deposit()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            response: httpx.Response | None = None
+            try:
+                response = await self._hedged(lambda: client.get(path, **kwargs), key, limit)
+            except httpx.TransportError:
+                if not self._may_retry(attempt):
+                    raise
+            else:
+                if response.status_code not in self._retry.statuses:
+                    return response
+                wait = retry_after_seconds(response.headers.get("Retry-After"))
+                if wait is not None and wait > self._retry.max_retry_after:
+                    self.stats.retry_after_exceeded += 1
+                    return response
+                if not self._may_retry(attempt):
+                    return response
+            self.stats.retries += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+
+    def _may_retry(self, attempt: int) -> bool:
+        if attempt >= self._retry.max_attempts:
+            return False
+        if not self._budget.try_withdraw():
+            self.stats.budget_exhausted += 1
+            return False
+        return True
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        if response is not None:
+            wait = retry_after_seconds(response.headers.get("Retry-After"))
+            if wait is not None:
+                return wait          # get() already gave up on waits > max_retry_after
+        cap = min(self._retry.max_delay, self._retry.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, cap)   # "full jitter"
+
+    async def _hedged(
+        self,
+        send: Callable[[], Awaitable[httpx.Response]],
+        key: str,
+        limit: asyncio.Semaphore | None = None,
+    ) -> httpx.Response:
+        sent = asyncio.Event()
+
+        async def _timed(hedge: bool) -> _Timed:
+            slot: AsyncContextManager[Any] = limit if limit is not None else contextlib.nullcontext()
+            async with slot:
+                sent.set()
+                t0 = time.perf_counter()
+                r = await send()
+                return _Timed(r, time.perf_counter() - t0, hedge)
+
+        delay = self.hedge_delay(key)
+        tasks = [asyncio.ensure_future(_timed(False))]
+        try:
+            # Time spent queueing for a slot is not latency – start the clock
+            # once the primary is actually on the wire
+            waiter = asyncio.ensure_future(sent.wait())
+            try:
+                await asyncio.wait([tasks[0], waiter], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+            started = time.perf_counter()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if self._budget.try_withdraw():
+                        self.stats.hedges += 1
+                        tasks.append(asyncio.ensure_future(_timed(True)))
+                    else:
+                        self.stats.budget_exhausted += 1
+
+            error: BaseException | None = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is not None:
+                        error = t.exception()
+                        continue
+                    result = t.result()
+                    hist = self.histogram(key)
+                    hist.record(result.elapsed)
+                    if result.hedge:
+                        self.stats.hedge_wins += 1
+                        # the abandoned primary took at least this long
+                        hist.record(time.perf_counter() - started)
+                    return result.response
+            assert error is not None
+            raise error
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Literal
+
+"""
+optimed.adapters.fhir_hapi.offload
+----------------------------------
+
+Keeps CPU-heavy Bundle → domain conversion off the event loop.
+
+✓ make_parse_executor() – thread or process pool for HAPIFHIRRepository
+✓ LoopLagMonitor       – measures how late the event loop wakes up, so
+                          stalls (and their absence) show up in numbers
+
+Usage
+-----
+    monitor = LoopLagMonitor(stall_threshold=0.05)
+    repo = HAPIFHIRRepository(
+        executor=make_parse_executor("process"),
+        lag_monitor=monitor,                     # runs until repo.close()
+    )
+    await repo.get_patients(ids)
+    print(monitor.stats.max_lag, monitor.stats.stalls)
+"""
+
+ExecutorKind = Literal["thread", "process"]
+
+
+def make_parse_executor(kind: ExecutorKind = "process", max_workers: int | None = None) -> Executor:
+    """Executor for HAPIFHIRRepository(executor=...).
+
+    "process" sidesteps the GIL for strict (Pydantic) validation; "thread"
+    avoids pickling and suits the lean parser or small pools.
+    """
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fhir-parse")
+
+
+@dataclass
+class LoopLagStats:
+    samples: int = 0
+    stalls: int = 0          # samples later than stall_threshold
+    total_lag: float = 0.0   # seconds
+    max_lag: float = 0.0     # seconds
+
+    @property
+    def mean_lag(self) -> float:
+        return self.total_lag / self.samples if self.samples else 0.0
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how much later than requested a sleep wakes."""
+
+    def __init__(self, *, interval: float = 0.05, stall_threshold: float = 0.1) -> None:
+        self._interval = interval
+        self._stall_threshold = stall_threshold
+        self._task: asyncio.Task[None] | None = None
+        self.stats = LoopLagStats()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        self.stats = LoopLagStats()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(self._interval)
+            lag = max(0.0, loop.time() - t0 - self._interval)
+            s = self.stats
+            s.samples += 1
+            s.total_lag += lag
+            s.max_lag = max(s.max_lag, lag)
+            if lag >= self._stall_threshold:
+                s.stalls += 1
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
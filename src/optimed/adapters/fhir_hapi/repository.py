@@ -1,15 +1,28 @@
 from __future__ import annotations
+import asyncio
+import json
 import os
-from datetime import datetime, timezone
-from typing import Sequence
+from concurrent.futures import Executor
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterator, Iterable, Literal, Sequence
+from urllib.parse import urlencode
 from pydantic import ValidationError
 
 import httpx
 from fhir.resources.patient import Patient # type: ignore[import-untyped]
 from fhir.resources.observation import Observation # type: ignore[import-untyped]
 
-from optimed.core.domain import PatientContext
-from optimed.core.ports import FHIRRepository
+from optimed.core.domain import DEFAULT_CRITICAL_LABS, Measurement, PatientContext, normalize_quantity
+from optimed.core.domain.observation import LOINC_SYSTEM, chronological
+from optimed.core.ports import ConditionalFHIRRepository
+from optimed.adapters.http_transport.factory import TransportFactory, default_transport
+from optimed.adapters.fhir_hapi.hedging import HedgedRequester
+from optimed.adapters.fhir_hapi.offload import LoopLagMonitor
+
+try:  # optional fast JSON decoder for parse_mode="lean"
+    import orjson
+except ImportError:  # pragma: no cover – falls back to httpx's stdlib json
+    orjson = None  # type: ignore[assignment]
 
 """
 optimed.adapters.fhir_hapi.repository
@@ -20,8 +33,16 @@ Read-only FHIR adapter that talks to the public HAPI R4 demo server
 domain models.
 
 ✓ Implements FHIRRepository (core.ports)
-✓ Async/await-friendly via httpx.AsyncClient
+✓ Async/await-friendly via httpx.AsyncClient (shared TransportFactory pool)
 ✓ No authentication – perfect for CI and early prototypes
+✓ Single round-trip patient fetch via FHIR ``batch`` Bundles (opt-in)
+✓ Conditional reads (If-None-Match + Observation _lastUpdated probe) for
+  caching decorators
+✓ Streaming search that follows Bundle ``next`` links
+✓ Opt-in "lean" parsing that skips fhir.resources validation
+✓ Large Bundles converted on an executor so the event loop stays free
+  (optional LoopLagMonitor runs for the repository's lifetime to prove it)
+✓ Optional hedged GETs with budgeted retries (see hedging.py)
 """
 
 # --------------------------------------------------------------------------- #
@@ -40,10 +61,23 @@ VITAL_CODES = {
     "8310-5": "Body temperature",
 }
 
-CRITICAL_LAB_CODES = {
-    "2823-3": "Potassium",         # used by PatientContext.has_critical_lab()
-    "2339-0": "Glucose",
-}
+# thresholds live in core.domain.lab_rules (PatientContext.has_critical_lab)
+CRITICAL_LAB_CODES = {t.code: t.name for t in DEFAULT_CRITICAL_LABS}
+
+# How get_patient() talks to the server:
+#   "concurrent" – Patient + vitals + labs as three parallel GETs
+#   "batch"      – one POST of a FHIR batch Bundle; falls back to
+#                  "concurrent" if the server rejects batch requests
+FetchMode = Literal["concurrent", "batch"]
+
+# How raw JSON becomes a PatientContext:
+#   "strict" – full fhir.resources validation (default, rejects bad data)
+#   "lean"   – read only the handful of fields we map, straight from JSON
+ParseMode = Literal["strict", "lean"]
+
+# Status codes that mean "this server does not do batch", not "bad patient";
+# anything else (400, 422, ...) is raised exactly like the GET path would
+_BATCH_UNSUPPORTED_STATUS = {404, 405, 501}
 
 # --------------------------------------------------------------------------- #
 # Helper functions
@@ -72,20 +106,159 @@ def _fhir_name_to_str(p: Patient) -> str:
     return " ".join(parts).strip() or "Unknown"
 
 def _obs_bundle_to_dict(entries: list[Observation]) -> dict[str, str]:
-    """Convert a list of Observations to a dict of code → value"""
+    """Convert newest-first Observations to a dict of code → latest value"""
     out: dict[str, str] = {}
     for obs in entries:
         if not obs.code or not obs.code.coding:
             continue
         code = obs.code.coding[0].code
-        if not obs.valueQuantity:
+        if not code or not obs.valueQuantity:
             continue
         value = obs.valueQuantity.value
         unit = obs.valueQuantity.unit 
-        out[code] = f"{value} {unit}"
+        out.setdefault(code, f"{value} {unit}")     # first = newest (_sort=-date)
 
     return out 
 
+def _parse_fhir_time(value: str | None) -> datetime | None:
+    """FHIR dateTime/instant → aware UTC datetime (None if partial or bad)."""
+    if not value or len(value) < 10:
+        return None
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+def _measurement(
+        coding: dict[str, Any] | None,
+        quantity: dict[str, Any] | None,
+        effective: str | None,
+) -> Measurement | None:
+    """One normalized Measurement from raw code/valueQuantity/effective."""
+    if not coding or not coding.get("code") or not quantity or quantity.get("value") is None:
+        return None
+    code = str(coding["code"])
+    # prefer the UCUM code; "unit" is free display text
+    unit = quantity.get("code") if quantity.get("system") == "http://unitsofmeasure.org" else None
+    value, ucum = normalize_quantity(code, float(quantity["value"]), unit or quantity.get("unit"))
+    return Measurement.trusted(
+        code=code,
+        value=value,
+        unit=ucum,
+        observed_at=_parse_fhir_time(effective),
+        system=coding.get("system") or LOINC_SYSTEM,
+    )
+
+def _obs_measurements(entries: Iterable[Observation]) -> list[Measurement]:
+    """Typed counterpart of _obs_bundle_to_dict (keeps every reading)."""
+    out: list[Measurement] = []
+    for obs in entries:
+        if not obs.code or not obs.code.coding or not obs.valueQuantity:
+            continue
+        coding = obs.code.coding[0]
+        q = obs.valueQuantity
+        effective = obs.effectiveDateTime or obs.effectiveInstant or (
+            obs.effectivePeriod.start if obs.effectivePeriod else None) or obs.issued
+        m = _measurement(
+            {"code": coding.code, "system": coding.system},
+            {"value": q.value, "unit": q.unit, "code": q.code, "system": q.system},
+            effective.isoformat() if isinstance(effective, (datetime, date)) else effective,
+        )
+        if m is not None:
+            out.append(m)
+    return out
+
+def _bundle_resources(bundle: dict[str, Any]) -> list[dict[str, Any]]:
+    """Raw resources of a searchset Bundle (empty for OperationOutcome etc.)."""
+    return [e["resource"] for e in bundle.get("entry", []) if "resource" in e]
+
+def _validate_observations(resources: Iterable[dict[str, Any]]) -> list[Observation]:
+    """Validate raw Observation resources, dropping the ones that fail."""
+    good: list[Observation] = []
+    for raw in resources:
+        try:
+            good.append(Observation.model_validate(raw))
+        except ValidationError:
+            # HAPI demo sometimes omits timezone in effectiveDateTime → skip
+            continue
+    return good
+
+def _entry_status(entry: dict[str, Any]) -> int:
+    """Return the HTTP status code of a batch-response entry ("200 OK" → 200)."""
+    status = (entry.get("response") or {}).get("status", "")
+    try:
+        return int(str(status).split()[0])
+    except (ValueError, IndexError):
+        return 0
+
+def _subject_id(raw: dict[str, Any]) -> str | None:
+    """Patient ID from Observation.subject ("Patient/123" or an absolute URL)."""
+    ref = (raw.get("subject") or {}).get("reference")
+    if not ref or "Patient/" not in ref:
+        return None
+    return ref.rsplit("Patient/", 1)[1].split("/", 1)[0]
+
+def _group_by_subject(
+        observations: list[dict[str, Any]],
+        count: int,
+) -> dict[str, list[dict[str, Any]]]:
+    """Split a multi-patient Observation search back per patient.
+
+    Input is expected newest-first (``_sort=-date``); only the first
+    *count* Observations per patient are kept, mirroring the single-patient
+    query.
+    """
+    out: dict[str, list[dict[str, Any]]] = {}
+    for obs in observations:
+        pid = _subject_id(obs)
+        if pid is None:
+            continue
+        bucket = out.setdefault(pid, [])
+        if len(bucket) < count:
+            bucket.append(obs)
+    return out
+
+def _next_link(bundle: dict[str, Any]) -> str | None:
+    """URL of the Bundle's ``next`` page, if any."""
+    for link in bundle.get("link", []):
+        if link.get("relation") == "next":
+            return link.get("url")
+    return None
+
+def _obs_watermark(*bundles: dict[str, Any]) -> str | None:
+    """``_lastUpdated`` lower bound for "did any of these Observations change?".
+
+    The earliest ``Bundle.meta.lastUpdated`` (server time of the searches)
+    when every Bundle carries one, else the newest ``Observation.meta.
+    lastUpdated``; None when the server reports neither.
+    """
+    searched = [_parse_fhir_time((b.get("meta") or {}).get("lastUpdated")) for b in bundles]
+    if searched and all(t is not None for t in searched):
+        return min(t for t in searched if t is not None).isoformat()
+    updated = [
+        t for b in bundles for r in _bundle_resources(b)
+        if (t := _parse_fhir_time((r.get("meta") or {}).get("lastUpdated"))) is not None
+    ]
+    return max(updated).isoformat() if updated else None
+
+def _version_token(patient_version: str | None, watermark: str | None) -> str | None:
+    """Opaque ``get_patient_if_changed`` version: Patient version + Observation watermark."""
+    if patient_version is None:
+        return None
+    return f"{patient_version}|{watermark or ''}"
+
+def _etag_version(etag: str | None) -> str | None:
+    """Version ID from a FHIR ETag header (``W/"3"`` → ``3``)."""
+    if not etag:
+        return None
+    return etag.removeprefix("W/").strip('"') or None
+
+class _BatchUnsupported(Exception):
+    """Raised internally when the server cannot answer a batch Bundle."""
+
 def _to_patient_ctx(
         patient: Patient,
         vitals: list[Observation] | None = None,
@@ -98,7 +271,9 @@ def _to_patient_ctx(
     vitals_dict = _obs_bundle_to_dict(vitals or [])
     labs_dict = _obs_bundle_to_dict(labs or [])
 
-    return PatientContext(
+    # fhir.resources validated the resources, and the derived vitals/labs
+    # only hold coded readings (str → str) – skip a second pass
+    return PatientContext.trusted(
         patient_id=patient.id,
         name=_fhir_name_to_str(patient),
         age=_age_from_birthdate(patient.birthDate),
@@ -106,14 +281,122 @@ def _to_patient_ctx(
         care_unit="UNKOWN",  # HAPI demo has no care unit info
         vitals=vitals_dict,
         labs=labs_dict,
+        observations=chronological(_obs_measurements([*(vitals or ()), *(labs or ())])),
     )
 
+# --------------------------------------------------------------------------- #
+# Lean parsing – reads raw JSON, mirrors the strict helpers above
+# --------------------------------------------------------------------------- #
+
+def _lean_age(birth_date: str | None) -> int:
+    """_age_from_birthdate for a raw "YYYY[-MM[-DD]]" string."""
+    if not birth_date:
+        return 0
+    parts = birth_date.split("-")
+    try:
+        born = date(int(parts[0]), int(parts[1]) if len(parts) > 1 else 1,
+                    int(parts[2][:2]) if len(parts) > 2 else 1)
+    except ValueError:
+        return 0
+    return _age_from_birthdate(born)
+
+def _lean_name(raw: dict[str, Any]) -> str:
+    """_fhir_name_to_str for a raw Patient resource."""
+    names = raw.get("name")
+    if not names:
+        return "Unknown"
+    n = names[0]
+    if n.get("text"):
+        return n["text"]
+    parts = list(n.get("given") or [])
+    if n.get("family"):
+        parts.append(n["family"])
+    return " ".join(parts).strip() or "Unknown"
+
+def _lean_obs_to_dict(resources: Iterable[dict[str, Any]]) -> dict[str, str]:
+    """_obs_bundle_to_dict for raw Observation resources."""
+    out: dict[str, str] = {}
+    for raw in resources:
+        coding = (raw.get("code") or {}).get("coding")
+        if not coding or not coding[0].get("code"):
+            continue
+        vq = raw.get("valueQuantity")
+        if not vq:
+            continue
+        out.setdefault(str(coding[0]["code"]), f"{vq.get('value')} {vq.get('unit')}")
+    return out
+
+def _lean_measurements(resources: Iterable[dict[str, Any]]) -> list[Measurement]:
+    """_obs_measurements for raw Observation resources."""
+    out: list[Measurement] = []
+    for raw in resources:
+        coding = ((raw.get("code") or {}).get("coding") or [None])[0]
+        try:
+            m = _measurement(coding, raw.get("valueQuantity"), (
+                raw.get("effectiveDateTime") or raw.get("effectiveInstant")
+                or (raw.get("effectivePeriod") or {}).get("start") or raw.get("issued")
+            ))
+        except (TypeError, ValueError):
+            continue
+        if m is not None:
+            out.append(m)
+    return out
+
+def _lean_patient_ctx(
+        patient: dict[str, Any],
+        vitals: Iterable[dict[str, Any]] = (),
+        labs: Iterable[dict[str, Any]] = (),
+) -> PatientContext:
+    """_to_patient_ctx without fhir.resources validation."""
+    if not patient.get("id"):
+        raise ValueError("Patient must have an ID")
+    vitals, labs = list(vitals), list(labs)
+
+    return PatientContext(
+        patient_id=patient["id"],
+        name=_lean_name(patient),
+        age=_lean_age(patient.get("birthDate")),
+        sex=patient.get("gender") or "unknown",
+        care_unit="UNKOWN",  # HAPI demo has no care unit info
+        vitals=_lean_obs_to_dict(vitals),
+        labs=_lean_obs_to_dict(labs),
+        observations=chronological(_lean_measurements([*vitals, *labs])),
+    )
+
+# One item per patient: (Patient, vital Observations, lab Observations)
+_RawPatient = tuple[dict[str, Any], list[dict[str, Any]] | None, list[dict[str, Any]] | None]
+
+def _convert(
+        parse_mode: ParseMode,
+        patient: dict[str, Any],
+        vitals: list[dict[str, Any]] | None = None,
+        labs: list[dict[str, Any]] | None = None,
+) -> PatientContext:
+    """Raw Patient + Observation resources → PatientContext, per parse_mode."""
+    if parse_mode == "lean":
+        return _lean_patient_ctx(patient, vitals or (), labs or ())
+    return _to_patient_ctx(
+        Patient.model_validate(patient),
+        _validate_observations(vitals or ()),
+        _validate_observations(labs or ()),
+    )
+
+def _convert_many(parse_mode: ParseMode, items: list[_RawPatient]) -> list[PatientContext]:
+    """Batch form of _convert; module-level so process pools can pickle it."""
+    return [_convert(parse_mode, *item) for item in items]
+
+def _decode_json(content: bytes) -> Any:
+    """Fast JSON decode for lean mode (orjson when installed)."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
 
 # --------------------------------------------------------------------------- #
 # Adapter class
 # --------------------------------------------------------------------------- #
 
-class HAPIFHIRRepository(FHIRRepository):
+class HAPIFHIRRepository(ConditionalFHIRRepository):
     """Read-only FHIR repository using the HAPI FHIR demo server."""
 
     def __init__(
@@ -122,68 +405,408 @@ class HAPIFHIRRepository(FHIRRepository):
         base_url: str | None = None,
         timeout: float = 10.0,
         client: httpx.AsyncClient | None = None,
+        transport: TransportFactory | None = None,
+        fetch_mode: FetchMode = "concurrent",
+        max_concurrency: int = 8,
+        ids_per_request: int = 50,
+        parse_mode: ParseMode = "strict",
+        executor: Executor | None = None,
+        offload_threshold: int = 200,
+        hedging: HedgedRequester | None = None,
+        lag_monitor: LoopLagMonitor | None = None,
     ) -> None:
         self._base = (base_url or FHIR_BASE_URL).rstrip("/")
-        self._client = client or httpx.AsyncClient(base_url=self._base, timeout=timeout, headers={"User-Agent": "OptiMedPrototype/0.1"})
+        self._client = client or (transport or default_transport()).client(
+            base_url=self._base, timeout=timeout, headers={"User-Agent": "OptiMedPrototype/0.1"},
+        )
+        self._fetch_mode = fetch_mode
+        # None = not tried yet; False = server rejected a batch, stop trying
+        self._batch_supported: bool | None = None
+        # Caps in-flight requests so bulk loads cannot flood the EHR
+        self._inflight = asyncio.Semaphore(max_concurrency)
+        self._ids_per_request = ids_per_request
+        self._parse_mode = parse_mode
+        # Conversions touching >= offload_threshold resources run on executor
+        self._executor = executor
+        self._offload_threshold = offload_threshold
+        self._hedging = hedging
+        # Started on first conversion (needs a running loop), stopped by close()
+        self._lag_monitor = lag_monitor
 
 
     async def get_patient(self, patient_id: str) -> PatientContext:
-        patient = await self._get_patient_resource(patient_id)
-        vitals = await self._get_observations(patient_id, category="vital-signs")
-        labs = await self._get_observations(patient_id, category="laboratory")
-        return _to_patient_ctx(patient, vitals, labs)
+        if self._use_batch():
+            try:
+                ctx = await self._get_patient_batch(patient_id)
+            except _BatchUnsupported:
+                self._batch_supported = False
+            else:
+                self._batch_supported = True
+                return ctx
+
+        patient, vitals, labs = await asyncio.gather(
+            self._get_json(f"/Patient/{patient_id}"),
+            self._get_observations(patient_id, category="vital-signs"),
+            self._get_observations(patient_id, category="laboratory"),
+        )
+        return await self._to_ctx(patient, vitals, labs)
+
+    async def get_patient_if_changed(
+            self,
+            patient_id: str,
+            version: str | None = None,
+    ) -> tuple[PatientContext | None, str | None]:
+        """Re-read a patient only if its Patient or Observations changed.
+
+        *version* is the token a previous call returned: the Patient version
+        plus an Observation ``_lastUpdated`` watermark.  Revalidation sends
+        the Patient with ``If-None-Match`` alongside a ``_summary=count``
+        Observation probe; only a 304 *and* an empty probe return
+        ``(None, version)`` without parsing anything.  Deleted Observations
+        are not detected – callers bound staleness with a max age.
+        """
+        raw: dict[str, Any] | None = None
+        if version is not None:
+            patient_version, _, watermark = version.partition("|")
+            (raw, new_version), changed = await asyncio.gather(
+                self._get_patient_raw(patient_id, if_none_match=patient_version),
+                self._observations_changed(patient_id, since=watermark or None),
+            )
+            if raw is None and not changed:
+                return None, version
+
+        vital_params = self._observation_params(patient_id, "vital-signs")
+        lab_params = self._observation_params(patient_id, "laboratory")
+        if raw is None:
+            (raw, new_version), vital_bundle, lab_bundle = await asyncio.gather(
+                self._get_patient_raw(patient_id),
+                self._get_json("/Observation", params=vital_params),
+                self._get_json("/Observation", params=lab_params),
+            )
+            assert raw is not None          # unconditional GET never answers 304
+        else:
+            vital_bundle, lab_bundle = await asyncio.gather(
+                self._get_json("/Observation", params=vital_params),
+                self._get_json("/Observation", params=lab_params),
+            )
+        ctx = await self._to_ctx(raw, _bundle_resources(vital_bundle), _bundle_resources(lab_bundle))
+        return ctx, _version_token(new_version, _obs_watermark(vital_bundle, lab_bundle))
+
+    async def get_patients(self, patient_ids: Sequence[str]) -> Sequence[PatientContext]:
+        """Load many patients with a handful of requests.
+
+        IDs are packed ``ids_per_request`` at a time into ``Patient?_id=a,b,c``
+        and ``Observation?patient=a,b,c`` searches (or one batch Bundle per
+        chunk in "batch" mode).  If a chunk's Observation search is cut off,
+        patients left short of readings get per-patient searches.  Results
+        follow the order of *patient_ids*; IDs the server does not know are
+        skipped.
+        """
+        return [ctx for ctx, _ in await self.get_patients_versioned(patient_ids)]
+
+    async def get_patients_versioned(
+            self,
+            patient_ids: Sequence[str],
+    ) -> Sequence[tuple[PatientContext, str | None]]:
+        """``get_patients`` plus each patient's ``get_patient_if_changed`` version."""
+        ids = list(dict.fromkeys(patient_ids))  # de-duplicate, keep order
+        step = self._ids_per_request
+        chunks = [ids[i:i + step] for i in range(0, len(ids), step)]
+
+        found: dict[str, tuple[PatientContext, str | None]] = {}
+        for part in await asyncio.gather(*(self._get_patient_chunk(c) for c in chunks)):
+            found.update(part)
+        return [found[pid] for pid in ids if pid in found]
     
     async def search_patients(self, query: str) -> Sequence[PatientContext]:
         """Search patients by MRN or name."""
         
-        r = await self._client.get("/Patient", params={"name": query, "_count": 10})
-        r.raise_for_status()
-        bundle = r.json()
+        bundle = await self._get_json("/Patient", params={"name": query, "_count": 10})
 
-        results: list[PatientContext] = []
-        for entry in bundle.get("entry", []):
-            p = Patient.model_validate(entry["resource"])
-            results.append(_to_patient_ctx(p, [], []))
-        
-        return results
+        return await self._to_ctxs([(raw, None, None) for raw in _bundle_resources(bundle)])
+
+    async def iter_patients(
+            self,
+            query: str,
+            *,
+            page_size: int = 50,
+            prefetch: bool = True,
+    ) -> AsyncIterator[PatientContext]:
+        """Stream all patients matching *query*, following ``next`` links.
+
+        With *prefetch* the next page is requested while the caller consumes
+        the current one.  Leaving the loop early cancels that request and no
+        further pages are fetched.
+        """
+        pending: asyncio.Future[dict[str, Any]] | None = asyncio.ensure_future(
+            self._get_json("/Patient", params={"name": query, "_count": page_size})
+        )
+        try:
+            while pending is not None:
+                bundle = await pending
+                url = _next_link(bundle)
+                pending = None
+                if url and prefetch:
+                    pending = asyncio.ensure_future(self._get_json(url))
+
+                matches: list[_RawPatient] = [
+                    (entry["resource"], None, None)
+                    for entry in bundle.get("entry", [])
+                    # skip _include'd resources, they are not search hits
+                    if (entry.get("search") or {}).get("mode", "match") == "match"
+                ]
+                for ctx in await self._to_ctxs(matches):
+                    yield ctx
+
+                if url and not prefetch:
+                    pending = asyncio.ensure_future(self._get_json(url))
+        finally:
+            if pending is not None:
+                if pending.done() and not pending.cancelled():
+                    pending.exception()  # mark retrieved; the caller left anyway
+                else:
+                    pending.cancel()
     
     async def close(self) -> None:
-        """Close the HTTP client."""
+        """Close the HTTP client (and stop the lag monitor, if any)."""
+        if self._lag_monitor is not None:
+            await self._lag_monitor.stop()
         await self._client.aclose()
 
-    async def _get_patient_resource(self, pid: str) -> Patient:
-        """Fetch a single Patient resource by ID."""
-        r = await self._client.get(f"/Patient/{pid}")
+    def _use_batch(self) -> bool:
+        return self._fetch_mode == "batch" and self._batch_supported is not False
+
+    async def _to_ctx(
+            self,
+            patient: dict[str, Any],
+            vitals: list[dict[str, Any]] | None = None,
+            labs: list[dict[str, Any]] | None = None,
+    ) -> PatientContext:
+        return (await self._to_ctxs([(patient, vitals, labs)]))[0]
+
+    async def _to_ctxs(self, items: list[_RawPatient]) -> list[PatientContext]:
+        """Convert raw patients inline, or on the executor when large."""
+        if self._lag_monitor is not None:
+            self._lag_monitor.start()
+        size = sum(1 + len(v or ()) + len(lb or ()) for _, v, lb in items)
+        if self._executor is None or size < self._offload_threshold:
+            return _convert_many(self._parse_mode, items)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _convert_many, self._parse_mode, items)
+
+    def _decode(self, r: httpx.Response) -> Any:
+        if self._parse_mode == "lean":
+            return _decode_json(r.content)
+        return r.json()
+
+    async def _get_json(self, path: str, params: dict[str, Any] | None = None) -> dict[str, Any]:
+        """GET *path* under the in-flight limit and return the decoded body."""
+        r = await self._send_get(path, params=params)
         r.raise_for_status()
-        return Patient.model_validate(r.json())
+        return self._decode(r)
     
+    async def _send_get(self, path: str, **kwargs: Any) -> httpx.Response:
+        """GET under the in-flight limit; hedged + retried when configured.
+
+        With hedging every attempt and duplicate takes its own slot, and
+        backoff sleeps hold none.
+        """
+        if self._hedging is not None:
+            return await self._hedging.get(self._client, path, limit=self._inflight, **kwargs)
+        async with self._inflight:
+            return await self._client.get(path, **kwargs)
+
+    async def _get_patient_raw(
+            self,
+            pid: str,
+            *,
+            if_none_match: str | None = None,
+    ) -> tuple[dict[str, Any] | None, str | None]:
+        """GET a Patient as raw JSON plus its version; ``None`` body on 304."""
+        headers = {"If-None-Match": f'W/"{if_none_match}"'} if if_none_match else None
+        r = await self._send_get(f"/Patient/{pid}", headers=headers)
+        if r.status_code == 304:
+            return None, if_none_match
+        r.raise_for_status()
+        raw = self._decode(r)
+        version = _etag_version(r.headers.get("ETag")) or (raw.get("meta") or {}).get("versionId")
+        return raw, version
+
+    @staticmethod
+    def _observation_params(pid: str, category: str, count: int = 10) -> dict[str, str | int]:
+        """Query parameters for the most recent Observations of a category."""
+        return {
+            "patient": pid,
+            "category": category,
+            "_sort": "-date",
+            "_count": count,
+        }
+
     async def _get_observations(
             self,
             pid: str,
             *,
             category: str,
             count: int = 10
-    ) -> list[Observation]:
-        """Fetch Observations of a given category for a patient."""
-        r = await self._client.get(
+    ) -> list[dict[str, Any]]:
+        """Fetch raw Observations of a given category for a patient."""
+        bundle = await self._get_json(
             "/Observation",
-            params={
-                "patient": pid,
-                "category": category,
-                "_sort": "-date",
-                "_count": count,
-            },
+            params=self._observation_params(pid, category, count),
         )
-        r.raise_for_status()
-        bundle = r.json()
-        good: list[Observation] = []
-        for entry in bundle.get("entry", []):
+        return _bundle_resources(bundle)
+
+    async def _observations_changed(self, pid: str, *, since: str | None) -> bool:
+        """Any vital/lab Observation of *pid* updated at or after *since*?
+
+        Without a watermark every existing Observation counts as a change.
+        """
+        params: dict[str, str] = {
+            "patient": pid,
+            "category": "vital-signs,laboratory",
+            "_summary": "count",
+        }
+        if since is not None:
+            params["_lastUpdated"] = f"ge{since}"
+        bundle = await self._get_json("/Observation", params=params)
+        return bool(bundle.get("total", 1))
+
+    async def _get_patient_chunk(
+            self,
+            ids: list[str],
+            *,
+            count: int = 10,
+    ) -> dict[str, tuple[PatientContext, str | None]]:
+        """Fetch one chunk of patients plus their vitals/labs and versions, keyed by ID."""
+        joined = ",".join(ids)
+        patient_params = {"_id": joined, "_count": len(ids)}
+        vital_params = self._observation_params(joined, "vital-signs", count * len(ids))
+        lab_params = self._observation_params(joined, "laboratory", count * len(ids))
+
+        bundles: list[dict[str, Any]] | None = None
+        if self._use_batch():
+            try:
+                entries = await self._post_batch([
+                    "Patient?" + urlencode(patient_params),
+                    "Observation?" + urlencode(vital_params),
+                    "Observation?" + urlencode(lab_params),
+                ])
+            except _BatchUnsupported:
+                self._batch_supported = False
+            else:
+                self._batch_supported = True
+                for entry, path in zip(entries, ("/Patient", "/Observation", "/Observation")):
+                    self._raise_for_entry(entry, path)
+                bundles = [e.get("resource") or {} for e in entries]
+
+        if bundles is None:
+            bundles = list(await asyncio.gather(
+                self._get_json("/Patient", params=patient_params),
+                self._get_json("/Observation", params=vital_params),
+                self._get_json("/Observation", params=lab_params),
+            ))
+
+        patient_bundle, vital_bundle, lab_bundle = bundles
+        raw_patients = [raw for raw in _bundle_resources(patient_bundle) if raw.get("id")]
+        grouped: dict[str, dict[str, list[dict[str, Any]]]] = {}
+        short: list[tuple[str, str]] = []
+        for category, bundle in (("vital-signs", vital_bundle), ("laboratory", lab_bundle)):
+            resources = _bundle_resources(bundle)
+            grouped[category] = by_pid = _group_by_subject(resources, count)
+            # The chunk query caps the whole chunk, not each patient: if it
+            # was cut off, patients still short of *count* may have more
+            if _next_link(bundle) is not None or len(resources) >= count * len(ids):
+                short += [(raw["id"], category) for raw in raw_patients
+                          if len(by_pid.get(raw["id"], ())) < count]
+        for (pid, category), observations in (await self._get_observations_many(short, count)).items():
+            grouped[category][pid] = observations
+
+        items: list[_RawPatient] = [
+            (raw, grouped["vital-signs"].get(raw["id"]), grouped["laboratory"].get(raw["id"]))
+            for raw in raw_patients
+        ]
+        watermark = _obs_watermark(vital_bundle, lab_bundle)
+        return {
+            ctx.patient_id: (ctx, _version_token((raw.get("meta") or {}).get("versionId"), watermark))
+            for raw, ctx in zip(raw_patients, await self._to_ctxs(items))
+        }
+
+    async def _get_observations_many(
+            self,
+            queries: list[tuple[str, str]],
+            count: int,
+    ) -> dict[tuple[str, str], list[dict[str, Any]]]:
+        """Per-patient Observation searches for (patient ID, category) pairs."""
+        if not queries:
+            return {}
+        if self._use_batch():
             try:
-                good.append(Observation.model_validate(entry["resource"]))
-            except ValidationError:
-                # HAPI demo sometimes omits timezone in effectiveDateTime → skip
-                continue
-        return good
+                entries = await self._post_batch([
+                    "Observation?" + urlencode(self._observation_params(pid, category, count))
+                    for pid, category in queries
+                ])
+            except _BatchUnsupported:
+                self._batch_supported = False
+            else:
+                for entry in entries:
+                    self._raise_for_entry(entry, "/Observation")
+                return {q: _bundle_resources(e.get("resource") or {}) for q, e in zip(queries, entries)}
+
+        results = await asyncio.gather(*(
+            self._get_observations(pid, category=category, count=count) for pid, category in queries
+        ))
+        return dict(zip(queries, results))
+
+    def _raise_for_entry(self, entry: dict[str, Any], path: str) -> None:
+        """Surface a failed batch entry the same way the GET path does."""
+        status = _entry_status(entry)
+        if status >= 400:
+            request = self._client.build_request("GET", path)
+            httpx.Response(status, request=request).raise_for_status()
+
+    async def _post_batch(self, urls: list[str]) -> list[dict[str, Any]]:
+        """POST a FHIR batch Bundle of GETs and return the response entries.
+
+        Raises _BatchUnsupported when the server does not understand the
+        request, so the caller can fall back to separate GETs.
+        """
+        bundle = {
+            "resourceType": "Bundle",
+            "type": "batch",
+            "entry": [{"request": {"method": "GET", "url": u}} for u in urls],
+        }
+        async with self._inflight:
+            r = await self._client.post(
+                "/", json=bundle, headers={"Content-Type": "application/fhir+json"},
+            )
+        if r.status_code in _BATCH_UNSUPPORTED_STATUS:
+            raise _BatchUnsupported(r.status_code)
+        r.raise_for_status()
+
+        body = self._decode(r)
+        entries = body.get("entry", [])
+        if body.get("type") != "batch-response" or len(entries) != len(urls):
+            raise _BatchUnsupported("unexpected batch response")
+        return entries
+
+    async def _get_patient_batch(self, pid: str) -> PatientContext:
+        """Fetch Patient + vitals + labs with one FHIR batch Bundle POST."""
+        urls = [
+            f"Patient/{pid}",
+            "Observation?" + urlencode(self._observation_params(pid, "vital-signs")),
+            "Observation?" + urlencode(self._observation_params(pid, "laboratory")),
+        ]
+        entries = await self._post_batch(urls)
+        for entry, url in zip(entries, urls):
+            # a failed Observation search must not read as "no readings"
+            self._raise_for_entry(entry, "/" + url)
+        patient_entry, vitals_entry, labs_entry = entries
+
+        return await self._to_ctx(
+            patient_entry["resource"],
+            _bundle_resources(vitals_entry.get("resource") or {}),
+            _bundle_resources(labs_entry.get("resource") or {}),
+        )
 
     async def __aenter__(self):
         return self
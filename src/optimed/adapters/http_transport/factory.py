@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import time
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Callable, Mapping, Sequence
+
+import httpx
+
+"""
+optimed.adapters.http_transport.factory
+---------------------------------------
+
+One tuned, shareable HTTP connection pool for every adapter.
+
+✓ HTTP/2 multiplexing (falls back to HTTP/1.1 if ``h2`` is missing)
+✓ Explicit max-connection / keepalive limits (TransportConfig)
+✓ Clients built from the same factory share one pool; the pool is closed
+  when the last of them is closed (and reopened lazily if needed again)
+✓ warm_up() opens connections (TCP + TLS) ahead of the first real request
+✓ stats() – active / idle connections, in-flight requests (until the
+  response body is closed), pool wait time
+✓ default_transport() – process-wide factory adapters fall back to, so
+  independently built adapters still share one pool
+
+Usage::
+
+    transport = TransportFactory(TransportConfig(max_connections=50))
+    repo = HAPIFHIRRepository(transport=transport)
+    llm = AnthropicClaudeClient(transport=transport)
+    await transport.warm_up([FHIR_BASE_URL + "/metadata"])
+"""
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    http2: bool = True
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0     # seconds an idle connection is kept
+    connect_timeout: float = 5.0
+    timeout: float = 10.0              # read / write / pool timeout
+    retries: int = 0                   # connect-level retries (httpcore)
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    connections: int = 0        # open connections right now
+    active: int = 0             # … of which serving a request
+    idle: int = 0               # … of which idle (kept alive)
+    in_flight: int = 0          # requests sent whose response is not yet closed
+    requests: int = 0           # total requests sent
+    connections_opened: int = 0 # TCP connects (≈ cold handshakes)
+    total_wait: float = 0.0     # seconds from submit → request headers sent
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0.0
+
+
+def _h2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def _pool_connections(transport: httpx.AsyncHTTPTransport | None) -> list[Any]:
+    """httpcore connections behind *transport*, or [] if its internals moved.
+
+    httpx exposes no public pool introspection; this is the one place that
+    reaches into ``AsyncHTTPTransport._pool`` and it degrades to "no data".
+    """
+    pool = getattr(transport, "_pool", None)
+    conns = getattr(pool, "connections", None)
+    if conns is None:
+        return []
+    try:
+        return [c for c in conns if callable(getattr(c, "is_idle", None))]
+    except TypeError:
+        return []
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports (once) when it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]) -> None:
+        self._stream = stream
+        self._on_close: Callable[[], None] | None = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """Per-client handle on the factory's pool; closing it only drops a ref."""
+
+    def __init__(self, factory: "TransportFactory", *, counted: bool = True) -> None:
+        self._factory = factory
+        self._closed = not counted   # uncounted handles never release
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._factory._handle(request)
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            await self._factory._release()
+
+
+class TransportFactory:
+    """Builds httpx.AsyncClient objects that share one instrumented pool."""
+
+    def __init__(self, config: TransportConfig | None = None) -> None:
+        config = config or TransportConfig()
+        if config.http2 and not _h2_available():
+            config = replace(config, http2=False)
+        self.config = config
+        self._transport: httpx.AsyncHTTPTransport | None = None
+        self._refs = 0
+        self._in_flight = 0
+        self._requests = 0
+        self._opened = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def client(
+        self,
+        *,
+        base_url: str = "",
+        headers: Mapping[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> httpx.AsyncClient:
+        """New AsyncClient on the shared pool (closing it is always safe)."""
+        self._refs += 1
+        t = timeout if timeout is not None else self.config.timeout
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(t, connect=self.config.connect_timeout),
+            transport=_SharedTransport(self),
+        )
+
+    async def warm_up(self, urls: Sequence[str], *, connections: int = 1) -> int:
+        """Open *connections* per URL with HEAD requests; returns successes.
+
+        Any HTTP status counts as success – only the handshake matters.
+        Warm-up does not hold a reference, so it may run before any client
+        has been created.
+        """
+        transport = _SharedTransport(self, counted=False)
+        timeout = httpx.Timeout(self.config.timeout, connect=self.config.connect_timeout)
+        async with httpx.AsyncClient(transport=transport, timeout=timeout) as c:
+            async def _one(url: str) -> bool:
+                try:
+                    await c.head(url)
+                    return True
+                except httpx.HTTPError:
+                    return False
+            n = 1 if self.config.http2 else connections  # h2 multiplexes
+            results = await asyncio.gather(*(_one(u) for u in urls for _ in range(n)))
+        return sum(results)
+
+    def stats(self) -> PoolStats:
+        conns = _pool_connections(self._transport)
+        idle = sum(1 for c in conns if c.is_idle())
+        return PoolStats(
+            connections=len(conns),
+            active=len(conns) - idle,
+            idle=idle,
+            in_flight=self._in_flight,
+            requests=self._requests,
+            connections_opened=self._opened,
+            total_wait=self._total_wait,
+            max_wait=self._max_wait,
+        )
+
+    async def aclose(self) -> None:
+        """Close the pool regardless of outstanding clients."""
+        if self._transport is not None:
+            transport, self._transport = self._transport, None
+            await transport.aclose()
+
+    def _ensure_transport(self) -> httpx.AsyncHTTPTransport:
+        if self._transport is None:
+            cfg = self.config
+            self._transport = httpx.AsyncHTTPTransport(
+                http2=cfg.http2,
+                retries=cfg.retries,
+                limits=httpx.Limits(
+                    max_connections=cfg.max_connections,
+                    max_keepalive_connections=cfg.max_keepalive_connections,
+                    keepalive_expiry=cfg.keepalive_expiry,
+                ),
+            )
+        return self._transport
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        waited = False
+        downstream = request.extensions.get("trace")
+
+        async def _trace(name: str, info: dict[str, Any]) -> None:
+            nonlocal waited
+            if name == "connection.connect_tcp.started":
+                self._opened += 1
+            elif not waited and name.endswith("send_request_headers.started"):
+                waited = True
+                wait = time.perf_counter() - start
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            if downstream is not None:
+                await downstream(name, info)
+
+        request.extensions = {**request.extensions, "trace": _trace}
+        self._requests += 1
+        self._in_flight += 1
+        try:
+            response = await self._ensure_transport().handle_async_request(request)
+        except BaseException:
+            self._in_flight -= 1
+            raise
+        # Still in flight until the body is read/closed (streams included)
+        if isinstance(response.stream, httpx.AsyncByteStream):
+            response.stream = _TrackedStream(response.stream, self._done)
+        else:
+            self._done()
+        return response
+
+    def _done(self) -> None:
+        self._in_flight -= 1
+
+    async def _release(self) -> None:
+        self._refs -= 1
+        if self._refs <= 0:
+            self._refs = 0
+            await self.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+_default: TransportFactory | None = None
+
+
+def default_transport() -> TransportFactory:
+    """Process-wide TransportFactory used by adapters not given one."""
+    global _default
+    if _default is None:
+        _default = TransportFactory()
+    return _default
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Mapping
+
+import numpy as np
+
+from optimed.core.domain import KPIEvent, KPIEventBatch
+from optimed.core.ports import KPIEventSink
+
+"""
+optimed.adapters.kpi_sink.aggregator
+------------------------------------
+
+Live rolling-window aggregates over KPIEvent streams.
+
+✓ Per ``metric`` and per (``metric``, ``metric_source``)
+✓ 1 / 5 / 60-minute windows (configurable), each a ring of fixed-width
+  time buckets – count, sum, min, max and a DDSketch per bucket
+✓ Each series writes one open base bucket per event; a closed bucket is
+  folded into every window once, and subtracted again when it falls out
+  of the window – a query never scans events, only the window's fixed
+  number of buckets for min/max
+✓ DDSketch quantiles (p50/p95/p99) with bounded relative error; sketches
+  with the same accuracy merge by adding bin counts
+✓ Usable as a KPIEventSink that tees into a downstream sink;
+  record_batch() computes sketch bins and bucket ids for a whole
+  KPIEventBatch with NumPy before folding it in
+
+Usage::
+
+    agg = KPIAggregator(downstream=BufferedKPIEventSink(SQLiteKPIBackend(...)))
+    await agg.record(event)
+    agg.query("heart_rate", window="5m").p95
+"""
+
+# name → (window width, bucket width), seconds
+DEFAULT_WINDOWS: Mapping[str, tuple[int, int]] = {
+    "1m": (60, 1),
+    "5m": (300, 5),
+    "60m": (3600, 60),
+}
+
+# |value| below this counts as zero in the sketch
+_MIN_INDEXABLE = 1e-9
+
+
+def bin_key(value: float, log_gamma: float) -> int:
+    """Signed sketch bin whose integer order matches the value order.
+
+    Positive values map to odd keys ``2·ceil(log_gamma(v)) + 1``, negative
+    values to the mirrored negative keys, and (near) zero to 0.
+    """
+    if value > _MIN_INDEXABLE:
+        return math.ceil(math.log(value) / log_gamma) * 2 + 1
+    if value < -_MIN_INDEXABLE:
+        return -(math.ceil(math.log(-value) / log_gamma) * 2 + 1)
+    return 0
+
+
+class DDSketch:
+    """Log-bucketed quantile sketch (DDSketch) with relative accuracy *alpha*.
+
+    Values are mapped to bin ``ceil(log_gamma(|v|))`` with
+    ``gamma = (1 + alpha) / (1 - alpha)``; any quantile is then returned
+    within a factor ``alpha`` of the true value.  Counts are additive, so
+    sketches merge – and un-merge – by adding / subtracting bins.
+    """
+
+    __slots__ = ("log_gamma", "bins", "count")
+
+    def __init__(self, log_gamma: float) -> None:
+        self.log_gamma = log_gamma
+        self.bins: dict[int, int] = {}
+        self.count = 0
+
+    @staticmethod
+    def log_gamma_for(alpha: float) -> float:
+        return math.log((1 + alpha) / (1 - alpha))
+
+    def add(self, value: float) -> None:
+        key = bin_key(value, self.log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        self.count += 1
+
+    def merge(self, other: DDSketch, sign: int = 1) -> None:
+        """Add (sign=1) or remove (sign=-1) *other*'s counts."""
+        self.merge_bins(other.bins, other.count, sign)
+
+    def merge_bins(self, bins: Mapping[int, int], count: int, sign: int = 1) -> None:
+        self.count += sign * count
+        mine = self.bins
+        for k, c in bins.items():
+            n = mine.get(k, 0) + sign * c
+            if n:
+                mine[k] = n
+            else:
+                del mine[k]
+
+    def quantile(self, q: float) -> float | None:
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        keys = sorted(self.bins)
+        for k in keys:
+            seen += self.bins[k]
+            if seen > rank:
+                return self._value(k)
+        return self._value(keys[-1])
+
+    def _value(self, key: int) -> float:
+        """Representative value of a bin key (bin midpoint)."""
+        if key == 0:
+            return 0.0
+        i = (abs(key) - 1) // 2
+        gamma = math.exp(self.log_gamma)
+        v = 2 * gamma**i / (gamma + 1)
+        return v if key > 0 else -v
+
+
+@dataclass(frozen=True)
+class WindowStats:
+    count: int
+    mean: float | None
+    min: float | None
+    max: float | None
+    p50: float | None
+    p95: float | None
+    p99: float | None
+
+
+class _Bucket:
+    __slots__ = ("bid", "count", "sum", "min", "max", "bins")
+
+    def __init__(self, bid: int) -> None:
+        self.bid = bid
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.bins: dict[int, int] = {}
+
+    def absorb(self, other: _Bucket) -> None:
+        self.count += other.count
+        self.sum += other.sum
+        if other.min < self.min:
+            self.min = other.min
+        if other.max > self.max:
+            self.max = other.max
+        bins = self.bins
+        for k, c in other.bins.items():
+            bins[k] = bins.get(k, 0) + c
+
+
+class _Window:
+    """Ring of *n* buckets of *width* seconds plus incremental totals."""
+
+    __slots__ = ("width", "n", "ring", "count", "sum", "sketch")
+
+    def __init__(self, span: int, width: int, log_gamma: float) -> None:
+        self.width = width
+        self.n = span // width
+        self.ring: list[_Bucket | None] = [None] * self.n
+        self.count = 0
+        self.sum = 0.0
+        self.sketch = DDSketch(log_gamma)
+
+    def absorb(self, part: _Bucket, base: int) -> bool:
+        """Fold a closed base bucket into the ring and the window totals."""
+        bid = part.bid * base // self.width
+        slot = bid % self.n
+        b = self.ring[slot]
+        if b is None or b.bid != bid:
+            if b is not None and b.bid > bid:
+                return False              # older than the window – too late
+            if b is not None:
+                self._evict(b)
+            b = self.ring[slot] = _Bucket(bid)
+        b.absorb(part)
+        self.count += part.count
+        self.sum += part.sum
+        self.sketch.merge_bins(part.bins, part.count)
+        return True
+
+    def expire(self, now: float) -> None:
+        oldest = self._oldest(now)
+        for i, b in enumerate(self.ring):
+            if b is not None and b.bid < oldest:
+                self._evict(b)
+                self.ring[i] = None
+
+    def stats(self, now: float, pending: _Bucket | None, base: int) -> WindowStats:
+        """Window aggregates, including the still-open base bucket."""
+        self.expire(now)
+        live = [b for b in self.ring if b is not None]
+        count, total, sketch = self.count, self.sum, self.sketch
+        if pending is not None and pending.bid * base // self.width >= self._oldest(now):
+            live.append(pending)
+            count += pending.count
+            total += pending.sum
+            sketch = DDSketch(sketch.log_gamma)
+            sketch.merge_bins(self.sketch.bins, self.sketch.count)
+            sketch.merge_bins(pending.bins, pending.count)
+        if count <= 0:
+            return WindowStats(0, None, None, None, None, None, None)
+        return WindowStats(
+            count=count,
+            mean=total / count,
+            min=min(b.min for b in live),
+            max=max(b.max for b in live),
+            p50=sketch.quantile(0.50),
+            p95=sketch.quantile(0.95),
+            p99=sketch.quantile(0.99),
+        )
+
+    def _oldest(self, now: float) -> int:
+        return int(now // self.width) - self.n + 1
+
+    def _evict(self, b: _Bucket) -> None:
+        self.count -= b.count
+        self.sum -= b.sum
+        self.sketch.merge_bins(b.bins, b.count, sign=-1)
+
+
+class _Series:
+    """One (metric[, source]) key: an open base bucket feeding its windows."""
+
+    __slots__ = ("open", "windows")
+
+    def __init__(self, windows: list[_Window]) -> None:
+        self.open: _Bucket | None = None
+        self.windows = windows
+
+    def add(self, bid: int, value: float, key: int, base: int) -> bool:
+        b = self.open
+        if b is None or b.bid != bid:
+            if b is not None and bid < b.bid:
+                # out of order: fold straight into the windows
+                late = _Bucket(bid)
+                late.count, late.sum, late.min, late.max = 1, value, value, value
+                late.bins[key] = 1
+                accepted = False
+                for w in self.windows:
+                    accepted = w.absorb(late, base) or accepted
+                return accepted
+            if b is not None:
+                for w in self.windows:
+                    w.absorb(b, base)
+            b = self.open = _Bucket(bid)
+        b.count += 1
+        b.sum += value
+        if value < b.min:
+            b.min = value
+        if value > b.max:
+            b.max = value
+        bins = b.bins
+        bins[key] = bins.get(key, 0) + 1
+        return True
+
+
+@dataclass
+class AggregatorStats:
+    events: int = 0
+    late: int = 0        # arrived after their bucket left every window
+    series: int = 0      # tracked (metric[, source]) keys
+
+
+class KPIAggregator(KPIEventSink):
+    """Incremental 1/5/60-minute aggregates; optional downstream sink."""
+
+    def __init__(
+        self,
+        *,
+        windows: Mapping[str, tuple[int, int]] = DEFAULT_WINDOWS,
+        relative_accuracy: float = 0.01,
+        downstream: KPIEventSink | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        for name, (span, width) in windows.items():
+            if span % width:
+                raise ValueError(f"window {name!r}: span must be a multiple of the bucket width")
+        self._windows = dict(windows)
+        self._base = math.gcd(*(width for _, width in self._windows.values()))
+        self._log_gamma = DDSketch.log_gamma_for(relative_accuracy)
+        self._downstream = downstream
+        self._clock = clock
+        self._series: dict[tuple[str, str | None], _Series] = {}
+        self._names = list(self._windows)
+        self.stats = AggregatorStats()
+
+    async def record(self, event: KPIEvent) -> None:
+        self.add(event.metric, event.value, event.recorded_at.timestamp(), event.metric_source)
+        if self._downstream is not None:
+            await self._downstream.record(event)
+
+    async def record_batch(self, batch: KPIEventBatch) -> None:
+        self.add_batch(batch)
+        if self._downstream is not None:
+            await self._downstream.record_batch(batch)
+
+    async def flush(self) -> None:
+        if self._downstream is not None:
+            await self._downstream.flush()
+
+    def add(self, metric: str, value: float, ts: float, source: str | None = None) -> None:
+        """Hot path: fold one reading into the metric and (metric, source) series."""
+        key = bin_key(value, self._log_gamma)
+        bid = int(ts // self._base)
+        base = self._base
+        series = self._series
+        s = series.get((metric, None)) or self._new_series(metric, None)
+        if not s.add(bid, value, key, base):
+            self.stats.late += 1
+        if source is not None:
+            s = series.get((metric, source)) or self._new_series(metric, source)
+            s.add(bid, value, key, base)
+        self.stats.events += 1
+
+    def add_batch(self, batch: KPIEventBatch) -> None:
+        """Columnar add(): bins and bucket ids are computed vectorised."""
+        if not len(batch):
+            return
+        values = batch.values
+        mag = np.abs(values)
+        with np.errstate(divide="ignore"):
+            keys = np.ceil(np.log(np.where(mag > _MIN_INDEXABLE, mag, 1.0)) / self._log_gamma) * 2 + 1
+        keys = np.where(mag > _MIN_INDEXABLE, np.sign(values) * keys, 0).astype(np.int64)
+        bids = batch.recorded_at_ns // (self._base * 1_000_000_000)
+
+        base = self._base
+        series: dict[int, _Series] = {}
+        with_source: dict[tuple[int, int], _Series] = {}
+        late = 0
+        for m, src, bid, v, k in zip(
+            batch.metric_codes.tolist(), batch.source_codes.tolist(),
+            bids.tolist(), values.tolist(), keys.tolist(),
+        ):
+            s = series.get(m)
+            if s is None:
+                name = batch.metrics[m]
+                s = series[m] = self._series.get((name, None)) or self._new_series(name, None)
+            if not s.add(bid, v, k, base):
+                late += 1
+            if src >= 0:
+                ss = with_source.get((m, src))
+                if ss is None:
+                    key = (batch.metrics[m], batch.sources[src])
+                    ss = with_source[(m, src)] = self._series.get(key) or self._new_series(*key)
+                ss.add(bid, v, k, base)
+        self.stats.events += len(batch)
+        self.stats.late += late
+
+    def query(
+        self,
+        metric: str,
+        source: str | None = None,
+        *,
+        window: str = "1m",
+        now: float | None = None,
+    ) -> WindowStats:
+        """Aggregates for *metric* (optionally one *source*) over *window*."""
+        idx = self._names.index(window)
+        s = self._series.get((metric, source))
+        if s is None:
+            return WindowStats(0, None, None, None, None, None, None)
+        return s.windows[idx].stats(self._clock() if now is None else now, s.open, self._base)
+
+    def series(self) -> list[tuple[str, str | None]]:
+        return list(self._series)
+
+    def _new_series(self, metric: str, source: str | None) -> _Series:
+        s = self._series[(metric, source)] = _Series([
+            _Window(span, width, self._log_gamma) for span, width in self._windows.values()
+        ])
+        self.stats.series += 1
+        return s
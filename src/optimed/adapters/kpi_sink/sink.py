@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Literal, Protocol, Sequence
+
+from optimed.core.domain import KPIEvent, KPIEventBatch
+from optimed.core.ports import KPIEventSink
+
+"""
+optimed.adapters.kpi_sink.sink
+------------------------------
+
+Buffered, batched KPIEventSink.
+
+✓ record() only appends to a bounded in-memory queue
+✓ A background task flushes when ``batch_size`` events are waiting or
+  ``flush_interval`` seconds have passed, one bulk write per batch
+✓ Pluggable KPIBackend (SQLite included; Timescale etc. later)
+✓ Full buffer → "block" the producer, "drop_oldest", or "sample"
+  (reservoir sampling keeps a uniform sample of the overflow period)
+✓ record_batch(): columnar KPIEventBatches of at least ``batch_size`` rows
+  go straight to the backend's columnar writer (the producer waits for
+  the write – natural backpressure); smaller ones join the queue
+✓ Failed batches are put back and retried on the next flush
+✓ Queue depth, drops and flush latency via ``stats``
+
+Usage::
+
+    async with BufferedKPIEventSink(SQLiteKPIBackend("kpi.sqlite")) as sink:
+        await sink.record(KPIEvent(metric="hr", value=72, unit="bpm"))
+"""
+
+OverflowPolicy = Literal["block", "drop_oldest", "sample"]
+
+
+class KPIBackend(Protocol):
+    """Storage behind BufferedKPIEventSink – one call per batch."""
+
+    async def write_many(self, events: Sequence[KPIEvent]) -> None: ...
+
+    async def write_batch(self, batch: KPIEventBatch) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+@dataclass
+class KPISinkStats:
+    recorded: int = 0
+    written: int = 0
+    dropped: int = 0             # drop_oldest / sample discards
+    blocked: int = 0             # record() calls that had to wait
+    flushes: int = 0
+    failed_flushes: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    total_flush_latency: float = 0.0
+    max_flush_latency: float = 0.0
+
+    @property
+    def mean_flush_latency(self) -> float:
+        return self.total_flush_latency / self.flushes if self.flushes else 0.0
+
+
+class BufferedKPIEventSink(KPIEventSink):
+    """Bounded queue in front of a KPIBackend, flushed by size or time."""
+
+    def __init__(
+        self,
+        backend: KPIBackend,
+        *,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: OverflowPolicy = "block",
+        rng: random.Random | None = None,
+    ) -> None:
+        if batch_size > max_queue:
+            raise ValueError("batch_size must not exceed max_queue")
+        self._backend = backend
+        self._max_queue = max_queue
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._overflow = overflow
+        self._rng = rng or random.Random()
+        self._queue: deque[KPIEvent] = deque()
+        self._overflow_seen = 0      # events offered while full (sampling)
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self.stats = KPISinkStats()
+
+    async def record(self, event: KPIEvent) -> None:
+        self._ensure_started()
+        if len(self._queue) >= self._max_queue:
+            if self._overflow == "block":
+                self.stats.blocked += 1
+                while len(self._queue) >= self._max_queue:
+                    self._wake.set()
+                    self._space.clear()
+                    await self._space.wait()
+            elif self._overflow == "drop_oldest":
+                self._queue.popleft()
+                self.stats.dropped += 1
+            else:
+                self._overflow_seen += 1
+                self.stats.dropped += 1
+                slot = self._rng.randrange(self._max_queue + self._overflow_seen)
+                if slot < self._max_queue:
+                    self._queue[slot] = event
+                self.stats.recorded += 1
+                return
+        self._queue.append(event)
+        self.stats.recorded += 1
+        self._update_depth()
+        if len(self._queue) >= self._batch_size:
+            self._wake.set()
+
+    async def record_batch(self, batch: KPIEventBatch) -> None:
+        if len(batch) < self._batch_size:
+            for event in batch.to_events():
+                await self.record(event)
+            return
+        async with self._flush_lock:
+            for start in range(0, len(batch), self._batch_size):
+                part = batch.take(slice(start, start + self._batch_size))
+                self.stats.recorded += len(part)
+                started = time.perf_counter()
+                try:
+                    await self._backend.write_batch(part)
+                except Exception:
+                    self.stats.failed_flushes += 1
+                    raise
+                self._record_flush(len(part), time.perf_counter() - started)
+
+    async def flush(self) -> None:
+        """Write everything buffered so far (raises if the backend fails)."""
+        await self._drain(full_batches_only=False)
+
+    async def _drain(self, *, full_batches_only: bool) -> None:
+        minimum = self._batch_size if full_batches_only else 1
+        async with self._flush_lock:
+            while len(self._queue) >= minimum:
+                n = min(self._batch_size, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(n)]
+                self._after_dequeue()
+                started = time.perf_counter()
+                try:
+                    await self._backend.write_many(batch)
+                except Exception:
+                    self.stats.failed_flushes += 1
+                    self._queue.extendleft(reversed(batch))
+                    self._update_depth()
+                    raise
+                self._record_flush(n, time.perf_counter() - started)
+
+    def _record_flush(self, n: int, elapsed: float) -> None:
+        s = self.stats
+        s.flushes += 1
+        s.written += n
+        s.total_flush_latency += elapsed
+        s.max_flush_latency = max(s.max_flush_latency, elapsed)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flusher, write what is left and close the backend."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        finally:
+            await self._backend.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._flush_interval)
+                size_triggered = True
+            except asyncio.TimeoutError:
+                size_triggered = False
+            self._wake.clear()
+            try:
+                await self._drain(full_batches_only=size_triggered)
+            except Exception:
+                # events were re-queued; back off one interval and retry
+                await asyncio.sleep(self._flush_interval)
+
+    def _ensure_started(self) -> None:
+        if self._task is None:
+            self.start()
+
+    def _after_dequeue(self) -> None:
+        self._overflow_seen = 0
+        self._update_depth()
+        self._space.set()
+
+    def _update_depth(self) -> None:
+        depth = len(self._queue)
+        self.stats.queue_depth = depth
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
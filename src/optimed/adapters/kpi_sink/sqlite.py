@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from typing import Sequence
+
+from optimed.core.domain import KPIEvent, KPIEventBatch
+
+"""
+optimed.adapters.kpi_sink.sqlite
+--------------------------------
+
+Local SQLite backend for BufferedKPIEventSink.
+
+✓ One executemany() + one commit per batch (WAL journal)
+✓ Columnar KPIEventBatches are written straight from their arrays
+✓ Runs in a worker thread so bulk inserts never block the event loop
+✓ ``recorded_at`` stored as epoch seconds, indexed with the metric
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kpi_events (
+    metric        TEXT NOT NULL,
+    value         REAL NOT NULL,
+    unit          TEXT NOT NULL,
+    recorded_at   REAL NOT NULL,
+    metric_source TEXT
+);
+CREATE INDEX IF NOT EXISTS kpi_events_metric_time ON kpi_events (metric, recorded_at);
+"""
+
+
+class SQLiteKPIBackend:
+    """KPIBackend writing to a single SQLite file (":memory:" for tests)."""
+
+    def __init__(self, path: str) -> None:
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self._lock = asyncio.Lock()   # one writer thread at a time
+
+    async def write_many(self, events: Sequence[KPIEvent]) -> None:
+        rows = [
+            (e.metric, e.value, e.unit, e.recorded_at.timestamp(), e.metric_source)
+            for e in events
+        ]
+        async with self._lock:
+            await asyncio.to_thread(self._insert, rows)
+
+    async def write_batch(self, batch: KPIEventBatch) -> None:
+        rows = list(zip(
+            batch.metric_strings().tolist(),
+            batch.values.tolist(),
+            batch.unit_strings().tolist(),
+            (batch.recorded_at_ns / 1e9).tolist(),
+            batch.source_strings().tolist(),
+        ))
+        async with self._lock:
+            await asyncio.to_thread(self._insert, rows)
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM kpi_events").fetchone()[0]
+
+    async def close(self) -> None:
+        async with self._lock:
+            self._db.close()
+
+    def _insert(self, rows: list[tuple]) -> None:
+        with self._db:
+            self._db.executemany("INSERT INTO kpi_events VALUES (?, ?, ?, ?, ?)", rows)
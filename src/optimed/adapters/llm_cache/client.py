@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Sequence
+
+from optimed.core.domain import ChatMessage
+from optimed.core.ports import LLMClient
+
+"""
+optimed.adapters.llm_cache.client
+---------------------------------
+
+Exact-match response cache for any LLMClient.
+
+✓ Key = SHA-256 of the canonical (model, role/content sequence,
+  temperature, max_tokens) – timestamps and metadata are ignored
+✓ In-memory LRU tier + optional SQLite tier that survives restarts
+✓ TTL on both tiers
+✓ Non-zero temperature bypasses the cache unless explicitly allowed
+✓ Concurrent identical calls share one upstream request
+✓ chat_stream() replays hits as a single delta and caches streamed replies
+✓ Hit-rate counters via ``stats``
+"""
+
+
+@dataclass
+class LLMCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0        # not cacheable (temperature > 0)
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+
+_DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key        TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    message    TEXT NOT NULL
+);
+"""
+
+
+def cache_key(
+    model: str,
+    messages: Sequence[ChatMessage],
+    temperature: float,
+    max_tokens: int | None,
+) -> str:
+    """Canonical hash of everything that determines the completion."""
+    canonical = json.dumps(
+        {
+            "model": model,
+            "messages": [[m.role.value, m.content] for m in messages],
+            "temperature": round(temperature, 6),
+            "max_tokens": max_tokens,
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CachingLLMClient(LLMClient):
+    """Wraps an LLMClient with an exact-match memory + disk cache."""
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        *,
+        max_entries: int = 1024,
+        ttl: float = 24 * 3600.0,
+        disk_path: str | None = None,
+        cache_nonzero_temperature: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._inner = inner
+        self._model = getattr(inner, "model", type(inner).__name__)
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._cache_nonzero_temperature = cache_nonzero_temperature
+        self._clock = clock
+        self._memory: OrderedDict[str, tuple[float, ChatMessage]] = OrderedDict()
+        self._pending: dict[str, asyncio.Task[ChatMessage]] = {}
+        self._db: sqlite3.Connection | None = None
+        if disk_path is not None:
+            self._db = sqlite3.connect(disk_path)
+            self._db.execute(_DISK_SCHEMA)
+            self._db.commit()
+        self.stats = LLMCacheStats()
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    async def chat(
+        self,
+        messages: Sequence[ChatMessage],
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+    ) -> ChatMessage:
+        if temperature != 0 and not self._cache_nonzero_temperature:
+            self.stats.bypassed += 1
+            return await self._inner.chat(messages, temperature=temperature, max_tokens=max_tokens)
+
+        key = cache_key(self._model, messages, temperature, max_tokens)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        task = self._pending.get(key)
+        if task is None:
+            self.stats.misses += 1
+            task = asyncio.ensure_future(self._fetch(key, messages, temperature, max_tokens))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def chat_stream(
+        self,
+        messages: Sequence[ChatMessage],
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+    ) -> AsyncIterator[str | ChatMessage]:
+        cacheable = temperature == 0 or self._cache_nonzero_temperature
+        key = cache_key(self._model, messages, temperature, max_tokens)
+        if cacheable:
+            cached = self._lookup(key)
+            if cached is not None:
+                yield cached.content
+                yield cached
+                return
+            self.stats.misses += 1
+        else:
+            self.stats.bypassed += 1
+
+        async for item in self._inner.chat_stream(messages, temperature=temperature, max_tokens=max_tokens):
+            if cacheable and isinstance(item, ChatMessage):
+                self._store(key, item)
+            yield item
+
+    async def _fetch(
+        self,
+        key: str,
+        messages: Sequence[ChatMessage],
+        temperature: float,
+        max_tokens: int | None,
+    ) -> ChatMessage:
+        reply = await self._inner.chat(messages, temperature=temperature, max_tokens=max_tokens)
+        self._store(key, reply)
+        return reply
+
+    def invalidate(self) -> None:
+        """Drop both tiers."""
+        self._memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM llm_cache")
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _lookup(self, key: str) -> ChatMessage | None:
+        now = self._clock()
+        hit = self._memory.get(key)
+        if hit is not None:
+            expires_at, msg = hit
+            if now < expires_at:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return self._mark(msg, "memory")
+            del self._memory[key]
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT expires_at, message FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now < row[0]:
+                msg = ChatMessage.model_validate_json(row[1])
+                self._remember(key, row[0], msg)
+                self.stats.disk_hits += 1
+                return self._mark(msg, "disk")
+        return None
+
+    def _store(self, key: str, msg: ChatMessage) -> None:
+        expires_at = self._clock() + self._ttl
+        self._remember(key, expires_at, msg)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?)",
+                (key, expires_at, msg.model_dump_json()),
+            )
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (self._clock(),))
+            self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, msg: ChatMessage) -> None:
+        self._memory[key] = (expires_at, msg)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    @staticmethod
+    def _mark(msg: ChatMessage, tier: str) -> ChatMessage:
+        return msg.trusted_replace(metadata={**msg.metadata, "cache": tier})
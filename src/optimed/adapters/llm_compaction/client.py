@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Sequence
+
+from optimed.core.domain import ChatMessage, ChatRole
+from optimed.core.ports import LLMClient
+
+"""
+optimed.adapters.llm_compaction.client
+--------------------------------------
+
+Token budgeting for long chat threads, in front of any LLMClient.
+
+✓ Per-message token estimates, cached by (role, content)
+✓ Under budget → messages pass through untouched
+✓ Over budget → system prompt, messages flagged ``cache_control`` and the
+  most recent turns stay verbatim, everything older is replaced by one
+  summary message
+✓ Hysteresis: compaction goes down to ``low_water`` × the budget, and that
+  summary is reused until the thread crosses the budget again – new turns
+  do not each cost a summarizer call
+✓ Summaries are rolling and cached by conversation prefix, so a
+  re-compaction only summarizes the turns added since the last one
+✓ A request that still does not fit after compaction raises ValueError
+✓ Tokens saved reported per call (reply metadata) and in ``stats``
+"""
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+_SUMMARIZER_PROMPT = (
+    "You condense clinical conversations. Rewrite the transcript below as a "
+    "concise summary that keeps every patient identifier, measurement, lab "
+    "value, medication, decision and open question. Do not add anything."
+)
+
+# Per-message framing overhead (role markers etc.), in tokens
+_MESSAGE_OVERHEAD = 4
+
+# Same flag AnthropicClaudeClient turns into a prompt-cache breakpoint
+_CACHE_CONTROL_KEY = "cache_control"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _pinned(msg: ChatMessage) -> bool:
+    """Cache breakpoints must reach the model byte-for-byte."""
+    return _CACHE_CONTROL_KEY in msg.metadata
+
+
+@dataclass
+class CompactionStats:
+    calls: int = 0
+    compacted_calls: int = 0
+    tokens_before: int = 0       # estimated input tokens as received
+    tokens_sent: int = 0         # … and as forwarded
+    summaries_generated: int = 0
+    summary_cache_hits: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_sent
+
+
+@dataclass(frozen=True)
+class _Compacted:
+    messages: list[ChatMessage]
+    tokens_before: int
+    tokens_sent: int
+
+
+class CompactingLLMClient(LLMClient):
+    """Wraps an LLMClient and keeps each request under *max_input_tokens*."""
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        *,
+        max_input_tokens: int = 8_000,
+        low_water: float = 0.5,
+        keep_recent: int = 6,
+        summarizer: LLMClient | None = None,
+        summary_max_tokens: int = 512,
+        estimator: Callable[[str], int] = estimate_tokens,
+        max_cached: int = 4096,
+    ) -> None:
+        self._inner = inner
+        self._model = getattr(inner, "model", type(inner).__name__)
+        if not 0 < low_water <= 1:
+            raise ValueError("low_water must be in (0, 1]")
+        self._max_input_tokens = max_input_tokens
+        self._low_water_tokens = int(max_input_tokens * low_water)
+        self._keep_recent = keep_recent
+        self._summarizer = summarizer or inner
+        self._summary_max_tokens = summary_max_tokens
+        self._estimator = estimator
+        self._max_cached = max_cached
+        self._token_cache: OrderedDict[tuple[str, str], int] = OrderedDict()
+        # chained prefix hash → summary of the conversation up to that point
+        self._summaries: OrderedDict[str, str] = OrderedDict()
+        self.stats = CompactionStats()
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    async def chat(
+        self,
+        messages: Sequence[ChatMessage],
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+    ) -> ChatMessage:
+        compacted = await self.compact(messages)
+        reply = await self._inner.chat(compacted.messages, temperature=temperature, max_tokens=max_tokens)
+        return self._annotate(reply, compacted)
+
+    async def chat_stream(
+        self,
+        messages: Sequence[ChatMessage],
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+    ) -> AsyncIterator[str | ChatMessage]:
+        compacted = await self.compact(messages)
+        async for item in self._inner.chat_stream(
+            compacted.messages, temperature=temperature, max_tokens=max_tokens
+        ):
+            yield self._annotate(item, compacted) if isinstance(item, ChatMessage) else item
+
+    def count_tokens(self, msg: ChatMessage) -> int:
+        """Estimated tokens of one message (memoised)."""
+        key = (msg.role.value, msg.content)
+        n = self._token_cache.get(key)
+        if n is None:
+            n = self._estimator(msg.content) + _MESSAGE_OVERHEAD
+            self._token_cache[key] = n
+            if len(self._token_cache) > self._max_cached:
+                self._token_cache.popitem(last=False)
+        return n
+
+    async def compact(self, messages: Sequence[ChatMessage]) -> _Compacted:
+        """Return *messages* fitted to the budget (system + pinned + summary + tail).
+
+        Pinned (``cache_control``) messages from the summarized part are
+        moved in front of the summary so the cached prefix stays stable.
+        """
+        msgs = list(messages)
+        before = sum(self.count_tokens(m) for m in msgs)
+        self.stats.calls += 1
+        self.stats.tokens_before += before
+
+        system = [m for m in msgs[:1] if m.role is ChatRole.SYSTEM]
+        turns = msgs[len(system):]
+        if before <= self._max_input_tokens or len(turns) <= self._keep_recent:
+            self.stats.tokens_sent += before
+            return _Compacted(msgs, before, before)
+
+        floor = len(turns) - self._keep_recent     # the last keep_recent turns are never summarized
+        out = self._reuse_summary(system, turns, floor)
+        if out is None:
+            split = self._low_water_split(system, turns, floor)
+            older = turns[:split]
+            out = [*system, *(m for m in older if _pinned(m))]
+            unpinned = [m for m in older if not _pinned(m)]
+            if unpinned:
+                out.append(self._summary_message(await self._summarize(unpinned)))
+            out.extend(turns[split:])
+        sent = sum(self.count_tokens(m) for m in out)
+        if sent > self._max_input_tokens:
+            raise ValueError(
+                f"~{sent} input tokens after compaction, over max_input_tokens={self._max_input_tokens}; "
+                "pinned messages and the last keep_recent turns must fit"
+            )
+
+        self.stats.compacted_calls += 1
+        self.stats.tokens_sent += sent
+        return _Compacted(out, before, sent)
+
+    def _reuse_summary(
+        self, system: list[ChatMessage], turns: list[ChatMessage], floor: int
+    ) -> list[ChatMessage] | None:
+        """Longest cached summary of a prefix, if the request then fits."""
+        unpinned = [(i, m) for i, m in enumerate(turns[:floor]) if not _pinned(m)]
+        keys = self._prefix_keys([m for _, m in unpinned])
+        for (i, _), key in zip(reversed(unpinned), reversed(keys)):
+            summary = self._summaries.get(key)
+            if summary is None:
+                continue
+            split = i + 1
+            out = [
+                *system,
+                *(m for m in turns[:split] if _pinned(m)),
+                self._summary_message(summary),
+                *turns[split:],
+            ]
+            if sum(self.count_tokens(m) for m in out) > self._max_input_tokens:
+                return None          # grown past the budget → compact again
+            self._summaries.move_to_end(key)
+            self.stats.summary_cache_hits += 1
+            return out
+        return None
+
+    def _low_water_split(self, system: list[ChatMessage], turns: list[ChatMessage], floor: int) -> int:
+        """Index of the first verbatim turn once compacted down to the low-water mark."""
+        used = sum(self.count_tokens(m) for m in system)
+        used += sum(self.count_tokens(m) for m in turns[:floor] if _pinned(m))
+        used += sum(self.count_tokens(m) for m in turns[floor:])
+        split = floor
+        while split > 0:
+            m = turns[split - 1]
+            cost = 0 if _pinned(m) else self.count_tokens(m)
+            if used + cost > self._low_water_tokens:
+                break
+            used += cost
+            split -= 1
+        return split
+
+    @staticmethod
+    def _summary_message(summary: str) -> ChatMessage:
+        return ChatMessage(role=ChatRole.USER, content=SUMMARY_PREFIX + summary)
+
+    @staticmethod
+    def _prefix_keys(msgs: list[ChatMessage]) -> list[str]:
+        """Chained hash of every prefix of *msgs*."""
+        keys: list[str] = []
+        h = hashlib.sha256()
+        for m in msgs:
+            h.update(m.role.value.encode())
+            h.update(b"\0")
+            h.update(m.content.encode())
+            h.update(b"\0")
+            keys.append(h.hexdigest())
+        return keys
+
+    async def _summarize(self, older: list[ChatMessage]) -> str:
+        """Rolling summary of *older*, reusing the longest cached prefix."""
+        keys = self._prefix_keys(older)
+
+        start, previous = 0, None
+        for i in range(len(keys) - 1, -1, -1):
+            if keys[i] in self._summaries:
+                start, previous = i + 1, self._summaries[keys[i]]
+                self._summaries.move_to_end(keys[i])
+                break
+        if start == len(older):
+            self.stats.summary_cache_hits += 1
+            assert previous is not None
+            return previous
+
+        transcript = "\n".join(f"{m.role.value.upper()}: {m.content}" for m in older[start:])
+        if previous is not None:
+            transcript = f"{SUMMARY_PREFIX}{previous}\n\nLater turns:\n{transcript}"
+        reply = await self._summarizer.chat(
+            [
+                ChatMessage(role=ChatRole.SYSTEM, content=_SUMMARIZER_PROMPT),
+                ChatMessage(role=ChatRole.USER, content=transcript),
+            ],
+            temperature=0.0,
+            max_tokens=self._summary_max_tokens,
+        )
+        self.stats.summaries_generated += 1
+
+        self._summaries[keys[-1]] = reply.content
+        if len(self._summaries) > self._max_cached:
+            self._summaries.popitem(last=False)
+        return reply.content
+
+    @staticmethod
+    def _annotate(reply: ChatMessage, compacted: _Compacted) -> ChatMessage:
+        return reply.trusted_replace(metadata={
+            **reply.metadata,
+            "compaction_tokens_before": str(compacted.tokens_before),
+            "compaction_tokens_sent": str(compacted.tokens_sent),
+            "compaction_tokens_saved": str(compacted.tokens_before - compacted.tokens_sent),
+        })
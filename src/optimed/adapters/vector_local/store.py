@@ -0,0 +1,565 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Iterable, Literal, Sequence
+
+import numpy as np
+
+from optimed.core.ports import VectorStore
+
+"""
+optimed.adapters.vector_local.store
+-----------------------------------
+
+In-process VectorStore – no pgvector needed for dev, CI and single-node
+deployments.
+
+✓ Embeddings live in one float32 matrix, L2-normalised on write, so cosine
+  similarity is a plain dot product
+✓ Exact top-k via batched matrix multiply + argpartition while small
+✓ Beyond ``ivf_threshold`` vectors an IVF index (spherical k-means) is
+  trained; searches score only the ``nprobe`` closest lists.  The index
+  retrains itself once the store has doubled since the last training
+✓ ``filter_`` is answered from metadata inverted indexes: small matches
+  are scored exactly, large ones restrict the IVF candidates – never
+  top-k-then-filter
+✓ save() writes vectors + IVF arrays as .npy files that open() maps back
+  with np.load(mmap_mode="c"): restarts neither re-read nor retrain
+✓ upsert_many() / similarity_search_many() take 2-D arrays: one
+  normalisation, one matmul (or one centroid probe) per batch
+✓ Optional scalar quantization ("float16", or "int8" with a per-vector
+  scale): candidates are scored on the compact matrix held in RAM, the
+  best ``rerank * top_k`` are re-scored exactly against full-precision
+  rows kept in a file-backed map (an unlinked scratch file, or the saved
+  store after open()) so only those rows are paged in
+✓ Counters via ``stats``
+
+Usage::
+
+    store = LocalVectorStore(dim=384, path="var/guidelines")
+    await store.upsert("g-1", vec, {"source": "nice"})
+    hits = await store.similarity_search(q, top_k=5, filter_={"source": "nice"})
+    store.save()
+    ...
+    store = LocalVectorStore.open("var/guidelines")
+
+    big = LocalVectorStore(dim=384, quantization="int8")       # ~4x less RAM
+    big.add(ids, matrix)                                       # sync, batched
+    results = big.search(queries, top_k=10)
+"""
+
+Quantization = Literal["none", "float16", "int8"]
+
+_VECTORS = "vectors.npy"
+_CENTROIDS = "centroids.npy"
+_ASSIGN = "assign.npy"
+_SCALES = "scales.npy"        # int8: per-row dequantization scale
+_FULL = "full.npy"            # quantized stores: float32 rows for re-ranking
+_ROWS = "rows.json"           # {"ids": [...], "metadata": [{...}, ...]} by row
+_CONFIG = "config.json"
+
+_ASSIGN_CHUNK = 65_536        # rows per k-means assignment matmul
+_SCORE_CELLS = 1 << 25        # max query x row scores materialised at once
+
+
+def _normalise(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    if not np.all(norms > 0):
+        raise ValueError("zero or non-finite embedding")
+    return x / norms
+
+
+def _quantize(x: np.ndarray, mode: Quantization) -> tuple[np.ndarray, np.ndarray | None]:
+    """Compact codes (+ per-row scales for int8) for normalised rows *x*."""
+    if mode == "none":
+        return x, None
+    if mode == "float16":
+        return x.astype(np.float16), None
+    scale = np.abs(x).max(axis=1) / 127.0
+    return np.rint(x / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the *k* best scores per row, best first."""
+    if k >= scores.shape[1]:
+        return np.argsort(-scores, axis=1, kind="stable")
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+@dataclass
+class VectorStoreStats:
+    upserts: int = 0
+    searches: int = 0
+    exact_searches: int = 0
+    ivf_searches: int = 0
+    trainings: int = 0
+    scored: int = 0          # vector x query dot products evaluated
+    reranked: int = 0        # candidates re-scored at full precision
+
+
+class LocalVectorStore(VectorStore):
+    """NumPy-backed VectorStore with exact search, IVF and mmap persistence."""
+
+    def __init__(
+        self,
+        dim: int,
+        *,
+        path: str | None = None,
+        ivf_threshold: int = 50_000,
+        nlist: int | None = None,
+        nprobe: int = 16,
+        exact_filter_max: int = 20_000,
+        quantization: Quantization = "none",
+        rerank: int = 4,
+        seed: int = 0,
+    ) -> None:
+        if quantization not in ("none", "float16", "int8"):
+            raise ValueError(f"unknown quantization {quantization!r}")
+        self.dim = dim
+        self.path = path
+        self._ivf_threshold = ivf_threshold
+        self._nlist = nlist
+        self.nprobe = nprobe
+        self._exact_filter_max = exact_filter_max
+        self.quantization: Quantization = quantization
+        self.rerank = rerank
+        self._rng = np.random.default_rng(seed)
+
+        # _vecs is what searches scan: float32, float16 or int8 codes
+        self._vecs = np.empty((0, dim), dtype=_quantize(np.ones((1, dim), np.float32), quantization)[0].dtype)
+        self._scales: np.ndarray | None = np.empty(0, np.float32) if quantization == "int8" else None
+        # full-precision rows for exact re-ranking (quantized stores only)
+        self._full: np.ndarray | None = None if quantization == "none" else np.empty((0, dim), np.float32)
+        self._n = 0
+        self._ids: list[str] = []
+        self._row_of: dict[str, int] = {}
+        self._meta: list[dict[str, str]] = []
+        self._postings: dict[tuple[str, str], set[int]] = {}
+
+        # IVF: centroids, row → list, CSR of rows per list + rows added since
+        self._centroids: np.ndarray | None = None
+        self._assign = np.empty(0, dtype=np.int32)
+        self._list_rows: list[np.ndarray] = []
+        self._extra: dict[int, list[int]] = {}
+        self._n_extra = 0
+        self._trained_at = 0
+        self.stats = VectorStoreStats()
+
+    # ------------------------------------------------------------------ #
+    # VectorStore port
+    # ------------------------------------------------------------------ #
+    async def upsert(
+        self,
+        embedding_id: str,
+        embedding: Sequence[float],
+        metadata: dict[str, str] | None = None,
+    ) -> None:
+        self.add([embedding_id], np.asarray([embedding]), [metadata])
+
+    async def similarity_search(
+        self,
+        embedding: Sequence[float],
+        top_k: int = 5,
+        filter_: dict[str, str] | None = None,
+    ) -> Sequence[tuple[str, float]]:
+        return self.search(np.asarray([embedding]), top_k, filter_)[0]
+
+    async def upsert_many(
+        self,
+        embedding_ids: Sequence[str],
+        embeddings: np.ndarray | Sequence[Sequence[float]],
+        metadata: Sequence[dict[str, str] | None] | None = None,
+    ) -> None:
+        self.add(embedding_ids, np.asarray(embeddings), metadata)
+
+    async def similarity_search_many(
+        self,
+        embeddings: np.ndarray | Sequence[Sequence[float]],
+        top_k: int = 5,
+        filter_: dict[str, str] | None = None,
+    ) -> Sequence[Sequence[tuple[str, float]]]:
+        return self.search(np.asarray(embeddings), top_k, filter_)
+
+    # ------------------------------------------------------------------ #
+    # Synchronous, batched core
+    # ------------------------------------------------------------------ #
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        metadata: Sequence[dict[str, str] | None] | None = None,
+    ) -> None:
+        """Insert or overwrite ``len(ids)`` rows of *embeddings*."""
+        x = np.asarray(embeddings)
+        if x.ndim != 2 or x.shape != (len(ids), self.dim):
+            raise ValueError(f"expected embeddings of shape ({len(ids)}, {self.dim}), got {x.shape}")
+        metas = metadata if metadata is not None else [None] * len(ids)
+        if len(metas) != len(ids):
+            raise ValueError("metadata must match ids in length")
+        x = _normalise(x)
+
+        rows = np.empty(len(ids), dtype=np.int64)
+        for i, (eid, meta) in enumerate(zip(ids, metas)):
+            row = self._row_of.get(eid)
+            if row is None:
+                row = self._new_row(eid)
+            else:
+                self._unindex_meta(row)
+            self._meta[row] = dict(meta or {})
+            for kv in self._meta[row].items():
+                self._postings.setdefault(kv, set()).add(row)
+            rows[i] = row
+
+        self._ensure_capacity(self._n)
+        codes, scales = _quantize(x, self.quantization)
+        self._vecs[rows] = codes
+        if self._scales is not None:
+            self._scales[rows] = scales
+        if self._full is not None:
+            self._full[rows] = x
+        self.stats.upserts += len(ids)
+
+        if self._centroids is None:
+            if self._n >= self._ivf_threshold:
+                self.train()
+        elif self._n >= 2 * self._trained_at:
+            self.train()
+        else:
+            self._assign_rows(rows, x)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        top_k: int = 5,
+        filter_: dict[str, str] | None = None,
+    ) -> list[list[tuple[str, float]]]:
+        """Top-k (id, cosine similarity) per query row."""
+        q = _normalise(np.atleast_2d(queries))
+        if q.shape[1] != self.dim:
+            raise ValueError(f"expected queries of dimension {self.dim}, got {q.shape[1]}")
+        self.stats.searches += len(q)
+        allowed = self._filter_rows(filter_) if filter_ else None
+        if self._n == 0 or top_k <= 0 or (allowed is not None and not len(allowed)):
+            return [[] for _ in range(len(q))]
+
+        if self._centroids is None or (allowed is not None and len(allowed) <= self._exact_filter_max):
+            return self._search_exact(q, top_k, allowed)
+        return self._search_ivf(q, top_k, allowed)
+
+    def get(self, embedding_id: str) -> tuple[np.ndarray, dict[str, str]] | None:
+        """Stored (normalised) vector and metadata for an ID."""
+        row = self._row_of.get(embedding_id)
+        if row is None:
+            return None
+        return self._exact_rows(slice(row, row + 1))[0].copy(), dict(self._meta[row])
+
+    @property
+    def memory_bytes(self) -> int:
+        """RAM held by the searchable matrix (excludes the file-backed full rows)."""
+        n = self._n
+        return self._vecs[:n].nbytes + (self._scales[:n].nbytes if self._scales is not None else 0)
+
+    def __len__(self) -> int:
+        return self._n
+
+    # ------------------------------------------------------------------ #
+    # IVF
+    # ------------------------------------------------------------------ #
+    def train(self, *, iterations: int = 10, sample: int | None = None) -> None:
+        """(Re)build the IVF index from the current vectors."""
+        n = self._n
+        nlist = min(n, self._nlist or min(4096, max(16, int(2 * math.sqrt(n)))))
+        sample_n = min(n, sample or max(32 * nlist, 20_000))
+        picked = np.sort(self._rng.choice(n, sample_n, replace=False)) if sample_n < n else slice(0, n)
+        train = np.array(self._exact_rows(picked))
+
+        centroids = train[self._rng.choice(len(train), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = self._nearest(train, centroids)
+            order = np.argsort(labels, kind="stable")
+            used, starts = np.unique(labels[order], return_index=True)
+            sums = train[self._rng.choice(len(train), nlist, replace=False)]   # re-seeds empty lists
+            sums[used] = np.add.reduceat(train[order], starts, axis=0)
+            centroids = _normalise(sums)
+
+        self._centroids = centroids
+        self._assign = np.empty(max(len(self._vecs), n), dtype=np.int32)
+        for start in range(0, n, _ASSIGN_CHUNK):
+            block = slice(start, min(n, start + _ASSIGN_CHUNK))
+            self._assign[block] = self._nearest(self._exact_rows(block), centroids)
+        self._rebuild_lists()
+        self._trained_at = n
+        self.stats.trainings += 1
+
+    @staticmethod
+    def _nearest(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        out = np.empty(len(x), dtype=np.int32)
+        for start in range(0, len(x), _ASSIGN_CHUNK):
+            out[start:start + _ASSIGN_CHUNK] = np.argmax(x[start:start + _ASSIGN_CHUNK] @ centroids.T, axis=1)
+        return out
+
+    def _assign_rows(self, rows: np.ndarray, x: np.ndarray) -> None:
+        assert self._centroids is not None
+        labels = self._nearest(x, self._centroids)
+        self._assign[rows] = labels
+        # stale CSR entries of moved rows are dropped at search time
+        for row, label in zip(rows.tolist(), labels.tolist()):
+            self._extra.setdefault(label, []).append(row)
+        self._n_extra += len(rows)
+        if self._n_extra > max(1_000, self._n // 10):
+            self._rebuild_lists()
+
+    def _rebuild_lists(self) -> None:
+        assert self._centroids is not None
+        assign = self._assign[:self._n]
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self._centroids) + 1))
+        self._list_rows = [order[bounds[i]:bounds[i + 1]] for i in range(len(self._centroids))]
+        self._extra.clear()
+        self._n_extra = 0
+
+    def _candidates(self, probe: list[int]) -> np.ndarray:
+        """Rows of the probed lists."""
+        if not self._n_extra:                 # lists freshly rebuilt: no stale rows
+            return np.concatenate([self._list_rows[lst] for lst in probe])
+        parts: list[np.ndarray] = []
+        labels: list[np.ndarray] = []
+        for lst in probe:
+            for rows in (self._list_rows[lst], self._extra.get(lst)):
+                if rows is None or not len(rows):
+                    continue
+                rows = np.asarray(rows)
+                parts.append(rows)
+                labels.append(np.full(len(rows), lst, dtype=np.int32))
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        cand = np.concatenate(parts)
+        # rows re-assigned since the last rebuild are only valid in their new list
+        return cand[self._assign[cand] == np.concatenate(labels)]
+
+    # ------------------------------------------------------------------ #
+    # Search paths
+    # ------------------------------------------------------------------ #
+    def _search_exact(self, q: np.ndarray, k: int, allowed: np.ndarray | None) -> list[list[tuple[str, float]]]:
+        self.stats.exact_searches += len(q)
+        n_rows = self._n if allowed is None else len(allowed)
+        keep = k if self._full is None else k * self.rerank
+        self.stats.scored += len(q) * n_rows
+        out: list[list[tuple[str, float]]] = []
+        step = max(1, _SCORE_CELLS // max(1, n_rows))
+        for start in range(0, len(q), step):
+            qb = q[start:start + step]
+            scores = np.empty((len(qb), n_rows), dtype=np.float32)
+            # row blocks bound the float32 copy of quantized codes
+            for lo in range(0, n_rows, _ASSIGN_CHUNK):
+                hi = min(n_rows, lo + _ASSIGN_CHUNK)
+                scores[:, lo:hi] = self._scores(qb, slice(lo, hi) if allowed is None else allowed[lo:hi])
+            best = _top_k(scores, keep)
+            for r, cols in enumerate(best):
+                rows = cols if allowed is None else allowed[cols]
+                out.append(self._finish(qb[r], rows, scores[r, cols], k))
+        return out
+
+    def _search_ivf(self, q: np.ndarray, k: int, allowed: np.ndarray | None) -> list[list[tuple[str, float]]]:
+        assert self._centroids is not None
+        self.stats.ivf_searches += len(q)
+        mask: np.ndarray | None = None
+        if allowed is not None:
+            mask = np.zeros(self._n, dtype=bool)
+            mask[allowed] = True
+        keep = k if self._full is None else k * self.rerank
+        nprobe = min(self.nprobe, len(self._centroids))
+        # one matmul probes the centroids for the whole batch
+        probes = np.argpartition(-(q @ self._centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        out: list[list[tuple[str, float]]] = []
+        for vec, probe in zip(q, probes.tolist()):
+            cand = self._candidates(probe)
+            if mask is not None:
+                cand = cand[mask[cand]]
+            if not len(cand):
+                out.append([])
+                continue
+            scores = self._scores(vec[None, :], cand)[0]
+            self.stats.scored += len(cand)
+            best = _top_k(scores[None, :], keep)[0]
+            out.append(self._finish(vec, cand[best], scores[best], k))
+        return out
+
+    def _scores(self, q: np.ndarray, rows: np.ndarray | slice) -> np.ndarray:
+        """Similarity of *q* to stored *rows*, computed on the (quantized) matrix."""
+        block = self._vecs[rows]
+        scores = q @ (block if block.dtype == np.float32 else block.astype(np.float32)).T
+        if self._scales is not None:
+            scores *= self._scales[rows]
+        return scores
+
+    def _finish(self, q: np.ndarray, rows: np.ndarray, scores: np.ndarray, k: int) -> list[tuple[str, float]]:
+        """Top-k hits; quantized stores re-score the candidates exactly first."""
+        if self._full is None:
+            return self._hits(rows[:k], scores[:k])
+        exact = self._full[rows] @ q
+        self.stats.reranked += len(rows)
+        best = _top_k(exact[None, :], k)[0]
+        return self._hits(rows[best], exact[best])
+
+    def _exact_rows(self, rows: np.ndarray | slice) -> np.ndarray:
+        """Full-precision float32 rows."""
+        return self._vecs[rows] if self._full is None else self._full[rows]
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> list[tuple[str, float]]:
+        ids = self._ids
+        return [(ids[r], s) for r, s in zip(rows.tolist(), scores.tolist())]
+
+    # ------------------------------------------------------------------ #
+    # Metadata index
+    # ------------------------------------------------------------------ #
+    def _filter_rows(self, filter_: dict[str, str]) -> np.ndarray:
+        """Sorted rows whose metadata matches every (key, value) in *filter_*."""
+        sets: list[set[int]] = []
+        for kv in filter_.items():
+            rows = self._postings.get(kv)
+            if not rows:
+                return np.empty(0, dtype=np.int64)
+            sets.append(rows)
+        sets.sort(key=len)                      # intersect smallest first
+        match = sets[0].intersection(*sets[1:])
+        return np.sort(np.fromiter(match, dtype=np.int64, count=len(match)))
+
+    def _unindex_meta(self, row: int) -> None:
+        for kv in self._meta[row].items():
+            rows = self._postings.get(kv)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._postings[kv]
+
+    def _new_row(self, embedding_id: str) -> int:
+        row = self._n
+        self._n += 1
+        self._ids.append(embedding_id)
+        self._meta.append({})
+        self._row_of[embedding_id] = row
+        return row
+
+    def _ensure_capacity(self, n: int) -> None:
+        if n <= len(self._vecs):
+            return
+        cap = max(n, 2 * len(self._vecs), 1024)
+        old = len(self._vecs)
+        grown = np.empty((cap, self.dim), dtype=self._vecs.dtype)
+        grown[:old] = self._vecs
+        self._vecs = grown
+        if self._scales is not None:
+            scales = np.empty(cap, dtype=np.float32)
+            scales[:old] = self._scales
+            self._scales = scales
+        if self._full is not None:
+            full = self._scratch(cap)
+            for lo in range(0, old, _ASSIGN_CHUNK):
+                hi = min(old, lo + _ASSIGN_CHUNK)
+                full[lo:hi] = self._full[lo:hi]
+            self._full = full
+        if self._centroids is not None:
+            assign = np.empty(cap, dtype=np.int32)
+            assign[:len(self._assign)] = self._assign
+            self._assign = assign
+
+    def _scratch(self, rows: int) -> np.ndarray:
+        """float32 (rows, dim) map on an unlinked temp file – page cache, not heap."""
+        fh = tempfile.TemporaryFile(dir=self.path if self.path and os.path.isdir(self.path) else None)
+        fh.truncate(rows * self.dim * 4)
+        return np.memmap(fh, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    # ------------------------------------------------------------------ #
+    # Persistence
+    # ------------------------------------------------------------------ #
+    def save(self, path: str | None = None) -> None:
+        """Write the store to *path* (default: the constructor's path)."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("no path to save to")
+        os.makedirs(path, exist_ok=True)
+        n = self._n
+        arrays = {
+            _VECTORS: self._vecs[:n],
+            _SCALES: None if self._scales is None else self._scales[:n],
+            _FULL: None if self._full is None else self._full[:n],
+            _CENTROIDS: self._centroids,
+            _ASSIGN: None if self._centroids is None else self._assign[:n],
+        }
+        for name, array in arrays.items():
+            if array is not None:
+                self._write_npy(path, name, array)
+            elif os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+        self._write_text(path, _ROWS, [json.dumps({"ids": self._ids, "metadata": self._meta})])
+        self._write_text(path, _CONFIG, [json.dumps({
+            "dim": self.dim,
+            "ivf_threshold": self._ivf_threshold,
+            "nlist": self._nlist,
+            "nprobe": self.nprobe,
+            "exact_filter_max": self._exact_filter_max,
+            "quantization": self.quantization,
+            "rerank": self.rerank,
+            "trained_at": self._trained_at,
+        })])
+        self.path = path
+
+    @classmethod
+    def open(cls, path: str) -> LocalVectorStore:
+        """Load a saved store; vectors and IVF arrays are memory-mapped."""
+        with open(os.path.join(path, _CONFIG)) as fh:
+            config = json.load(fh)
+        trained_at = config.pop("trained_at")
+        store = cls(path=path, **config)
+
+        # copy-on-write maps: pages load lazily, writes never touch the files
+        store._vecs = np.load(os.path.join(path, _VECTORS), mmap_mode="c")
+        if store._scales is not None:
+            store._scales = np.load(os.path.join(path, _SCALES), mmap_mode="c")
+        if store._full is not None:
+            store._full = np.load(os.path.join(path, _FULL), mmap_mode="c")
+        with open(os.path.join(path, _ROWS)) as fh:
+            rows = json.load(fh)
+        store._ids = rows["ids"]
+        store._meta = rows["metadata"]
+        store._row_of = {eid: row for row, eid in enumerate(store._ids)}
+        for row, meta in enumerate(store._meta):
+            for kv in meta.items():
+                store._postings.setdefault(kv, set()).add(row)
+        store._n = len(store._ids)
+        if os.path.exists(os.path.join(path, _CENTROIDS)):
+            store._centroids = np.load(os.path.join(path, _CENTROIDS))
+            store._assign = np.load(os.path.join(path, _ASSIGN), mmap_mode="c")
+            store._trained_at = trained_at
+            store._rebuild_lists()
+        return store
+
+    @staticmethod
+    def _write_npy(path: str, name: str, array: np.ndarray) -> None:
+        # write + rename: a store opened from these files keeps its old maps
+        tmp = os.path.join(path, name + ".tmp")
+        if not array.size:
+            np.save(tmp, array)
+            os.replace(tmp + ".npy", os.path.join(path, name))
+            return
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=array.dtype, shape=array.shape)
+        for lo in range(0, len(array), _ASSIGN_CHUNK):        # streamed, no full copy
+            out[lo:lo + _ASSIGN_CHUNK] = array[lo:lo + _ASSIGN_CHUNK]
+        out.flush()
+        del out
+        os.replace(tmp, os.path.join(path, name))
+
+    @staticmethod
+    def _write_text(path: str, name: str, lines: Iterable[str]) -> None:
+        tmp = os.path.join(path, name + ".tmp")
+        with open(tmp, "w") as fh:
+            fh.writelines(lines)
+        os.replace(tmp, os.path.join(path, name))
@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Iterable, Mapping, Sequence
+
+import numpy as np
+
+from optimed.adapters.fhir_hapi.repository import VITAL_CODES
+from optimed.core.domain import EventType, InfoEvent, PatientContext, normalize_quantity
+from optimed.core.ports import FHIRRepository
+
+"""
+optimed.adapters.vitals_store.store
+-----------------------------------
+
+In-process time series of vital signs, per patient and LOINC code.
+
+✓ Fixed-size NumPy ring buffers – O(1) append, bounded memory
+✓ Every sample is written twice (slot i and i + capacity), so the last
+  ``capacity`` samples are always one contiguous, sorted slice and range
+  queries are a ``searchsorted`` + view, never a copy of the ring
+✓ A second ring of min/max/sum/count rollups (default 1 min) reaches far
+  further back than the raw samples
+✓ range(), downsample() and a census-wide snapshot() for dashboards
+✓ Fed by VITAL_READING InfoEvents and by PatientContexts from any
+  FHIRRepository (VitalsRecordingRepository); repeated or older
+  readings are ignored
+✓ Append / drop counters via ``stats``
+
+Usage::
+
+    store = VitalsStore()
+    repo = VitalsRecordingRepository(HAPIFHIRRepository(), store)
+    await repo.get_patient("123")
+    hr = store.range("123", "8867-4", since=time.time() - 6 * 3600)
+
+VITAL_READING payloads are one reading or ``{"readings": [...]}``, each
+``{"code": "8867-4", "value": 72, "unit": "/min", "observed_at": "<ISO>"}``
+(``observed_at`` defaults to the event's ``created_at``).
+"""
+
+
+def _epoch(ts: datetime | float | None, default: float) -> float:
+    if ts is None:
+        return default
+    if isinstance(ts, datetime):
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        return ts.timestamp()
+    return float(ts)
+
+
+class _Ring:
+    """Append-only ring of parallel float64 columns, double-written."""
+
+    __slots__ = ("capacity", "end", "cols")
+
+    def __init__(self, capacity: int, ncols: int) -> None:
+        self.capacity = capacity
+        self.end = 0                                # rows ever appended
+        self.cols = np.empty((ncols, 2 * capacity), dtype=np.float64)
+
+    def __len__(self) -> int:
+        return min(self.end, self.capacity)
+
+    def append(self, row: tuple[float, ...]) -> None:
+        i = self.end % self.capacity
+        self.cols[:, i] = row
+        self.cols[:, i + self.capacity] = row
+        self.end += 1
+
+    def view(self) -> np.ndarray:
+        """Chronological (ncols, n) view of the retained rows."""
+        n = len(self)
+        lo = (self.end - n) % self.capacity
+        return self.cols[:, lo:lo + n]
+
+
+# rollup columns
+_T, _MIN, _MAX, _SUM, _CNT = range(5)
+
+
+class _Series:
+    """Raw (time, value) ring + ring of closed rollup buckets + the open one."""
+
+    __slots__ = ("raw", "rollup", "width", "last_t", "last_v", "open")
+
+    def __init__(self, raw_capacity: int, rollup_capacity: int, width: float) -> None:
+        self.raw = _Ring(raw_capacity, 2)
+        self.rollup = _Ring(rollup_capacity, 5)
+        self.width = width
+        self.last_t = -np.inf
+        self.last_v = np.nan
+        # open bucket [start, min, max, sum, count] as Python floats – the hot
+        # path never touches NumPy scalars; written to the ring once it closes
+        self.open: list[float] = [np.nan, 0.0, 0.0, 0.0, 0.0]
+
+    def append(self, t: float, v: float) -> bool:
+        if t <= self.last_t:
+            return False
+        raw = self.raw
+        i = raw.end % raw.capacity
+        c = raw.cols
+        c[0, i] = c[0, i + raw.capacity] = t
+        c[1, i] = c[1, i + raw.capacity] = v
+        raw.end += 1
+        self.last_t, self.last_v = t, v
+
+        start = t - t % self.width
+        b = self.open
+        if b[_T] == start:
+            if v < b[_MIN]:
+                b[_MIN] = v
+            elif v > b[_MAX]:
+                b[_MAX] = v
+            b[_SUM] += v
+            b[_CNT] += 1
+        else:
+            if b[_CNT]:
+                self.rollup.append(tuple(b))
+            self.open = [start, v, v, v, 1.0]
+        return True
+
+    def rollups(self) -> np.ndarray:
+        """(5, n) rollup columns including the still-open bucket."""
+        closed = self.rollup.view()
+        if not self.open[_CNT]:
+            return closed
+        return np.concatenate([closed, np.array(self.open)[:, None]], axis=1)
+
+    def raw_covers(self, since: float) -> bool:
+        """Are all samples at or after *since* still in the raw ring?"""
+        raw = self.raw
+        return raw.end <= raw.capacity or since >= raw.view()[0, 0]
+
+
+@dataclass(frozen=True)
+class VitalRange:
+    times: np.ndarray        # epoch seconds
+    values: np.ndarray
+
+
+@dataclass(frozen=True)
+class VitalBuckets:
+    times: np.ndarray        # bucket start, epoch seconds
+    min: np.ndarray
+    max: np.ndarray
+    mean: np.ndarray
+    count: np.ndarray
+
+
+@dataclass(frozen=True)
+class VitalSummary:
+    last: float
+    last_at: float
+    min: float
+    max: float
+    mean: float
+    count: int
+
+
+@dataclass
+class VitalsStoreStats:
+    appended: int = 0
+    duplicates: int = 0      # at or before the series' newest sample
+    ignored: int = 0         # not a monitored vital code / undated / unparseable
+    series: int = 0
+
+
+class VitalsStore:
+    """Per-(patient, LOINC code) ring buffers with rollups and range queries."""
+
+    def __init__(
+        self,
+        *,
+        codes: Mapping[str, str] = VITAL_CODES,
+        raw_capacity: int = 4096,
+        rollup_seconds: float = 60.0,
+        rollup_capacity: int = 1440,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.codes = dict(codes)
+        self._raw_capacity = raw_capacity
+        self._rollup_seconds = rollup_seconds
+        self._rollup_capacity = rollup_capacity
+        self._clock = clock
+        self._series: dict[tuple[str, str], _Series] = {}
+        # code → patient_id → series, for census-wide snapshots
+        self._by_code: dict[str, dict[str, _Series]] = {}
+        self.stats = VitalsStoreStats()
+
+    # ------------------------------------------------------------------ #
+    # Ingest
+    # ------------------------------------------------------------------ #
+    def append(self, patient_id: str, code: str, value: float, ts: datetime | float | None = None) -> bool:
+        """Add one reading; False if ignored (unknown code or not newer)."""
+        if code not in self.codes:
+            self.stats.ignored += 1
+            return False
+        series = self._series.get((patient_id, code))
+        if series is None:
+            series = self._series[(patient_id, code)] = _Series(
+                self._raw_capacity, self._rollup_capacity, self._rollup_seconds,
+            )
+            self._by_code.setdefault(code, {})[patient_id] = series
+            self.stats.series += 1
+        if series.append(_epoch(ts, self._clock()), float(value)):
+            self.stats.appended += 1
+            return True
+        self.stats.duplicates += 1
+        return False
+
+    def ingest(self, ctx: PatientContext) -> int:
+        """Record the vital-sign observations of a PatientContext.
+
+        Undated observations are skipped (counted as ignored): stamping them
+        "now" would make every genuinely dated reading look stale.
+        """
+        added = 0
+        for m in ctx.observations:                  # oldest first
+            if m.code not in self.codes:
+                continue
+            if m.observed_at is None:
+                self.stats.ignored += 1
+                continue
+            added += self.append(ctx.patient_id, m.code, m.value, m.observed_at)
+        return added
+
+    def ingest_event(self, event: InfoEvent) -> int:
+        """Record the reading(s) carried by a VITAL_READING InfoEvent."""
+        if event.type is not EventType.VITAL_READING or event.patient_id is None:
+            return 0
+        try:
+            payload = json.loads(event.payload_json)
+            readings = payload.get("readings", [payload])
+        except (ValueError, AttributeError):
+            self.stats.ignored += 1
+            return 0
+        added = 0
+        for r in readings:
+            try:
+                code = str(r["code"])
+                value, _ = normalize_quantity(code, float(r["value"]), r.get("unit"))
+                ts = datetime.fromisoformat(r["observed_at"]) if r.get("observed_at") else event.created_at
+            except (KeyError, TypeError, ValueError):
+                self.stats.ignored += 1
+                continue
+            added += self.append(event.patient_id, code, value, ts)
+        return added
+
+    # ------------------------------------------------------------------ #
+    # Queries
+    # ------------------------------------------------------------------ #
+    def latest(self, patient_id: str, code: str) -> tuple[float, float] | None:
+        """(epoch seconds, value) of the newest reading."""
+        series = self._series.get((patient_id, code))
+        if series is None or not series.raw.end:
+            return None
+        return series.last_t, series.last_v
+
+    def range(
+        self,
+        patient_id: str,
+        code: str,
+        since: datetime | float,
+        until: datetime | float | None = None,
+    ) -> VitalRange:
+        """Raw readings in [since, until) still held in the raw ring."""
+        series = self._series.get((patient_id, code))
+        if series is None:
+            return VitalRange(np.empty(0), np.empty(0))
+        t, v = series.raw.view()
+        lo, hi = self._bounds(t, since, until)
+        return VitalRange(t[lo:hi], v[lo:hi])
+
+    def downsample(
+        self,
+        patient_id: str,
+        code: str,
+        since: datetime | float,
+        until: datetime | float | None = None,
+        *,
+        bucket_seconds: float,
+    ) -> VitalBuckets:
+        """min/max/mean/count per *bucket_seconds* over [since, until).
+
+        Served from raw samples while they reach back to *since*, otherwise
+        from the rollup ring (then *bucket_seconds* must be a multiple of
+        ``rollup_seconds``).
+        """
+        series = self._series.get((patient_id, code))
+        if series is None:
+            return self._buckets(np.empty(0), np.empty(0), np.empty(0), np.empty(0), np.empty(0), bucket_seconds)
+        start = _epoch(since, 0.0)
+        if series.raw_covers(start):
+            t, v = series.raw.view()
+            lo, hi = self._bounds(t, since, until)
+            t, v = t[lo:hi], v[lo:hi]
+            return self._buckets(t, v, v, v, np.ones_like(v), bucket_seconds)
+        if bucket_seconds % self._rollup_seconds:
+            raise ValueError(
+                f"bucket_seconds must be a multiple of {self._rollup_seconds:g} beyond the raw window"
+            )
+        cols = series.rollups()
+        lo, hi = self._bounds(cols[_T], start - start % self._rollup_seconds, until)
+        c = cols[:, lo:hi]
+        return self._buckets(c[_T], c[_MIN], c[_MAX], c[_SUM], c[_CNT], bucket_seconds)
+
+    def snapshot(
+        self,
+        code: str,
+        since: datetime | float,
+        patient_ids: Iterable[str] | None = None,
+    ) -> dict[str, VitalSummary]:
+        """Latest value and window statistics per patient (dashboard refresh)."""
+        start = _epoch(since, 0.0)
+        rollup_start = start - start % self._rollup_seconds
+        by_patient = self._by_code.get(code, {})
+        pids = by_patient.keys() if patient_ids is None else patient_ids
+        # gather every window, then reduce all of them in one reduceat per stat
+        found: list[tuple[str, _Series]] = []
+        mins: list[np.ndarray] = []
+        maxs: list[np.ndarray] = []
+        sums: list[np.ndarray] = []
+        counts: list[float] = []
+        for pid in pids:
+            series = by_patient.get(pid)
+            if series is None or series.last_t < start:
+                continue
+            raw = series.raw.view()
+            if series.raw.end <= series.raw.capacity or start >= raw[0, 0]:
+                w = raw[1, int(raw[0].searchsorted(start)):]
+                mins.append(w)
+                maxs.append(w)
+                sums.append(w)
+                counts.append(len(w))
+            else:
+                cols = series.rollups()
+                c = cols[:, int(cols[_T].searchsorted(rollup_start)):]
+                mins.append(c[_MIN])
+                maxs.append(c[_MAX])
+                sums.append(c[_SUM])
+                counts.append(c[_CNT].sum())
+            found.append((pid, series))
+        if not found:
+            return {}
+
+        starts = np.cumsum([0] + [len(w) for w in mins[:-1]])
+        mn = np.minimum.reduceat(np.concatenate(mins), starts).tolist()
+        mx = np.maximum.reduceat(np.concatenate(maxs), starts).tolist()
+        total = np.add.reduceat(np.concatenate(sums), starts).tolist()
+        out: dict[str, VitalSummary] = {}
+        for i, (pid, series) in enumerate(found):
+            out[pid] = VitalSummary(
+                last=series.last_v, last_at=series.last_t,
+                min=mn[i], max=mx[i], mean=total[i] / counts[i], count=int(counts[i]),
+            )
+        return out
+
+    def patients(self) -> list[str]:
+        return sorted({pid for pid, _ in self._series})
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    @staticmethod
+    def _bounds(t: np.ndarray, since: datetime | float, until: datetime | float | None) -> tuple[int, int]:
+        lo = int(np.searchsorted(t, _epoch(since, 0.0), side="left"))
+        hi = len(t) if until is None else int(np.searchsorted(t, _epoch(until, 0.0), side="left"))
+        return lo, hi
+
+    @staticmethod
+    def _buckets(
+        t: np.ndarray,
+        mn: np.ndarray,
+        mx: np.ndarray,
+        total: np.ndarray,
+        count: np.ndarray,
+        width: float,
+    ) -> VitalBuckets:
+        if not len(t):
+            empty = np.empty(0)
+            return VitalBuckets(empty, empty, empty, empty, empty.astype(np.int64))
+        keys = np.floor(t / width)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        n = np.add.reduceat(count, starts)
+        return VitalBuckets(
+            times=keys[starts] * width,
+            min=np.minimum.reduceat(mn, starts),
+            max=np.maximum.reduceat(mx, starts),
+            mean=np.add.reduceat(total, starts) / n,
+            count=n.astype(np.int64),
+        )
+
+
+class VitalsRecordingRepository(FHIRRepository):
+    """FHIRRepository decorator that feeds every loaded patient into a VitalsStore."""
+
+    def __init__(self, inner: FHIRRepository, store: VitalsStore) -> None:
+        self._inner = inner
+        self.store = store
+
+    async def get_patient(self, patient_id: str) -> PatientContext:
+        ctx = await self._inner.get_patient(patient_id)
+        self.store.ingest(ctx)
+        return ctx
+
+    async def get_patients(self, patient_ids: Sequence[str]) -> Sequence[PatientContext]:
+        ctxs = await self._inner.get_patients(patient_ids)
+        for ctx in ctxs:
+            self.store.ingest(ctx)
+        return ctxs
+
+    async def search_patients(self, query: str) -> Sequence[PatientContext]:
+        return await self._inner.search_patients(query)
+
+    async def iter_patients(self, query: str, *, page_size: int = 50) -> AsyncIterator[PatientContext]:
+        async for ctx in self._inner.iter_patients(query, page_size=page_size):
+            self.store.ingest(ctx)
+            yield ctx
@@ -2,6 +2,9 @@ from .clinical import PatientContext, BedState, Encounter
 from .diagnosis import DiagnosisResult
 from .info import InfoEvent, Notification, CommThread, ChatMessage
 from .kpi import KPIEvent, Alert
+from .kpi_batch import KPIEventBatch
+from .observation import Measurement, normalize_quantity
+from .lab_rules import LabThreshold, CriticalLabHit, LabRuleEngine, DEFAULT_CRITICAL_LABS
 from .enums import (
     BedStatus,
     EncounterStatus,
@@ -24,6 +27,12 @@ __all__ = [
     "PatientContext",
     "Encounter",
     "BedState",
+    "Measurement",
+    "normalize_quantity",
+    "LabThreshold",
+    "CriticalLabHit",
+    "LabRuleEngine",
+    "DEFAULT_CRITICAL_LABS",
     # info
     "InfoEvent",
     "Notification",
@@ -31,6 +40,7 @@ __all__ = [
     "ChatMessage",
     # kpi
     "KPIEvent",
+    "KPIEventBatch",
     "Alert",
     # enums
     "BedStatus",
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import Field
 
 from .enums import BedStatus, EncounterStatus
+from .lab_rules import DEFAULT_LAB_RULES, CriticalLabHit, LabRuleEngine
 from .mixins import FrozenModel
+from .observation import Measurement
 
 """Domain models for clinical data in the hospital system."""
 
@@ -19,24 +21,33 @@ class PatientContext(FrozenModel):
     care_unit: str
     vitals: Dict[str, str] = {}
     labs: Dict[str, str] = {}
+    # typed vitals + labs, canonical units, oldest first (several per code)
+    observations: Tuple[Measurement, ...] = ()
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-    def has_critical_lab(self) -> bool:
-        """Returns True if any lab value breaches critical threshold.
+    def readings(self, code: str) -> List[Measurement]:
+        """All observations for a LOINC code, oldest first."""
+        return [m for m in self.observations if m.code == code]
 
-        In MVP we hard‑code potassium > 6.0 mmol/L as example.
-        Later versions will pull thresholds from hospital config.
-        """
-        k = self.labs.get("K⁺") or self.labs.get("K+", None)
-        return k is not None and float(k) >= 6.0
-    
-    def critical_lab_msgs(self) -> List[str]:
+    def latest(self, code: str) -> Optional[Measurement]:
+        """Most recent observation for a LOINC code, if any."""
+        for m in reversed(self.observations):
+            if m.code == code:
+                return m
+        return None
+
+    def critical_labs(self, rules: Optional[LabRuleEngine] = None) -> List[CriticalLabHit]:
+        """Structured critical-lab hits (default: DEFAULT_CRITICAL_LABS)."""
+        return (rules or DEFAULT_LAB_RULES).evaluate(self)
+
+    def has_critical_lab(self, rules: Optional[LabRuleEngine] = None) -> bool:
+        """Returns True if any lab value breaches a critical threshold."""
+        return bool(self.critical_labs(rules))
+
+    def critical_lab_msgs(self, rules: Optional[LabRuleEngine] = None) -> List[str]:
         """Returns list of critical lab messages."""
-        msgs: List[str] = []
-        if self.has_critical_lab():
-            msgs.append(f"Potassium critical: {self.labs.get('K⁺') or self.labs.get('K+')}")
-        return msgs
-    
+        return [hit.message() for hit in self.critical_labs(rules)]
+
 
 class BedState(FrozenModel):
     bed_id: str
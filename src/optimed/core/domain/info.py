@@ -30,7 +30,7 @@ class Notification(FrozenModel):
 
     def acknowledge(self, ts: Optional[datetime] = None) -> "Notification":
         """Acknowledge notification delivery."""
-        return self.model_copy(update={"status": NotificationStatus.ACK, "ack_at": ts or datetime.now(timezone.utc)})
+        return self.trusted_replace(status=NotificationStatus.ACK, ack_at=ts or datetime.now(timezone.utc))
 
 
 class CommThread(FrozenModel):
@@ -42,7 +42,7 @@ class CommThread(FrozenModel):
 
     def add_notification(self, n: Notification) -> "CommThread":
         """Add a notification to the thread."""
-        return self.model_copy(update={"notifications": self.notifications + [n]})
+        return self.trusted_replace(notifications=self.notifications + [n])
     
     def is_closed(self) -> bool:
         """Check if thread is closed."""
@@ -32,4 +32,4 @@ class Alert(FrozenModel):
     }
 
     def escalate(self) -> "Alert":
-        return self.model_copy(update={"severity": self._ladder[self.severity]})
\ No newline at end of file
+        return self.trusted_replace(severity=self._ladder[self.severity])
\ No newline at end of file
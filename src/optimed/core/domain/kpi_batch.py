@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Literal, Sequence
+
+import numpy as np
+
+from .kpi import KPIEvent
+
+"""Columnar container for large KPIEvent streams.
+
+One NumPy array per field instead of one Pydantic object per event:
+metric / unit / source strings are interned into small vocabularies and
+stored as int32 codes, values as float64 and timestamps as int64
+nanoseconds since the Unix epoch (UTC).  Arrays are read-only, so a batch
+is as immutable as the frozen models it replaces.
+"""
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NO_SOURCE = -1
+
+GroupKey = Literal["metric", "source", "metric_source"]
+
+
+def _epoch_ns(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    delta = ts - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1_000
+
+
+def _frozen(a: np.ndarray) -> np.ndarray:
+    a.flags.writeable = False
+    return a
+
+
+class KPIEventBatch:
+    """Immutable, array-backed sequence of KPIEvents."""
+
+    __slots__ = ("metrics", "units", "sources", "metric_codes", "unit_codes", "source_codes",
+                 "values", "recorded_at_ns")
+
+    def __init__(
+        self,
+        *,
+        metrics: Sequence[str],
+        units: Sequence[str],
+        sources: Sequence[str],
+        metric_codes: np.ndarray,
+        unit_codes: np.ndarray,
+        source_codes: np.ndarray,
+        values: np.ndarray,
+        recorded_at_ns: np.ndarray,
+    ) -> None:
+        n = len(values)
+        if not (len(metric_codes) == len(unit_codes) == len(source_codes) == len(recorded_at_ns) == n):
+            raise ValueError("KPIEventBatch columns must have equal length")
+        self.metrics = tuple(metrics)
+        self.units = tuple(units)
+        self.sources = tuple(sources)     # source_codes == -1 → None
+        self.metric_codes = _frozen(np.asarray(metric_codes, dtype=np.int32))
+        self.unit_codes = _frozen(np.asarray(unit_codes, dtype=np.int32))
+        self.source_codes = _frozen(np.asarray(source_codes, dtype=np.int32))
+        self.values = _frozen(np.asarray(values, dtype=np.float64))
+        self.recorded_at_ns = _frozen(np.asarray(recorded_at_ns, dtype=np.int64))
+
+    # ------------------------------------------------------------------ #
+    # Conversion
+    # ------------------------------------------------------------------ #
+    @classmethod
+    def from_events(cls, events: Iterable[KPIEvent]) -> KPIEventBatch:
+        metric_ix: dict[str, int] = {}
+        unit_ix: dict[str, int] = {}
+        source_ix: dict[str, int] = {}
+        m_codes: list[int] = []
+        u_codes: list[int] = []
+        s_codes: list[int] = []
+        values: list[float] = []
+        stamps: list[int] = []
+        for e in events:
+            m_codes.append(metric_ix.setdefault(e.metric, len(metric_ix)))
+            u_codes.append(unit_ix.setdefault(e.unit, len(unit_ix)))
+            s_codes.append(
+                _NO_SOURCE if e.metric_source is None
+                else source_ix.setdefault(e.metric_source, len(source_ix))
+            )
+            values.append(e.value)
+            stamps.append(_epoch_ns(e.recorded_at))
+        return cls(
+            metrics=list(metric_ix), units=list(unit_ix), sources=list(source_ix),
+            metric_codes=np.array(m_codes, dtype=np.int32),
+            unit_codes=np.array(u_codes, dtype=np.int32),
+            source_codes=np.array(s_codes, dtype=np.int32),
+            values=np.array(values, dtype=np.float64),
+            recorded_at_ns=np.array(stamps, dtype=np.int64),
+        )
+
+    @classmethod
+    def concat(cls, batches: Sequence[KPIEventBatch]) -> KPIEventBatch:
+        """One batch from several, re-coding the vocabularies."""
+        if not batches:
+            return cls.from_events([])
+        metrics: dict[str, int] = {}
+        units: dict[str, int] = {}
+        sources: dict[str, int] = {}
+
+        def _remap(vocab: tuple[str, ...], into: dict[str, int], codes: np.ndarray) -> np.ndarray:
+            # trailing entry maps code -1 ("no source") to itself
+            table = np.array([into.setdefault(v, len(into)) for v in vocab] + [_NO_SOURCE], dtype=np.int32)
+            return table[codes]
+
+        metric_codes = np.concatenate([_remap(b.metrics, metrics, b.metric_codes) for b in batches])
+        unit_codes = np.concatenate([_remap(b.units, units, b.unit_codes) for b in batches])
+        source_codes = np.concatenate([_remap(b.sources, sources, b.source_codes) for b in batches])
+        return cls(
+            metrics=list(metrics), units=list(units), sources=list(sources),
+            metric_codes=metric_codes,
+            unit_codes=unit_codes,
+            source_codes=source_codes,
+            values=np.concatenate([b.values for b in batches]),
+            recorded_at_ns=np.concatenate([b.recorded_at_ns for b in batches]),
+        )
+
+    def to_events(self) -> list[KPIEvent]:
+        stamps = (self.recorded_at_ns // 1_000).astype("datetime64[us]").tolist()
+        return [
+            KPIEvent(
+                metric=self.metrics[m],
+                value=v,
+                unit=self.units[u],
+                recorded_at=ts.replace(tzinfo=timezone.utc),
+                metric_source=None if s == _NO_SOURCE else self.sources[s],
+            )
+            for m, u, s, v, ts in zip(
+                self.metric_codes.tolist(), self.unit_codes.tolist(), self.source_codes.tolist(),
+                self.values.tolist(), stamps,
+            )
+        ]
+
+    def metric_strings(self) -> np.ndarray:
+        """Decoded metric names as an object array (for bulk writers)."""
+        return np.asarray(self.metrics, dtype=object)[self.metric_codes] if len(self) else np.empty(0, object)
+
+    def unit_strings(self) -> np.ndarray:
+        return np.asarray(self.units, dtype=object)[self.unit_codes] if len(self) else np.empty(0, object)
+
+    def source_strings(self) -> np.ndarray:
+        table = np.asarray([*self.sources, None], dtype=object)
+        return table[self.source_codes]
+
+    # ------------------------------------------------------------------ #
+    # Vectorized queries
+    # ------------------------------------------------------------------ #
+    def take(self, index: np.ndarray | slice) -> KPIEventBatch:
+        """Rows selected by a boolean mask or integer index (shares vocabularies)."""
+        return KPIEventBatch(
+            metrics=self.metrics, units=self.units, sources=self.sources,
+            metric_codes=self.metric_codes[index],
+            unit_codes=self.unit_codes[index],
+            source_codes=self.source_codes[index],
+            values=self.values[index],
+            recorded_at_ns=self.recorded_at_ns[index],
+        )
+
+    def mask(
+        self,
+        *,
+        metric: str | None = None,
+        source: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        min_value: float | None = None,
+        max_value: float | None = None,
+    ) -> np.ndarray:
+        """Boolean row mask for the given conditions (all must hold)."""
+        keep = np.ones(len(self), dtype=bool)
+        if metric is not None:
+            keep &= self.metric_codes == self._code(self.metrics, metric)
+        if source is not None:
+            keep &= self.source_codes == self._code(self.sources, source)
+        if since is not None:
+            keep &= self.recorded_at_ns >= _epoch_ns(since)
+        if until is not None:
+            keep &= self.recorded_at_ns < _epoch_ns(until)
+        if min_value is not None:
+            keep &= self.values >= min_value
+        if max_value is not None:
+            keep &= self.values <= max_value
+        return keep
+
+    def filter(self, **conditions) -> KPIEventBatch:
+        """Rows matching :meth:`mask` conditions."""
+        return self.take(self.mask(**conditions))
+
+    def group_by(self, by: GroupKey = "metric") -> dict[str | tuple[str, str | None] | None, KPIEventBatch]:
+        """Split into one batch per metric, source or (metric, source)."""
+        if by == "metric":
+            codes = self.metric_codes.astype(np.int64)
+        elif by == "source":
+            codes = self.source_codes.astype(np.int64)
+        else:
+            codes = self.metric_codes.astype(np.int64) * (len(self.sources) + 1) + (self.source_codes + 1)
+        order = np.argsort(codes, kind="stable")
+        uniq, starts = np.unique(codes[order], return_index=True)
+        bounds = [*starts.tolist(), len(order)]
+
+        groups: dict[str | tuple[str, str | None] | None, KPIEventBatch] = {}
+        for i, code in enumerate(uniq.tolist()):
+            key: str | tuple[str, str | None] | None
+            if by == "metric":
+                key = self.metrics[code]
+            elif by == "source":
+                key = None if code == _NO_SOURCE else self.sources[code]
+            else:
+                m, s = divmod(code, len(self.sources) + 1)
+                key = (self.metrics[m], None if s == 0 else self.sources[s - 1])
+            groups[key] = self.take(order[bounds[i]:bounds[i + 1]])
+        return groups
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, f).nbytes for f in (
+            "metric_codes", "unit_codes", "source_codes", "values", "recorded_at_ns"))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[KPIEvent]:
+        return iter(self.to_events())
+
+    @staticmethod
+    def _code(vocab: tuple[str, ...], value: str) -> int:
+        try:
+            return vocab.index(value)
+        except ValueError:
+            return -2          # matches nothing (not even "no source")
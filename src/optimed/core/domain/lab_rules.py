@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, Literal, Optional, Sequence
+
+import numpy as np
+
+from .mixins import FrozenModel
+
+if TYPE_CHECKING:
+    from .clinical import PatientContext
+
+"""Critical-lab thresholds and a vectorized evaluator.
+
+A threshold table keyed by LOINC code is compiled once into NumPy arrays
+(low/high limit per rule).  Evaluating one patient or a whole census is
+then a single pass that gathers (patient, rule, value) triples followed by
+two vector comparisons – no per-rule Python branching.
+"""
+
+
+class LabThreshold(FrozenModel):
+    code: str                       # LOINC
+    name: str
+    unit: str                       # UCUM unit the limits are expressed in
+    low: Optional[float] = None     # critical if value <= low
+    high: Optional[float] = None    # critical if value >= high
+    aliases: tuple[str, ...] = ()   # legacy lab keys, e.g. "K+"
+
+
+class CriticalLabHit(FrozenModel):
+    patient_id: str
+    code: str
+    name: str
+    value: float
+    unit: str
+    limit: float
+    direction: Literal["low", "high"]
+
+    def message(self) -> str:
+        return f"{self.name} critical ({self.direction}): {self.value:g} {self.unit}".rstrip()
+
+
+# Adult critical values, common hospital defaults – override per site
+DEFAULT_CRITICAL_LABS: tuple[LabThreshold, ...] = (
+    LabThreshold(code="2823-3", name="Potassium", unit="mmol/L", low=2.5, high=6.0, aliases=("K⁺", "K+")),
+    LabThreshold(code="2339-0", name="Glucose", unit="mmol/L", low=2.2, high=25.0),
+)
+
+_VALUE_RE = re.compile(r"^\s*([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)\s*(.*?)\s*$")
+
+
+@lru_cache(maxsize=8192)
+def parse_lab_value(text: str) -> tuple[float, str] | None:
+    """``"6.2 mmol/L"`` → ``(6.2, "mmol/L")``; None if not numeric."""
+    m = _VALUE_RE.match(text)
+    if m is None:
+        return None
+    unit = m.group(2)
+    return float(m.group(1)), "" if unit == "None" else unit
+
+
+class LabRuleEngine:
+    """Compiled threshold table; evaluate one PatientContext or thousands."""
+
+    def __init__(self, thresholds: Iterable[LabThreshold] = DEFAULT_CRITICAL_LABS) -> None:
+        self.thresholds = tuple(thresholds)
+        self._rule_of: dict[str, int] = {}
+        for i, t in enumerate(self.thresholds):
+            for key in (t.code, *t.aliases):
+                if key in self._rule_of:
+                    raise ValueError(f"lab key {key!r} mapped by more than one threshold")
+                self._rule_of[key] = i
+        self._low = np.array([-np.inf if t.low is None else t.low for t in self.thresholds], dtype=np.float64)
+        self._high = np.array([np.inf if t.high is None else t.high for t in self.thresholds], dtype=np.float64)
+
+    def rule_index(self, key: str) -> int | None:
+        """Rule for a LOINC code or alias (None if not monitored)."""
+        return self._rule_of.get(key)
+
+    def collect(self, patients: Sequence[PatientContext]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Flatten monitored labs into (patient_ix, rule_ix, value) columns.
+
+        The latest typed observation per rule is used; the ``labs`` strings
+        only fill in rules without one.  Readings whose unit differs from
+        the threshold unit are skipped; a bare lab number is taken to be in
+        the threshold unit.
+        """
+        pats: list[int] = []
+        rules: list[int] = []
+        values: list[float] = []
+        rule_of, thresholds = self._rule_of, self.thresholds
+        for p, ctx in enumerate(patients):
+            latest: dict[int, float] = {}
+            for m in ctx.observations:            # oldest first → last wins
+                r = rule_of.get(m.code)
+                if r is not None and m.unit == thresholds[r].unit:
+                    latest[r] = m.value
+            for key, text in ctx.labs.items():
+                r = rule_of.get(key)
+                if r is None or r in latest:
+                    continue
+                parsed = parse_lab_value(text)
+                if parsed is None or (parsed[1] and parsed[1] != thresholds[r].unit):
+                    continue
+                latest[r] = parsed[0]
+            for r, value in latest.items():
+                pats.append(p)
+                rules.append(r)
+                values.append(value)
+        return (
+            np.array(pats, dtype=np.intp),
+            np.array(rules, dtype=np.intp),
+            np.array(values, dtype=np.float64),
+        )
+
+    def breaches(self, rule_ix: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Boolean (low, high) masks over already-collected columns."""
+        return values <= self._low[rule_ix], values >= self._high[rule_ix]
+
+    def evaluate_many(self, patients: Sequence[PatientContext]) -> list[CriticalLabHit]:
+        """Every critical reading across *patients*, in patient order."""
+        pats, rules, values = self.collect(patients)
+        low, high = self.breaches(rules, values)
+        hits: list[CriticalLabHit] = []
+        for i in np.flatnonzero(low | high).tolist():
+            t = self.thresholds[rules[i]]
+            is_high = bool(high[i])
+            hits.append(CriticalLabHit(
+                patient_id=patients[pats[i]].patient_id,
+                code=t.code,
+                name=t.name,
+                value=float(values[i]),
+                unit=t.unit,
+                limit=t.high if is_high else t.low,
+                direction="high" if is_high else "low",
+            ))
+        return hits
+
+    def evaluate(self, patient: PatientContext) -> list[CriticalLabHit]:
+        return self.evaluate_many([patient])
+
+    def screen(self, patients: Sequence[PatientContext]) -> np.ndarray:
+        """Boolean array: does patient *i* have at least one critical lab?"""
+        pats, rules, values = self.collect(patients)
+        low, high = self.breaches(rules, values)
+        flags = np.zeros(len(patients), dtype=bool)
+        flags[pats[low | high]] = True
+        return flags
+
+
+DEFAULT_LAB_RULES = LabRuleEngine()
@@ -1,8 +1,107 @@
+from __future__ import annotations
+
+import copy
+import functools
+from typing import Any, Callable, NamedTuple
 
 from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+from typing_extensions import Self
+
+"""Shared Pydantic base class with frozen + no-extra config.
+
+Besides normal (validating) construction, FrozenModel offers a *trusted*
+path for adapter-internal code that builds entities from data that has
+already been validated upstream (typed FHIR resources, SDK responses,
+NumPy columns):
+
+* ``Model.trusted(**fields)``   – no validation, defaults applied
+* ``obj.trusted_replace(**kw)`` – copy with changed fields, no validation
+
+Both still reject unknown field names (``extra=forbid``) and return
+frozen instances; they skip type checks and coercion, so never feed them
+raw user or network input.
+"""
+
+
+class _Plan(NamedTuple):
+    names: frozenset[str]
+    # every field in declaration order; static defaults filled in, others _MISSING
+    template: dict[str, Any]
+    # fields needing per-instance work when not supplied
+    factories: tuple[tuple[str, Callable[[], Any]], ...]
+    required: tuple[str, ...]
+    private: dict[str, Any] | None
 
-"""Shared Pydantic base class with frozen + no-extra config."""
+
+_MISSING: Any = object()
+_set = object.__setattr__
+_PLANS: dict[type, _Plan] = {}
+
+
+def _plan(cls: type[FrozenModel]) -> _Plan:
+    plan = _PLANS.get(cls)
+    if plan is None:
+        template: dict[str, Any] = {}
+        factories: list[tuple[str, Callable[[], Any]]] = []
+        required: list[str] = []
+        for name, info in cls.model_fields.items():
+            template[name] = _MISSING
+            if info.default_factory is not None:
+                factories.append((name, info.default_factory))  # type: ignore[arg-type]
+            elif info.default is PydanticUndefined:
+                required.append(name)
+            elif isinstance(info.default, (dict, list, set)):
+                factories.append((name, functools.partial(copy.copy, info.default)))
+            else:
+                template[name] = info.default
+        private = {
+            name: attr.get_default()
+            for name, attr in cls.__private_attributes__.items()
+        } or None
+        plan = _PLANS[cls] = _Plan(
+            frozenset(cls.model_fields), template, tuple(factories), tuple(required), private,
+        )
+    return plan
 
 
 class FrozenModel(BaseModel):
-    model_config = {"frozen": True, "extra": "forbid"}
\ No newline at end of file
+    model_config = {"frozen": True, "extra": "forbid"}
+
+    @classmethod
+    def trusted(cls, **values: Any) -> Self:
+        """Build without validation from already-validated *values*."""
+        plan = _PLANS.get(cls) or _plan(cls)
+        if not values.keys() <= plan.names:
+            unknown = sorted(values.keys() - plan.names)
+            raise TypeError(f"{cls.__name__}: unexpected field(s) {unknown}")
+
+        data = plan.template.copy()        # keeps declaration order
+        data.update(values)
+        for name, factory in plan.factories:
+            if name not in values:
+                data[name] = factory()
+        for name in plan.required:
+            if name not in values:
+                raise TypeError(f"{cls.__name__}: missing required field {name!r}")
+        return cls._from_trusted(data, set(values), plan.private)
+
+    def trusted_replace(self, **changes: Any) -> Self:
+        """Copy with *changes* applied, without validation (cf. model_copy)."""
+        plan = _PLANS.get(type(self)) or _plan(type(self))
+        if not changes.keys() <= plan.names:
+            unknown = sorted(changes.keys() - plan.names)
+            raise TypeError(f"{type(self).__name__}: unexpected field(s) {unknown}")
+        data = {**self.__dict__, **changes}
+        return self._from_trusted(
+            data, self.__pydantic_fields_set__ | changes.keys(), self.__pydantic_private__,
+        )
+
+    @classmethod
+    def _from_trusted(cls, data: dict[str, Any], fields_set: set[str], private: dict[str, Any] | None) -> Self:
+        obj = object.__new__(cls)
+        _set(obj, "__dict__", data)
+        _set(obj, "__pydantic_fields_set__", fields_set)
+        _set(obj, "__pydantic_extra__", None)
+        _set(obj, "__pydantic_private__", private.copy() if private else None)
+        return obj
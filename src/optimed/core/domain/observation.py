@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from .mixins import FrozenModel
+
+"""Typed numeric observations and ingest-time unit normalization.
+
+Vitals and labs arrive as FHIR Quantities in whatever unit the sending
+system prefers.  ``normalize_quantity`` maps them once, at ingest, onto
+one canonical UCUM unit per LOINC code so rules and trend code compare
+plain floats.
+"""
+
+LOINC_SYSTEM = "http://loinc.org"
+
+# Spelling variants → UCUM code (applies to every LOINC code)
+UNIT_SYNONYMS: dict[str, str] = {
+    "mmol/l": "mmol/L",
+    "mg/dl": "mg/dL",
+    "meq/l": "meq/L",
+    "bpm": "/min",
+    "beats/min": "/min",
+    "beats/minute": "/min",
+    "breaths/min": "/min",
+    "mmhg": "mm[Hg]",
+    "°c": "Cel",
+    "degc": "Cel",
+    "°f": "[degF]",
+    "degf": "[degF]",
+}
+
+# (LOINC code, UCUM unit) → (scale, offset, canonical unit):
+#   canonical = value * scale + offset
+UNIT_CONVERSIONS: dict[tuple[str, str], tuple[float, float, str]] = {
+    ("2339-0", "mg/dL"): (1 / 18.016, 0.0, "mmol/L"),        # glucose
+    ("2345-7", "mg/dL"): (1 / 18.016, 0.0, "mmol/L"),        # glucose (serum/plasma)
+    ("2823-3", "meq/L"): (1.0, 0.0, "mmol/L"),               # potassium, monovalent
+    ("2951-2", "meq/L"): (1.0, 0.0, "mmol/L"),               # sodium, monovalent
+    ("8310-5", "[degF]"): (5 / 9, -32 * 5 / 9, "Cel"),       # body temperature
+}
+
+_EARLIEST = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def canonical_unit(unit: str | None) -> str:
+    """UCUM spelling of *unit* ("" if missing)."""
+    if not unit:
+        return ""
+    return UNIT_SYNONYMS.get(unit.strip().lower(), unit.strip())
+
+
+def normalize_quantity(code: str, value: float, unit: str | None) -> tuple[float, str]:
+    """Convert *value* to the canonical unit for LOINC *code*."""
+    ucum = canonical_unit(unit)
+    conv = UNIT_CONVERSIONS.get((code, ucum))
+    if conv is None:
+        return value, ucum
+    scale, offset, target = conv
+    return value * scale + offset, target
+
+
+class Measurement(FrozenModel):
+    """One numeric Observation, already in its canonical unit."""
+
+    code: str
+    value: float
+    unit: str
+    observed_at: Optional[datetime] = None
+    system: str = LOINC_SYSTEM
+
+
+def chronological(measurements: Iterable[Measurement]) -> tuple[Measurement, ...]:
+    """Oldest first; undated readings sort before dated ones."""
+    return tuple(sorted(measurements, key=lambda m: m.observed_at or _EARLIEST))
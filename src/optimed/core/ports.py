@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from abc import abstractmethod
-from typing import Protocol, Sequence
+from typing import AsyncIterator, Protocol, Sequence, runtime_checkable
 
-from optimed.core.domain import PatientContext, KPIEvent, ChatMessage, DiagnosisResult
+import numpy as np
+
+from optimed.core.domain import PatientContext, KPIEvent, KPIEventBatch, ChatMessage, DiagnosisResult
 
 # core/ports.py
 #
@@ -19,11 +21,50 @@ class FHIRRepository(Protocol):
         """Get patient context by ID."""
         ...
 
+    @abstractmethod
+    async def get_patients(self, patient_ids: Sequence[str]) -> Sequence[PatientContext]:
+        """Get many patient contexts at once, in the order of *patient_ids*.
+
+        Unknown IDs are skipped rather than raising.
+        """
+        ...
+
     @abstractmethod
     async def search_patients(self, query: str) -> Sequence[PatientContext]:
         """Simple convenience search"""
         ...
 
+    @abstractmethod
+    def iter_patients(self, query: str, *, page_size: int = 50) -> AsyncIterator[PatientContext]:
+        """Stream every search match page by page; stop iterating to stop fetching."""
+        ...
+
+
+@runtime_checkable
+class ConditionalFHIRRepository(FHIRRepository, Protocol):
+    """FHIRRepository that can revalidate a patient against a known version."""
+
+    @abstractmethod
+    async def get_patient_if_changed(
+        self,
+        patient_id: str,
+        version: str | None = None,
+    ) -> tuple[PatientContext | None, str | None]:
+        """Return ``(None, version)`` if unchanged, else ``(context, new_version)``.
+
+        *version* is opaque to callers: pass back whatever a previous call
+        (or ``get_patients_versioned``) returned.
+        """
+        ...
+
+    @abstractmethod
+    async def get_patients_versioned(
+        self,
+        patient_ids: Sequence[str],
+    ) -> Sequence[tuple[PatientContext, str | None]]:
+        """``get_patients`` with each context paired with its current version."""
+        ...
+
 
 class KPIEventSink(Protocol):
 
@@ -31,6 +72,11 @@ class KPIEventSink(Protocol):
     async def record(self, event: KPIEvent) -> None:
         """Record a KPI event."""
         ...
+
+    @abstractmethod
+    async def record_batch(self, batch: KPIEventBatch) -> None:
+        """Record many KPI events at once, in columnar form."""
+        ...
     
     @abstractmethod
     async def flush(self) -> None:
@@ -50,6 +96,16 @@ class LLMClient(Protocol):
         """Send a chat message sequence to the LLM and get a response."""
         ...
 
+    @abstractmethod
+    def chat_stream(
+        self,
+        messages: Sequence[ChatMessage],
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+    ) -> AsyncIterator[str | ChatMessage]:
+        """Yield text deltas as they arrive, then the final ChatMessage."""
+        ...
+
 class VectorStore(Protocol):
 
     """pgvector / Pinecone / FAISS – whatever backs similarity search."""
@@ -74,6 +130,41 @@ class VectorStore(Protocol):
         """Find top-k most similar embeddings."""
         ...
 
+    @abstractmethod
+    async def upsert_many(
+        self,
+        embedding_ids: Sequence[str],
+        embeddings: np.ndarray | Sequence[Sequence[float]],
+        metadata: Sequence[dict[str, str] | None] | None = None,
+    ) -> None:
+        """Upsert one row of *embeddings* (2-D) per ID in a single call."""
+        ...
+
+    @abstractmethod
+    async def similarity_search_many(
+        self,
+        embeddings: np.ndarray | Sequence[Sequence[float]],
+        top_k: int = 5,
+        filter_: dict[str, str] | None = None,
+    ) -> Sequence[Sequence[tuple[str, float]]]:
+        """Top-k most similar embeddings for each query row, in query order."""
+        ...
+
+
+class EmbeddingProvider(Protocol):
+    """Text → fixed-width vectors for VectorStore (notes, guideline chunks, patients)."""
+
+    @property
+    @abstractmethod
+    def dim(self) -> int:
+        """Width of every embedding row."""
+        ...
+
+    @abstractmethod
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """One float32 row per text, in input order – shape (len(texts), dim)."""
+        ...
+
 
 class DiagnosticEngine(Protocol):
     """Pure-domain service used by LangGraph; orchestrates everything."""
@@ -1,6 +1,7 @@
 # tests/conftest.py
 import json
 import pathlib
+import httpx
 import pytest
 
 FIXTURES = pathlib.Path(__file__).parent / "fixtures"
@@ -10,10 +11,18 @@ def load_fixture(name: str) -> dict:
 
 class FakeResp:
     """Mimics httpx.Response enough for our adapter."""
-    def __init__(self, payload):
+    def __init__(self, payload, status_code: int = 200, headers: dict | None = None):
         self._payload = payload
-    def raise_for_status(self): ...
+        self.status_code = status_code
+        self.headers = headers or {}
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            request = httpx.Request("GET", "https://stub")
+            response = httpx.Response(self.status_code, request=request)
+            raise httpx.HTTPStatusError("stub error", request=request, response=response)
     def json(self): return self._payload
+    @property
+    def content(self) -> bytes: return json.dumps(self._payload).encode()
 
 @pytest.fixture
 def _load_fixture():
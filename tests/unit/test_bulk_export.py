@@ -0,0 +1,100 @@
+# tests/unit/test_bulk_export.py
+import json
+
+import httpx
+import pytest
+
+from optimed.adapters.fhir_hapi.bulk_export import BulkExportLoader
+
+
+def _obs(pid: str, code: str, value: float, when: str, category: str = "vital-signs") -> dict:
+    return {
+        "resourceType": "Observation",
+        "status": "final",
+        "category": [{"coding": [{"code": category}]}],
+        "subject": {"reference": f"Patient/{pid}"},
+        "code": {"coding": [{"system": "http://loinc.org", "code": code}]},
+        "valueQuantity": {"value": value, "unit": "/min"},
+        "effectiveDateTime": when,
+    }
+
+
+def _stub_server(patient_json: dict, observations: list[dict] | None = None):
+    """Local stand-in for a Bulk Data server serving NDJSON files."""
+    polls = {"n": 0}
+    patients = [{**patient_json, "id": f"p{i}"} for i in range(3)]
+    observations = observations or [
+        _obs("p0", "8867-4", 60, "2024-01-01T08:00:00Z"),
+        _obs("p0", "8867-4", 88, "2024-01-01T09:00:00Z"),
+        _obs("p2", "2823-3", 6.4, "2024-01-01T09:00:00Z", category="laboratory"),
+    ]
+    files = {
+        "/files/Patient.ndjson": "\n".join(json.dumps(p) for p in patients) + "\n",
+        "/files/Observation.ndjson": "\n".join(json.dumps(o) for o in observations) + "\n",
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/Patient/$export"):
+            assert request.headers["Prefer"] == "respond-async"
+            return httpx.Response(202, headers={"Content-Location": "https://stub/status/1"})
+        if path == "/status/1":
+            polls["n"] += 1
+            if polls["n"] < 2:
+                return httpx.Response(202, headers={"Retry-After": "0"})
+            return httpx.Response(200, json={
+                "transactionTime": "2024-01-02T00:00:00Z",
+                "output": [
+                    {"type": "Patient", "url": "https://stub/files/Patient.ndjson"},
+                    {"type": "Observation", "url": "https://stub/files/Observation.ndjson"},
+                ],
+            })
+        if path in files:
+            return httpx.Response(200, text=files[path])
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler), polls
+
+
+@pytest.mark.asyncio
+async def test_bulk_export_streams_joined_patients(_load_fixture, tmp_path):
+    transport, polls = _stub_server(_load_fixture("patient_example.json"))
+    client = httpx.AsyncClient(base_url="https://stub", transport=transport)
+
+    async with BulkExportLoader(client=client, index_dir=str(tmp_path)) as loader:
+        results = {p.patient_id: p async for p in loader.iter_patients()}
+
+    assert polls["n"] == 2
+    assert sorted(results) == ["p0", "p1", "p2"]
+    assert results["p0"].vitals == {"8867-4": "88 /min"}     # newest reading wins
+    assert results["p1"].vitals == {} and results["p1"].labs == {}
+    assert results["p2"].labs == {"2823-3": "6.4 /min"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_export_orders_mixed_offsets_in_utc(_load_fixture, tmp_path):
+    """10:30+02:00 is 08:30Z – older than 09:00Z despite sorting later as text."""
+    transport, _ = _stub_server(_load_fixture("patient_example.json"), [
+        _obs("p0", "8867-4", 60, "2024-01-01T10:30:00+02:00"),
+        _obs("p0", "8867-4", 88, "2024-01-01T09:00:00Z"),
+        _obs("p0", "8867-4", 70, "2024-01"),                  # partial date: oldest
+    ])
+    client = httpx.AsyncClient(base_url="https://stub", transport=transport)
+
+    async with BulkExportLoader(client=client, index_dir=str(tmp_path)) as loader:
+        results = {p.patient_id: p async for p in loader.iter_patients()}
+
+    assert results["p0"].vitals == {"8867-4": "88 /min"}
+    assert [m.value for m in results["p0"].observations] == [70, 60, 88]
+
+
+@pytest.mark.asyncio
+async def test_bulk_export_reruns_with_same_index_dir_do_not_duplicate(_load_fixture, tmp_path):
+    for _ in range(2):
+        transport, _ = _stub_server(_load_fixture("patient_example.json"))
+        client = httpx.AsyncClient(base_url="https://stub", transport=transport)
+        async with BulkExportLoader(client=client, index_dir=str(tmp_path)) as loader:
+            results = {p.patient_id: p async for p in loader.iter_patients()}
+
+    assert [m.value for m in results["p0"].observations] == [60, 88]
+    assert list(tmp_path.iterdir()) == []          # per-run index removed
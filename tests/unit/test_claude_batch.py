@@ -0,0 +1,227 @@
+# tests/unit/test_claude_batch.py
+import asyncio
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from optimed.adapters.anthropic_claude.client import AnthropicClaudeClient
+from optimed.core.domain import ChatMessage, ChatRole
+
+
+def _message(text: str) -> dict:
+    return {
+        "id": f"msg_{abs(hash(text)) % 1000}", "type": "message", "role": "assistant",
+        "model": "stub", "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn", "stop_sequence": None,
+        "usage": {"input_tokens": 10, "output_tokens": 2},
+    }
+
+
+def _batch(base: str, status: str, batch_id: str = "msgbatch_1") -> dict:
+    return {
+        "id": batch_id, "type": "message_batch", "processing_status": status,
+        "request_counts": {"processing": 0, "succeeded": 2, "errored": 1, "canceled": 0, "expired": 0},
+        "created_at": "2024-01-01T00:00:00Z", "expires_at": "2024-01-02T00:00:00Z",
+        "ended_at": None if status != "ended" else "2024-01-01T01:00:00Z",
+        "cancel_initiated_at": None, "archived_at": None,
+        "results_url": f"{base}/results/{batch_id}" if status == "ended" else None,
+    }
+
+
+class _StubAnthropic(BaseHTTPRequestHandler):
+    """Message Batches + Messages endpoints, enough for chat_batch()."""
+    protocol_version = "HTTP/1.1"
+    batches_enabled = True
+    ends_after = 2          # polls before the batch reports "ended"
+    submitted: list[dict] = []
+    events: list[str] = []
+    polls = 0
+    singles = 0
+    cancelled = 0
+
+    def _send(self, status: int, body: bytes, ctype: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        cls = type(self)
+        base = f"http://{self.headers['Host']}"
+        if self.path == "/v1/messages/batches":
+            if not cls.batches_enabled:
+                return self._send(404, json.dumps({"type": "error", "error": {"type": "not_found_error", "message": "no"}}).encode())
+            cls.submitted.append(body)
+            batch_id = f"msgbatch_{len(cls.submitted)}"
+            cls.events.append("create " + batch_id)
+            return self._send(200, json.dumps(_batch(base, "in_progress", batch_id)).encode())
+        m = re.fullmatch(r"/v1/messages/batches/(msgbatch_\d+)/cancel", self.path)
+        if m:
+            cls.cancelled += 1
+            return self._send(200, json.dumps(_batch(base, "canceling", m[1])).encode())
+        if self.path == "/v1/messages":
+            cls.singles += 1
+            return self._send(200, json.dumps(_message("single: " + body["messages"][-1]["content"])).encode())
+        self._send(404, b"{}")
+
+    def do_GET(self):
+        cls = type(self)
+        base = f"http://{self.headers['Host']}"
+        m = re.fullmatch(r"/v1/messages/batches/(msgbatch_(\d+))", self.path)
+        if m:
+            cls.polls += 1
+            cls.events.append("poll " + m[1])
+            status = "ended" if cls.polls >= cls.ends_after else "in_progress"
+            return self._send(200, json.dumps(_batch(base, status, m[1])).encode())
+        m = re.fullmatch(r"/results/msgbatch_(\d+)", self.path)
+        if m:
+            lines = []
+            for req in cls.submitted[int(m[1]) - 1]["requests"]:
+                cid = req["custom_id"]
+                if cid == "bad":
+                    result = {"type": "errored", "error": {"type": "error", "error": {"type": "invalid_request_error", "message": "too long"}}}
+                else:
+                    result = {"type": "succeeded", "message": _message("batched: " + req["params"]["messages"][-1]["content"])}
+                lines.append(json.dumps({"custom_id": cid, "result": result}))
+            return self._send(200, ("\n".join(lines) + "\n").encode(), "application/binary")
+        self._send(404, b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    _StubAnthropic.batches_enabled, _StubAnthropic.ends_after = True, 2
+    _StubAnthropic.submitted, _StubAnthropic.polls, _StubAnthropic.singles = [], 0, 0
+    _StubAnthropic.cancelled, _StubAnthropic.events = 0, []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubAnthropic)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+REQUESTS = [
+    ("p1", [ChatMessage(role=ChatRole.USER, content="summarise p1")]),
+    ("p2", [ChatMessage(role=ChatRole.USER, content="summarise p2")]),
+    ("bad", [ChatMessage(role=ChatRole.USER, content="x" * 10)]),
+]
+
+
+@pytest.mark.asyncio
+async def test_chat_batch_submits_polls_and_streams_results(stub_server):
+    llm = AnthropicClaudeClient(api_key="dummy", base_url=stub_server)
+    results = {r.custom_id: r async for r in llm.chat_batch(REQUESTS, poll_interval=0)}
+
+    assert len(_StubAnthropic.submitted) == 1 and _StubAnthropic.polls >= 2
+    assert _StubAnthropic.singles == 0
+    assert results["p1"].message.content == "batched: summarise p1"
+    assert results["p2"].ok
+    assert not results["bad"].ok and results["bad"].error == "too long"
+
+
+@pytest.mark.asyncio
+async def test_chat_batch_falls_back_to_bounded_fan_out(stub_server):
+    _StubAnthropic.batches_enabled = False
+    llm = AnthropicClaudeClient(api_key="dummy", base_url=stub_server)
+    results = {r.custom_id: r async for r in llm.chat_batch(REQUESTS, fallback_concurrency=2)}
+
+    assert _StubAnthropic.singles == 3
+    assert results["p2"].message.content == "single: summarise p2"
+
+
+@pytest.mark.asyncio
+async def test_chat_batch_cancels_batch_after_max_wait(stub_server):
+    _StubAnthropic.ends_after = 10**6
+    llm = AnthropicClaudeClient(api_key="dummy", base_url=stub_server)
+
+    with pytest.raises(TimeoutError):
+        async for _ in llm.chat_batch(REQUESTS, poll_interval=0.01, max_wait=0.05):
+            pass
+    assert _StubAnthropic.cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_batch_cancels_batch_when_consumer_goes_away(stub_server):
+    _StubAnthropic.ends_after = 10**6
+    llm = AnthropicClaudeClient(api_key="dummy", base_url=stub_server)
+    results = llm.chat_batch(REQUESTS, poll_interval=0.01)
+
+    task = asyncio.ensure_future(anext(results))
+    while _StubAnthropic.polls < 1:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert _StubAnthropic.cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_batch_does_not_cancel_ended_batch(stub_server):
+    llm = AnthropicClaudeClient(api_key="dummy", base_url=stub_server)
+    results = llm.chat_batch(REQUESTS, poll_interval=0)
+
+    assert (await anext(results)).custom_id == "p1"
+    await results.aclose()
+    assert _StubAnthropic.cancelled == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_batch_submits_every_chunk_before_polling(stub_server):
+    llm = AnthropicClaudeClient(api_key="dummy", base_url=stub_server)
+    results = {r.custom_id: r async for r in llm.chat_batch(REQUESTS, poll_interval=0, max_batch_size=1)}
+
+    creates = [i for i, e in enumerate(_StubAnthropic.events) if e.startswith("create")]
+    polls = [i for i, e in enumerate(_StubAnthropic.events) if e.startswith("poll")]
+    assert len(creates) == 3 and max(creates) < min(polls)
+    assert results["p2"].message.content == "batched: summarise p2"
+    assert results["bad"].error == "too long"
+
+
+def _slow_chat(started: list[str], cancelled: list[str]):
+    async def _chat(messages, temperature=0.7, max_tokens=None):
+        text = messages[-1].content
+        started.append(text)
+        if text != "summarise p1":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(text)
+                raise
+        return ChatMessage(role=ChatRole.ASSISTANT, content="single: " + text)
+    return _chat
+
+
+@pytest.mark.asyncio
+async def test_fan_out_cancels_outstanding_calls_when_consumer_stops(stub_server, monkeypatch):
+    _StubAnthropic.batches_enabled = False
+    llm = AnthropicClaudeClient(api_key="dummy", base_url=stub_server)
+    started: list[str] = []
+    cancelled: list[str] = []
+    monkeypatch.setattr(llm, "chat", _slow_chat(started, cancelled))
+
+    results = llm.chat_batch(REQUESTS, fallback_concurrency=3)
+    assert (await anext(results)).custom_id == "p1"
+    await results.aclose()
+
+    assert sorted(cancelled) == sorted(started[1:]) and len(cancelled) == 2
+
+
+@pytest.mark.asyncio
+async def test_fan_out_honours_max_wait(stub_server, monkeypatch):
+    _StubAnthropic.batches_enabled = False
+    llm = AnthropicClaudeClient(api_key="dummy", base_url=stub_server)
+    cancelled: list[str] = []
+    monkeypatch.setattr(llm, "chat", _slow_chat([], cancelled))
+
+    seen = []
+    with pytest.raises(TimeoutError):
+        async for result in llm.chat_batch(REQUESTS, fallback_concurrency=3, max_wait=0.05):
+            seen.append(result.custom_id)
+    assert seen == ["p1"] and len(cancelled) == 2
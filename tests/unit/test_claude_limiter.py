@@ -0,0 +1,168 @@
+# tests/unit/test_claude_limiter.py
+import asyncio
+
+import anthropic
+import httpx
+import pytest
+
+from optimed.core.domain import ChatMessage, ChatRole
+from optimed.adapters.anthropic_claude.client import AnthropicClaudeClient
+from optimed.adapters.anthropic_claude.limiter import Priority, RateLimiter, llm_priority
+
+
+def _resp(text: str = "ok"):
+    class _Resp:
+        id = "lim123"
+        usage = type("U", (), {"input_tokens": 10, "output_tokens": 4})
+        content = [type("B", (), {"type": "text", "text": text})]
+
+    return _Resp()
+
+
+def _raw(text: str = "ok", headers: dict | None = None):
+    """Stand-in for the SDK's with_raw_response result."""
+    class _Raw:
+        def __init__(self):
+            self.headers = httpx.Headers(headers or {})
+
+        async def parse(self):
+            return _resp(text)
+
+    return _Raw()
+
+
+def _error(status: int, headers: dict | None = None) -> anthropic.APIStatusError:
+    response = httpx.Response(
+        status, headers=headers or {},
+        request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"),
+    )
+    cls = anthropic.RateLimitError if status == 429 else anthropic.APIStatusError
+    return cls("error", response=response, body=None)
+
+
+@pytest.mark.asyncio
+async def test_interactive_callers_jump_the_background_queue():
+    limiter = RateLimiter(initial_concurrency=1, max_concurrency=1)
+    first = await limiter.acquire(priority=Priority.BACKGROUND)
+
+    order: list[str] = []
+
+    async def _wait(name: str, prio: Priority):
+        with llm_priority(prio):
+            ticket = await limiter.acquire()
+        order.append(name)
+        limiter.release(ticket, input_tokens=0, output_tokens=0)
+
+    bg = asyncio.create_task(_wait("background", Priority.BACKGROUND))
+    await asyncio.sleep(0)
+    fg = asyncio.create_task(_wait("interactive", Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    assert limiter.stats.queue_depth == 2
+
+    limiter.release(first, input_tokens=0, output_tokens=0)
+    await asyncio.gather(bg, fg)
+    assert order == ["interactive", "background"]
+
+
+@pytest.mark.asyncio
+async def test_aimd_halves_on_429_and_grows_on_success():
+    limiter = RateLimiter(initial_concurrency=8, max_concurrency=16)
+
+    ticket = await limiter.acquire()
+    limiter.release(ticket, rate_limited=True, headers={"retry-after": "0"})
+    assert limiter.stats.limit == 4
+    assert limiter.stats.rate_limited == 1
+
+    ticket = await limiter.acquire()
+    limiter.release(ticket, input_tokens=1, output_tokens=1)
+    assert limiter.stats.limit == pytest.approx(4.25)
+
+
+@pytest.mark.asyncio
+async def test_requests_per_minute_bucket_blocks_when_empty():
+    limiter = RateLimiter(requests_per_minute=1)
+    ticket = await limiter.acquire()
+    limiter.release(ticket, input_tokens=0, output_tokens=0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(limiter.acquire(), timeout=0.05)
+    assert limiter.stats.admitted == 1
+
+
+@pytest.mark.asyncio
+async def test_client_retries_429_through_limiter(monkeypatch):
+    calls = 0
+
+    async def _fake_create(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise _error(429, {"retry-after": "0", "anthropic-ratelimit-requests-remaining": "0"})
+        return _raw("after retry")
+
+    limiter = RateLimiter(requests_per_minute=600, initial_concurrency=4)
+    llm = AnthropicClaudeClient(api_key="dummy", limiter=limiter)
+    monkeypatch.setattr(llm._client.messages.with_raw_response, "create", _fake_create, raising=True)
+
+    reply = await llm.chat([ChatMessage(role=ChatRole.USER, content="hi")])
+
+    assert reply.content == "after retry"
+    assert calls == 2
+    assert llm._client.max_retries == 0
+    assert limiter.stats.rate_limited == 1
+    assert limiter.stats.admitted == 2
+    assert limiter.stats.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_success_headers_cap_the_buckets():
+    limiter = RateLimiter(requests_per_minute=600, input_tokens_per_minute=40_000)
+    ticket = await limiter.acquire(10)
+    limiter.release(
+        ticket, input_tokens=10, output_tokens=4,
+        headers={"anthropic-ratelimit-input-tokens-remaining": "100", "retry-after": "60"},
+    )
+
+    assert limiter._itpm.tokens < 200
+    assert limiter._paused_until == 0.0       # retry-after only matters on a 429
+
+
+@pytest.mark.asyncio
+async def test_client_retries_5xx_and_connection_errors(monkeypatch):
+    monkeypatch.setattr("optimed.adapters.anthropic_claude.client._RETRY_BASE_DELAY", 0.0)
+    failures = [
+        _error(529),
+        anthropic.APIConnectionError(request=httpx.Request("POST", "https://api.anthropic.com/v1/messages")),
+    ]
+
+    async def _fake_create(*args, **kwargs):
+        if failures:
+            raise failures.pop(0)
+        return _raw("recovered", {"anthropic-ratelimit-requests-remaining": "3"})
+
+    limiter = RateLimiter(requests_per_minute=600)
+    llm = AnthropicClaudeClient(api_key="dummy", limiter=limiter)
+    monkeypatch.setattr(llm._client.messages.with_raw_response, "create", _fake_create, raising=True)
+
+    reply = await llm.chat([ChatMessage(role=ChatRole.USER, content="hi")])
+
+    assert reply.content == "recovered"
+    assert limiter.stats.admitted == 3 and limiter.stats.in_flight == 0
+    assert limiter._rpm.tokens < 4
+
+
+@pytest.mark.asyncio
+async def test_client_does_not_retry_4xx(monkeypatch):
+    calls = 0
+
+    async def _fake_create(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        raise _error(400)
+
+    llm = AnthropicClaudeClient(api_key="dummy", limiter=RateLimiter())
+    monkeypatch.setattr(llm._client.messages.with_raw_response, "create", _fake_create, raising=True)
+
+    with pytest.raises(anthropic.APIStatusError):
+        await llm.chat([ChatMessage(role=ChatRole.USER, content="hi")])
+    assert calls == 1
@@ -0,0 +1,75 @@
+# tests/unit/test_claude_stream.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from optimed.adapters.anthropic_claude.client import AnthropicClaudeClient
+from optimed.core.domain import ChatMessage, ChatRole
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class _FakeMessagesSSE(BaseHTTPRequestHandler):
+    """Replays a minimal Messages streaming response."""
+    protocol_version = "HTTP/1.1"
+    requests: list[dict] = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests.append(body)
+        events = [
+            _sse("message_start", {"type": "message_start", "message": {
+                "id": "msg_stream", "type": "message", "role": "assistant", "model": body["model"],
+                "content": [], "stop_reason": None, "stop_sequence": None,
+                "usage": {"input_tokens": 42, "output_tokens": 1, "cache_read_input_tokens": 40}}}),
+            _sse("content_block_start", {"type": "content_block_start", "index": 0,
+                                         "content_block": {"type": "text", "text": ""}}),
+            _sse("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                         "delta": {"type": "text_delta", "text": "K+ is "}}),
+            _sse("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                         "delta": {"type": "text_delta", "text": "critical."}}),
+            _sse("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            _sse("message_delta", {"type": "message_delta",
+                                   "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                   "usage": {"output_tokens": 4}}),
+            _sse("message_stop", {"type": "message_stop"}),
+        ]
+        payload = b"".join(events)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sse_server():
+    _FakeMessagesSSE.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeMessagesSSE)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_yields_deltas_then_final_message(sse_server):
+    llm = AnthropicClaudeClient(api_key="dummy", base_url=sse_server)
+
+    items = [item async for item in llm.chat_stream([ChatMessage(role=ChatRole.USER, content="K+?")])]
+
+    deltas, final = items[:-1], items[-1]
+    assert deltas == ["K+ is ", "critical."]
+    assert isinstance(final, ChatMessage)
+    assert final.content == "K+ is critical."
+    assert final.metadata["output_tokens"] == "4"
+    assert final.metadata["cache_read_input_tokens"] == "40"
+    assert float(final.metadata["time_to_first_token_ms"]) >= 0
+    assert llm.stream_stats.streams == 1
+    assert _FakeMessagesSSE.requests[0]["stream"] is True
@@ -26,4 +26,39 @@ async def test_claude_stub(monkeypatch):
     reply = await llm.chat([ChatMessage(role=ChatRole.USER, content="hi")])
 
     assert reply.role is ChatRole.ASSISTANT
-    assert reply.content == "Hello from stub"
\ No newline at end of file
+    assert reply.content == "Hello from stub"
+
+@pytest.mark.asyncio
+async def test_claude_prompt_caching_marks_prefix(monkeypatch):
+    sent = {}
+
+    async def _fake_create(*args, **kwargs):
+        sent.update(kwargs)
+
+        class _Resp:
+            id = "fake456"
+            usage = type("U", (), {
+                "input_tokens": 12,
+                "output_tokens": 3,
+                "cache_creation_input_tokens": 0,
+                "cache_read_input_tokens": 2048,
+            })
+            content = [type("B", (), {"type": "text", "text": "ok"})]
+
+        return _Resp()
+
+    llm = AnthropicClaudeClient(api_key="dummy")
+    monkeypatch.setattr(llm._client.messages, "create", _fake_create, raising=True)
+
+    reply = await llm.chat([
+        ChatMessage(role=ChatRole.SYSTEM, content="long clinical system prompt"),
+        ChatMessage(role=ChatRole.USER, content="<patient context>", metadata={"cache_control": "ephemeral"}),
+        ChatMessage(role=ChatRole.ASSISTANT, content="noted"),
+        ChatMessage(role=ChatRole.USER, content="any critical labs?"),
+    ])
+
+    assert sent["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert sent["messages"][0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+    assert sent["messages"][2]["content"] == "any critical labs?"
+    assert reply.metadata["cache_read_input_tokens"] == "2048"
+    assert reply.metadata["cache_creation_input_tokens"] == "0"
@@ -145,4 +145,32 @@ def test_alert_escalate():
     a2 = a.escalate()
     assert a2.severity == Severity.MEDIUM
     # second escalate reaches HIGH
-    assert a2.escalate().severity == Severity.HIGH
\ No newline at end of file
+    assert a2.escalate().severity == Severity.HIGH
+
+# ----------------------------------------------------------------------------
+# Trusted construction -------------------------------------------------------
+# ----------------------------------------------------------------------------
+
+def test_trusted_construction_matches_validated_and_stays_frozen(patient_ctx: PatientContext):
+    fields = patient_ctx.model_dump()
+    fast = PatientContext.trusted(**fields)
+    assert fast == patient_ctx
+
+    with pytest.raises(Exception):
+        fast.age = 1                                   # still frozen
+    with pytest.raises(TypeError):
+        PatientContext.trusted(**fields, ward="X")     # still extra=forbid
+    with pytest.raises(TypeError):
+        PatientContext.trusted(patient_id="P1")        # required fields enforced
+
+    a = PatientContext.trusted(patient_id="P1", name="A", age=1, sex="F", care_unit="U")
+    b = PatientContext.trusted(patient_id="P2", name="B", age=2, sex="M", care_unit="U")
+    assert a.vitals == {} and a.vitals is not b.vitals   # mutable defaults copied
+
+
+def test_trusted_replace_matches_model_copy():
+    a = Alert(alert_id="AL2", message="K+", severity=Severity.HIGH, created_at=NOW)
+    assert a.trusted_replace(severity=Severity.CRITICAL) == a.model_copy(update={"severity": Severity.CRITICAL})
+    assert a.escalate().escalate().severity == Severity.CRITICAL   # private _ladder carried over
+    with pytest.raises(TypeError):
+        a.trusted_replace(level=1)
@@ -0,0 +1,129 @@
+# tests/unit/test_embeddings.py
+import asyncio
+
+import numpy as np
+import pytest
+
+from optimed.adapters.embeddings.batcher import MicroBatchingEmbedder
+from optimed.adapters.embeddings.cache import CachingEmbedder, index_texts
+from optimed.adapters.embeddings.hashing import HashingEmbedder
+from optimed.adapters.embeddings.text import patient_text
+from optimed.adapters.vector_local.store import LocalVectorStore
+from optimed.core.domain import PatientContext
+
+
+class _RecordingEmbedder(HashingEmbedder):
+    def __init__(self, dim: int = 32):
+        super().__init__(dim)
+        self.batches: list[list[str]] = []
+
+    async def embed(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+        return await super().embed(texts)
+
+
+@pytest.mark.asyncio
+async def test_hashing_embedder_is_deterministic_and_normalized():
+    a = HashingEmbedder(dim=64)
+    b = HashingEmbedder(dim=64)
+    texts = ["Potassium 6.4 mmol/L, repeat sample", "potassium  6.4 mmol/L, repeat sample", "sepsis bundle", ""]
+
+    va, vb = await a.embed(texts), await b.embed(texts)
+
+    assert va.shape == (4, 64) and va.dtype == np.float32
+    np.testing.assert_array_equal(va, vb)
+    np.testing.assert_array_equal(va[0], va[1])           # case / whitespace do not matter
+    assert np.linalg.norm(va[0]) == pytest.approx(1.0) and not va[3].any()
+    assert float(va[0] @ va[2]) < 0.5
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_coalesces_concurrent_calls():
+    inner = _RecordingEmbedder()
+    embedder = MicroBatchingEmbedder(inner, max_batch=8, max_wait=0.01)
+    texts = [f"note {i}" for i in range(10)] + ["note 0"]
+
+    rows = await asyncio.gather(*(embedder.embed([t]) for t in texts))
+
+    # early flush at max_batch, tail (incl. the repeated "note 0") on the timer
+    assert [len(b) for b in inner.batches] == [8, 3]
+    assert embedder.stats.batches == 2 and embedder.stats.texts == 11
+    expected = inner.embed_sync(texts)
+    np.testing.assert_array_equal(np.vstack(rows), expected)
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_failure_reaches_only_its_callers():
+    class _Flaky(HashingEmbedder):
+        async def embed(self, texts):
+            if "bad" in texts:
+                raise RuntimeError("model down")
+            return await super().embed(texts)
+
+    embedder = MicroBatchingEmbedder(_Flaky(16), max_batch=2, max_wait=0.001)
+    ok, bad = await asyncio.gather(embedder.embed(["a", "b"]), embedder.embed(["bad"]), return_exceptions=True)
+
+    assert isinstance(ok, np.ndarray) and ok.shape == (2, 16)
+    assert isinstance(bad, RuntimeError)
+
+
+@pytest.mark.asyncio
+async def test_cache_only_embeds_changed_text_and_survives_restart(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    inner = _RecordingEmbedder()
+    cache = CachingEmbedder(inner, disk_path=path)
+
+    first = await cache.embed(["K+ 6.4 mmol/L", "Lactate 4.1", "K+  6.4 mmol/L"])
+    assert len(inner.batches) == 1 and len(inner.batches[0]) == 2      # whitespace variant is a hit
+    np.testing.assert_array_equal(first[0], first[2])
+
+    again = await cache.embed(["Lactate 4.1", "Sepsis screen positive"])
+    assert inner.batches[-1] == ["Sepsis screen positive"]
+    np.testing.assert_array_equal(again[0], first[1])
+    assert cache.stats.misses == 3 and cache.stats.memory_hits == 1
+    cache.close()
+
+    inner2 = _RecordingEmbedder()
+    reopened = CachingEmbedder(inner2, disk_path=path)
+    assert reopened.cached(["Lactate 4.1", "new"]).tolist() == [True, False]
+    np.testing.assert_array_equal(await reopened.embed(["Lactate 4.1"]), first[1:2])
+    assert inner2.batches == [] and reopened.stats.disk_hits == 1
+
+    # a different model never reuses these vectors
+    other = CachingEmbedder(_RecordingEmbedder(dim=16), disk_path=path)
+    assert not other.cached(["Lactate 4.1"]).any()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_misses_share_one_call():
+    inner = _RecordingEmbedder()
+    cache = CachingEmbedder(inner)
+
+    await asyncio.gather(cache.embed(["same"]), cache.embed(["same"]), cache.embed(["same", "other"]))
+
+    assert sorted(t for b in inner.batches for t in b) == ["other", "same"]
+
+
+@pytest.mark.asyncio
+async def test_reindex_only_pays_for_changed_chunks():
+    inner = _RecordingEmbedder()
+    cache = CachingEmbedder(inner)
+    store = LocalVectorStore(dim=inner.dim)
+    guideline = {f"chunk-{i}": f"guideline paragraph {i} about sepsis" for i in range(20)}
+
+    assert await index_texts(store, cache, guideline, {k: {"doc": "sepsis"} for k in guideline}, batch_size=8) == 20
+    guideline["chunk-3"] = "guideline paragraph 3 revised: lactate above 2 mmol/L"
+    inner.batches.clear()
+    await index_texts(store, cache, guideline, batch_size=8)
+
+    assert inner.batches == [[guideline["chunk-3"]]]
+    hits = await store.similarity_search((await cache.embed([guideline["chunk-3"]]))[0], top_k=1)
+    assert hits[0][0] == "chunk-3"
+
+
+def test_patient_text_is_stable_and_free_of_name():
+    kw = dict(patient_id="p1", age=71, sex="F", care_unit="ICU", labs={"K+": "6.4 mmol/L"}, vitals={"HR": "120"})
+    a = patient_text(PatientContext(name="Jane Roe", **kw))
+    b = patient_text(PatientContext(name="J. Roe", **kw))
+    assert a == b and "Roe" not in a and "K+ 6.4 mmol/L" in a
@@ -0,0 +1,173 @@
+# tests/unit/test_fhir_cache.py
+import pytest
+
+from optimed.adapters.fhir_cache.repository import CachingFHIRRepository
+from optimed.adapters.fhir_hapi.repository import HAPIFHIRRepository
+from optimed.core.domain import PatientContext
+from conftest import FakeResp
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+
+class _ConditionalRepo:
+    """In-memory ConditionalFHIRRepository that counts full vs 304 answers."""
+
+    def __init__(self):
+        self.version = "1"
+        self.full = 0
+        self.not_modified = 0
+
+    def _ctx(self, pid):
+        return PatientContext(patient_id=pid, name=f"v{self.version}", age=50, sex="F", care_unit="A")
+
+    async def get_patient(self, patient_id):
+        self.full += 1
+        return self._ctx(patient_id)
+
+    async def get_patients(self, patient_ids):
+        return [ctx for ctx, _ in await self.get_patients_versioned(patient_ids)]
+
+    async def get_patients_versioned(self, patient_ids):
+        self.full += len(patient_ids)
+        return [(self._ctx(pid), self.version) for pid in patient_ids]
+
+    async def search_patients(self, query):
+        return []
+
+    async def iter_patients(self, query, *, page_size=50):
+        for ctx in await self.search_patients(query):
+            yield ctx
+
+    async def get_patient_if_changed(self, patient_id, version=None):
+        if version == self.version:
+            self.not_modified += 1
+            return None, version
+        self.full += 1
+        return self._ctx(patient_id), self.version
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_then_revalidate_then_refresh():
+    inner, clock = _ConditionalRepo(), _Clock()
+    repo = CachingFHIRRepository(inner, ttl=10, max_age=100, clock=clock)
+
+    first = await repo.get_patient("p1")
+    assert await repo.get_patient("p1") is first            # fresh hit
+    clock.now = 15
+    assert await repo.get_patient("p1") is first            # 304 → same object
+    inner.version = "2"
+    clock.now = 30
+    changed = await repo.get_patient("p1")
+    assert changed.name == "v2"
+
+    assert (repo.stats.misses, repo.stats.hits, repo.stats.revalidations, repo.stats.refreshes) == (1, 1, 1, 1)
+    assert (inner.full, inner.not_modified) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_cache_max_age_forces_full_reload_and_lru_evicts():
+    inner, clock = _ConditionalRepo(), _Clock()
+    repo = CachingFHIRRepository(inner, ttl=10, max_age=50, max_entries=2, clock=clock)
+
+    await repo.get_patients(["p1", "p2"])
+    await repo.get_patient("p1")            # p1 now most recently used
+    await repo.get_patient("p3")            # evicts p2
+    assert len(repo) == 2 and repo.stats.evictions == 1
+
+    clock.now = 60                          # past max_age: no revalidation
+    await repo.get_patient("p1")
+    assert inner.not_modified == 0
+    assert repo.stats.refreshes == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_revalidation_is_not_an_error():
+    inner, clock = _ConditionalRepo(), _Clock()
+    repo = CachingFHIRRepository(inner, ttl=10, max_age=100, clock=clock)
+    first = await repo.get_patient("p1")
+    clock.now = 15
+
+    answer = inner.get_patient_if_changed
+
+    async def _racing(patient_id, version=None):
+        repo.invalidate(patient_id)          # e.g. a write elsewhere
+        return await answer(patient_id, version)
+
+    inner.get_patient_if_changed = _racing
+    assert await repo.get_patient("p1") is first
+    assert len(repo) == 0                    # invalidation wins
+
+
+@pytest.mark.asyncio
+async def test_get_patients_revalidates_expired_entries_and_keeps_versions():
+    inner, clock = _ConditionalRepo(), _Clock()
+    repo = CachingFHIRRepository(inner, ttl=10, max_age=50, clock=clock)
+
+    first = await repo.get_patients(["p1", "p2"])
+    clock.now = 15                          # expired, within max_age → conditional
+    again = await repo.get_patients(["p1", "p2", "p3"])
+
+    assert again[:2] == list(first) and again[0] is first[0]
+    assert inner.not_modified == 2          # bulk load stored real versions
+    assert (repo.stats.misses, repo.stats.revalidations, repo.stats.refreshes) == (3, 2, 0)
+
+    clock.now = 60                          # past max_age → bulk reload, not a miss
+    await repo.get_patients(["p1"])
+    assert (repo.stats.misses, repo.stats.refreshes) == (3, 1)
+
+
+def _hapi_fake(_load_fixture, seen, *, patient_modified=False, obs_total=0):
+    async def _fake_get(self, path: str, *_, **kwargs):
+        params = kwargs.get("params") or {}
+        seen.append((path, kwargs.get("headers"), params.get("_summary"), params.get("_lastUpdated")))
+        if path.startswith("/Patient/"):
+            if kwargs.get("headers") and not patient_modified:
+                return FakeResp(None, status_code=304)
+            return FakeResp(_load_fixture("patient_example.json"), headers={"ETag": 'W/"7"'})
+        if params.get("_summary") == "count":
+            return FakeResp({"resourceType": "Bundle", "type": "searchset", "total": obs_total})
+        bundle = _load_fixture("observations_vital.json")
+        return FakeResp({**bundle, "meta": {"lastUpdated": "2026-10-18T08:00:00Z"}})
+    return _fake_get
+
+
+@pytest.mark.asyncio
+async def test_hapi_get_patient_if_changed_304(monkeypatch, _load_fixture):
+    """A 304 on the Patient plus an empty Observation probe skips the full reload."""
+    seen = []
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _hapi_fake(_load_fixture, seen))
+
+    repo = HAPIFHIRRepository(base_url="https://stub")
+    ctx, version = await repo.get_patient_if_changed("example")
+    assert ctx is not None and version == "7|2026-10-18T08:00:00+00:00"
+
+    seen.clear()
+    ctx, again = await repo.get_patient_if_changed("example", version)
+    await repo.close()
+
+    assert ctx is None and again == version
+    assert sorted(seen, key=str) == sorted([
+        ("/Patient/example", {"If-None-Match": 'W/"7"'}, None, None),
+        ("/Observation", None, "count", "ge2026-10-18T08:00:00+00:00"),
+    ], key=str)
+
+
+@pytest.mark.asyncio
+async def test_hapi_get_patient_if_changed_sees_new_observations(monkeypatch, _load_fixture):
+    """Patient 304 but a newer Observation → full reload with a fresh token."""
+    seen = []
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get",
+                        _hapi_fake(_load_fixture, seen, obs_total=1))
+
+    repo = HAPIFHIRRepository(base_url="https://stub")
+    ctx, version = await repo.get_patient_if_changed("example", "7|2026-10-18T07:00:00+00:00")
+    await repo.close()
+
+    assert ctx is not None and ctx.patient_id == "example"
+    assert version == "7|2026-10-18T08:00:00+00:00"
+    assert [p for p, *_ in seen].count("/Observation") == 3     # probe + vitals + labs
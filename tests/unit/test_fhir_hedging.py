@@ -0,0 +1,144 @@
+# tests/unit/test_fhir_hedging.py
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from optimed.adapters.fhir_hapi.hedging import (
+    HedgedRequester,
+    HedgePolicy,
+    LatencyHistogram,
+    RetryBudget,
+    RetryPolicy,
+    endpoint_key,
+    retry_after_seconds,
+)
+from optimed.adapters.fhir_hapi.repository import HAPIFHIRRepository
+from conftest import FakeResp
+
+
+def test_histogram_percentiles_and_endpoint_keys():
+    h = LatencyHistogram()
+    for _ in range(90):
+        h.record(0.010)
+    for _ in range(10):
+        h.record(0.500)
+    assert 0.009 <= h.percentile(0.5) <= 0.012
+    assert 0.45 <= h.percentile(0.95) <= 0.6
+
+    assert endpoint_key("/Patient/123") == "/Patient/{id}"
+    assert endpoint_key("/Observation") == "/Observation"
+    assert endpoint_key("https://hapi.fhir.org/baseR4/Patient/9") == "/Patient/{id}"
+
+
+@pytest.mark.asyncio
+async def test_slow_read_is_hedged_and_fast_duplicate_wins(monkeypatch, _load_fixture):
+    patient = _load_fixture("patient_example.json")
+    calls = {"n": 0}
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            await asyncio.sleep(5)          # the p99 outlier
+        return FakeResp(patient)
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    hedging = HedgedRequester(hedge=HedgePolicy(min_samples=5, min_delay=0.01))
+    for _ in range(10):
+        hedging.histogram("/Patient/{id}").record(0.02)
+
+    repo = HAPIFHIRRepository(base_url="https://stub", hedging=hedging)
+    raw, _ = await asyncio.wait_for(repo._get_patient_raw("example"), timeout=1)
+    await repo.close()
+
+    assert raw["id"] == "example"
+    assert (hedging.stats.hedges, hedging.stats.hedge_wins) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_retries_are_capped_by_budget(monkeypatch, _load_fixture):
+    statuses = iter([503, 503, 200, 503, 503, 503])
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        return FakeResp({"resourceType": "Bundle", "entry": []}, status_code=next(statuses))
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    budget = RetryBudget(ratio=0.0, min_per_second=0.0, max_tokens=3)
+    hedging = HedgedRequester(hedge=None, retry=RetryPolicy(max_attempts=5, base_delay=0), budget=budget)
+    repo = HAPIFHIRRepository(base_url="https://stub", hedging=hedging)
+
+    assert await repo.search_patients("adam") == []          # 2 retries, then 200
+    with pytest.raises(Exception):
+        await repo.search_patients("adam")                   # 1 token left → gives up
+    await repo.close()
+
+    assert hedging.stats.retries == 3
+    assert hedging.stats.budget_exhausted == 1
+
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    now = datetime(2026, 10, 18, 12, 0, 0, tzinfo=timezone.utc)
+    assert retry_after_seconds("7") == 7.0
+    assert retry_after_seconds("Sun, 18 Oct 2026 12:01:30 GMT", now=now) == 90.0
+    assert retry_after_seconds("Sun, 18 Oct 2026 11:00:00 GMT", now=now) == 0.0
+    assert retry_after_seconds("soon") is None and retry_after_seconds(None) is None
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured_beyond_max_delay_or_given_up(monkeypatch):
+    answers = []
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        status, retry_after = answers.pop(0)
+        return FakeResp({"resourceType": "Bundle", "entry": []}, status_code=status,
+                        headers={"Retry-After": retry_after} if retry_after else None)
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    hedging = HedgedRequester(hedge=None, retry=RetryPolicy(max_delay=0.001, max_retry_after=1.0))
+    repo = HAPIFHIRRepository(base_url="https://stub", hedging=hedging)
+
+    answers[:] = [(503, "0.05"), (200, None)]
+    t0 = time.perf_counter()
+    assert await repo.search_patients("adam") == []
+    assert time.perf_counter() - t0 >= 0.05              # not clipped to max_delay
+
+    answers[:] = [(429, "120")]
+    with pytest.raises(Exception):
+        await repo.search_patients("adam")               # would wait 2 min → give up now
+    await repo.close()
+
+    assert hedging.stats.retries == 1 and hedging.stats.retry_after_exceeded == 1
+
+
+@pytest.mark.asyncio
+async def test_hedges_take_their_own_in_flight_slot(monkeypatch, _load_fixture):
+    patient = _load_fixture("patient_example.json")
+    active = {"now": 0, "max": 0}
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        try:
+            await asyncio.sleep(0.1)
+            return FakeResp(patient)
+        finally:
+            active["now"] -= 1
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    hedging = HedgedRequester(hedge=HedgePolicy(min_samples=5, min_delay=0.01))
+    for _ in range(10):
+        hedging.histogram("/Patient/{id}").record(0.01)
+
+    repo = HAPIFHIRRepository(base_url="https://stub", hedging=hedging, max_concurrency=1)
+    raw, _ = await repo._get_patient_raw("example")
+    await repo.close()
+
+    assert raw["id"] == "example"
+    assert hedging.stats.hedges == 1
+    assert active["max"] == 1            # the hedge queued behind the primary's slot
@@ -0,0 +1,104 @@
+# tests/unit/test_fhir_offload.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from optimed.adapters.fhir_hapi.offload import LoopLagMonitor, make_parse_executor
+from optimed.adapters.fhir_hapi.repository import HAPIFHIRRepository
+from conftest import FakeResp
+
+
+class _RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.threads: list[str] = []
+
+    def submit(self, fn, *args, **kwargs):
+        def _wrapped():
+            self.threads.append(threading.current_thread().name)
+            return fn(*args, **kwargs)
+        return super().submit(_wrapped)
+
+
+def _search_bundle(patient: dict, n: int) -> dict:
+    return {
+        "resourceType": "Bundle",
+        "type": "searchset",
+        "entry": [{"resource": {**patient, "id": f"p{i}"}} for i in range(n)],
+    }
+
+
+@pytest.mark.asyncio
+async def test_large_bundles_are_parsed_on_the_executor(monkeypatch, _load_fixture):
+    patient = _load_fixture("patient_example.json")
+    sizes = iter([3, 1])
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        return FakeResp(_search_bundle(patient, next(sizes)))
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    executor = _RecordingExecutor()
+    repo = HAPIFHIRRepository(base_url="https://stub", executor=executor, offload_threshold=2)
+    big = await repo.search_patients("adam")     # 3 resources → offloaded
+    small = await repo.search_patients("adam")   # 1 resource  → inline
+    await repo.close()
+    executor.shutdown()
+
+    assert [p.patient_id for p in big] == ["p0", "p1", "p2"]
+    assert len(small) == 1
+    assert len(executor.threads) == 1
+
+
+@pytest.mark.asyncio
+async def test_process_pool_round_trips_patient_context(monkeypatch, _load_fixture):
+    patient = _load_fixture("patient_example.json")
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        return FakeResp(_search_bundle(patient, 2))
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    with make_parse_executor("process", max_workers=1) as executor:
+        repo = HAPIFHIRRepository(base_url="https://stub", executor=executor, offload_threshold=1)
+        results = await repo.search_patients("adam")
+        await repo.close()
+
+    assert [p.patient_id for p in results] == ["p0", "p1"]
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_sees_a_blocking_call():
+    async with LoopLagMonitor(interval=0.01, stall_threshold=0.05) as monitor:
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)              # simulate synchronous parsing on the loop
+        await asyncio.sleep(0.03)
+
+    assert monitor.stats.samples >= 2
+    assert monitor.stats.stalls >= 1
+    assert monitor.stats.max_lag >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_repository_runs_lag_monitor_until_close(monkeypatch, _load_fixture):
+    patient = _load_fixture("patient_example.json")
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        await asyncio.sleep(0.03)
+        return FakeResp(_search_bundle(patient, 2))
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    monitor = LoopLagMonitor(interval=0.005)
+    repo = HAPIFHIRRepository(base_url="https://stub", lag_monitor=monitor)
+    await repo.search_patients("adam")
+    await repo.search_patients("adam")
+    await repo.close()
+    samples = monitor.stats.samples
+    await asyncio.sleep(0.02)
+
+    assert samples >= 1
+    assert monitor.stats.samples == samples          # stopped by close()
@@ -1,4 +1,5 @@
 # tests/unit/test_hapi_repo.py
+import httpx
 import pytest
 from optimed.adapters.fhir_hapi.repository import HAPIFHIRRepository
 from optimed.core.domain import PatientContext
@@ -73,3 +74,352 @@ async def test_search_patients_stub(monkeypatch, _load_fixture):
 
     assert len(results) == 1
     assert results[0].patient_id == "example"
+
+
+@pytest.mark.asyncio
+async def test_get_patient_batch_single_round_trip(monkeypatch, _load_fixture):
+    """fetch_mode="batch" answers get_patient with one POSTed batch Bundle."""
+    obs = {
+        "resourceType": "Observation",
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "8867-4"}]},
+        "valueQuantity": {"value": 72, "unit": "/min"},
+    }
+    batch_response = {
+        "resourceType": "Bundle",
+        "type": "batch-response",
+        "entry": [
+            {"resource": _load_fixture("patient_example.json"), "response": {"status": "200 OK"}},
+            {"resource": {"resourceType": "Bundle", "type": "searchset", "entry": [{"resource": obs}]},
+             "response": {"status": "200 OK"}},
+            {"resource": _load_fixture("observations_lab.json"), "response": {"status": "200 OK"}},
+        ],
+    }
+    posted = []
+
+    async def _fake_post(self, path: str, *_, **kwargs):
+        posted.append(kwargs["json"])
+        return FakeResp(batch_response)
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        raise AssertionError("batch mode must not fall back to GETs")
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.post", _fake_post)
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    repo = HAPIFHIRRepository(base_url="https://stub", fetch_mode="batch")
+    pat = await repo.get_patient("example")
+    await repo.close()
+
+    assert len(posted) == 1
+    urls = [e["request"]["url"] for e in posted[0]["entry"]]
+    assert urls[0] == "Patient/example"
+    assert "category=vital-signs" in urls[1] and "category=laboratory" in urls[2]
+    assert pat.patient_id == "example"
+    assert pat.vitals == {"8867-4": "72 /min"}
+
+
+@pytest.mark.asyncio
+async def test_get_patient_batch_falls_back_when_unsupported(monkeypatch, _load_fixture):
+    """A server that rejects batch Bundles is asked with concurrent GETs instead."""
+    posts = []
+    gets = []
+
+    async def _fake_post(self, path: str, *_, **kwargs):
+        posts.append(path)
+        return FakeResp({}, status_code=405)
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        gets.append(path)
+        if path.startswith("/Patient/"):
+            return FakeResp(_load_fixture("patient_example.json"))
+        return FakeResp(_load_fixture("observations_vital.json"))
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.post", _fake_post)
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    repo = HAPIFHIRRepository(base_url="https://stub", fetch_mode="batch")
+    await repo.get_patient("example")
+    await repo.get_patient("example")
+    await repo.close()
+
+    assert len(posts) == 1          # unsupported batch is remembered
+    assert gets.count("/Patient/example") == 2
+    assert gets.count("/Observation") == 4
+
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [400, 422])
+async def test_get_patient_batch_client_error_is_raised_not_fallen_back(monkeypatch, status):
+    """A rejected batch request surfaces like a failed GET instead of disabling batch."""
+    async def _fake_post(self, path: str, *_, **kwargs):
+        return FakeResp({"resourceType": "OperationOutcome"}, status_code=status)
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        raise AssertionError("client errors must not fall back to GETs")
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.post", _fake_post)
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    repo = HAPIFHIRRepository(base_url="https://stub", fetch_mode="batch")
+    with pytest.raises(httpx.HTTPStatusError):
+        await repo.get_patient("example")
+    assert repo._batch_supported is None
+    await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_get_patient_batch_failed_observation_entry_is_raised(monkeypatch, _load_fixture):
+    """A failed lab search inside the batch is an error, not an empty result."""
+    outcome = {"resourceType": "OperationOutcome", "issue": [{"severity": "error", "code": "exception"}]}
+
+    async def _fake_post(self, path: str, *_, **kwargs):
+        return FakeResp({
+            "resourceType": "Bundle",
+            "type": "batch-response",
+            "entry": [
+                {"resource": _load_fixture("patient_example.json"), "response": {"status": "200 OK"}},
+                {"resource": _load_fixture("observations_vital.json"), "response": {"status": "200 OK"}},
+                {"resource": outcome, "response": {"status": "500 Internal Server Error"}},
+            ],
+        })
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.post", _fake_post)
+
+    repo = HAPIFHIRRepository(base_url="https://stub", fetch_mode="batch")
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        await repo.get_patient("example")
+    await repo.close()
+    assert exc.value.response.status_code == 500
+    assert "category=laboratory" in str(exc.value.request.url)
+
+
+def _obs(pid: str, code: str, value: float) -> dict:
+    return {
+        "resourceType": "Observation",
+        "status": "final",
+        "subject": {"reference": f"Patient/{pid}"},
+        "code": {"coding": [{"system": "http://loinc.org", "code": code}]},
+        "valueQuantity": {"value": value, "unit": "/min"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_patients_packs_ids(monkeypatch, _load_fixture):
+    """get_patients issues one _id search + one Observation search per category per chunk."""
+    base = _load_fixture("patient_example.json")
+    patients = {pid: {**base, "id": pid} for pid in ("p1", "p2", "p3")}
+    calls = []
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        params = kwargs.get("params") or {}
+        calls.append((path, params))
+        if path == "/Patient":
+            ids = params["_id"].split(",")
+            entries = [{"resource": patients[i]} for i in ids if i in patients]
+        elif params["category"] == "vital-signs":
+            ids = params["patient"].split(",")
+            entries = [{"resource": _obs(i, "8867-4", 70 + n)} for n, i in enumerate(ids)]
+        else:
+            entries = []
+        return FakeResp({"resourceType": "Bundle", "type": "searchset", "entry": entries})
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    repo = HAPIFHIRRepository(base_url="https://stub", ids_per_request=2, max_concurrency=2)
+    results = await repo.get_patients(["p3", "p1", "missing", "p2", "p1"])
+    await repo.close()
+
+    assert [p.patient_id for p in results] == ["p3", "p1", "p2"]
+    assert results[0].vitals == {"8867-4": "70 /min"}
+    assert results[1].vitals == {"8867-4": "71 /min"}
+    # 4 unique IDs → 2 chunks × (Patient + 2 Observation searches)
+    assert len(calls) == 6
+    assert {c[1]["_id"] for c in calls if c[0] == "/Patient"} == {"p3,p1", "missing,p2"}
+
+
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("parse_mode", ["strict", "lean"])
+async def test_latest_reading_wins_in_vitals_dict(monkeypatch, _load_fixture, parse_mode):
+    """Observations arrive newest first (_sort=-date); the dict keeps the newest."""
+    newest = {**_obs("example", "8867-4", 88), "effectiveDateTime": "2024-01-01T09:00:00Z"}
+    older = {**_obs("example", "8867-4", 60), "effectiveDateTime": "2024-01-01T08:00:00Z"}
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        if path.startswith("/Patient/"):
+            return FakeResp(_load_fixture("patient_example.json"))
+        vital = kwargs["params"]["category"] == "vital-signs"
+        return FakeResp({"resourceType": "Bundle", "entry": [{"resource": newest}, {"resource": older}] if vital else []})
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    repo = HAPIFHIRRepository(base_url="https://stub", parse_mode=parse_mode)
+    ctx = await repo.get_patient("example")
+    await repo.close()
+
+    assert ctx.vitals == {"8867-4": "88 /min"}
+    assert ctx.latest("8867-4").value == 88
+
+@pytest.mark.asyncio
+async def test_get_patients_tops_up_patients_crowded_out_of_a_chunk(monkeypatch, _load_fixture):
+    """One busy patient filling the chunk-wide _count must not starve the others."""
+    base = _load_fixture("patient_example.json")
+    readings = {"busy": 30, "quiet": 3}          # busy alone exceeds count * len(ids) = 20
+    calls = []
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        params = kwargs.get("params") or {}
+        if path == "/Patient":
+            return FakeResp({"resourceType": "Bundle", "entry": [
+                {"resource": {**base, "id": pid}} for pid in params["_id"].split(",")]})
+        calls.append((params["patient"], params["category"], params["_count"]))
+        ids = params["patient"].split(",")
+        found = [_obs(pid, "8867-4", 60 + i) for pid in ids for i in range(readings[pid])
+                 if params["category"] == "vital-signs"]
+        bundle = {"resourceType": "Bundle", "entry": [{"resource": o} for o in found[:params["_count"]]]}
+        if len(found) > params["_count"]:
+            bundle["link"] = [{"relation": "next", "url": "https://stub/Observation?page=2"}]
+        return FakeResp(bundle)
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    repo = HAPIFHIRRepository(base_url="https://stub", ids_per_request=2)
+    busy, quiet = await repo.get_patients(["busy", "quiet"])
+    await repo.close()
+
+    assert len(busy.observations) == 10
+    assert len(quiet.observations) == 3
+    # only the truncated category is re-asked, and only for the short patient
+    assert ("quiet", "vital-signs", 10) in calls
+    assert not any(pid == "busy" for pid, _, _ in calls)
+
+@pytest.mark.asyncio
+async def test_iter_patients_follows_next_and_stops_early(monkeypatch, _load_fixture):
+    """iter_patients pages through Bundle next links and stops when the caller does."""
+    base = _load_fixture("patient_example.json")
+
+    def _page(n: int) -> dict:
+        bundle = {
+            "resourceType": "Bundle",
+            "type": "searchset",
+            "entry": [{"resource": {**base, "id": f"p{n}-{i}"}, "search": {"mode": "match"}} for i in range(2)],
+        }
+        if n < 9:
+            bundle["link"] = [{"relation": "next", "url": f"https://stub?page={n + 1}"}]
+        return bundle
+
+    fetched = []
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        n = int(path.rsplit("=", 1)[1]) if "page=" in path else 0
+        fetched.append(n)
+        if n == 0:
+            assert kwargs["params"]["_count"] == 2
+        return FakeResp(_page(n))
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+
+    repo = HAPIFHIRRepository(base_url="https://stub")
+    ids = [p.patient_id async for p in repo.iter_patients("adam", page_size=2)]
+    assert len(ids) == 20 and ids[-1] == "p9-1"
+
+    fetched.clear()
+    seen = []
+    async for p in repo.iter_patients("adam", page_size=2):
+        seen.append(p.patient_id)
+        if len(seen) == 3:
+            break
+    await repo.close()
+
+    assert seen == ["p0-0", "p0-1", "p1-0"]
+    assert max(fetched) <= 2        # at most one page prefetched ahead
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fetch_mode", ["concurrent", "batch"])
+async def test_lean_parse_mode_matches_strict(monkeypatch, _load_fixture, fetch_mode):
+    """parse_mode="lean" builds the same PatientContext as full validation."""
+    codeless = _obs("example", "8867-4", 80)
+    codeless["code"]["coding"][0].pop("code")
+    vitals = {"resourceType": "Bundle", "type": "searchset", "entry": [
+        {"resource": codeless},                 # skipped, not a None key
+        {"resource": _obs("example", "8867-4", 72)},
+        {"resource": _obs("example", "8310-5", 37.2)},
+    ]}
+    labs = {"resourceType": "Bundle", "type": "searchset", "entry": [
+        {"resource": _obs("example", "2823-3", 6.2)},
+    ]}
+    patient = _load_fixture("patient_example.json")
+
+    async def _fake_get(self, path: str, *_, **kwargs):
+        if path.startswith("/Patient/"):
+            return FakeResp(patient)
+        return FakeResp(vitals if kwargs["params"]["category"] == "vital-signs" else labs)
+
+    async def _fake_post(self, path: str, *_, **kwargs):
+        return FakeResp({"resourceType": "Bundle", "type": "batch-response", "entry": [
+            {"resource": patient, "response": {"status": "200 OK"}},
+            {"resource": vitals, "response": {"status": "200 OK"}},
+            {"resource": labs, "response": {"status": "200 OK"}},
+        ]})
+
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.get", _fake_get)
+    monkeypatch.setattr("optimed.adapters.fhir_hapi.repository.httpx.AsyncClient.post", _fake_post)
+
+    strict = HAPIFHIRRepository(base_url="https://stub", fetch_mode=fetch_mode)
+    lean = HAPIFHIRRepository(base_url="https://stub", fetch_mode=fetch_mode, parse_mode="lean")
+    a = await strict.get_patient("example")
+    b = await lean.get_patient("example")
+    await strict.close()
+    await lean.close()
+
+    assert a.model_dump(exclude={"updated_at"}) == b.model_dump(exclude={"updated_at"})
+    assert b.labs == {"2823-3": "6.2 /min"}
+    assert b.vitals == {"8867-4": "72 /min", "8310-5": "37.2 /min"}
+
+
+def test_strict_parse_skips_observations_without_code(_load_fixture):
+    """Derived vitals must still fit PatientContext's schema (no None keys)."""
+    from fhir.resources.observation import Observation
+    from fhir.resources.patient import Patient
+
+    from optimed.adapters.fhir_hapi.repository import _to_patient_ctx
+
+    codeless = _obs("example", "8867-4", 80)
+    codeless["code"]["coding"][0].pop("code")
+    ctx = _to_patient_ctx(
+        Patient.model_validate(_load_fixture("patient_example.json")),
+        [Observation.model_validate(codeless), Observation.model_validate(_obs("example", "8310-5", 37.2))],
+    )
+
+    assert ctx.vitals == {"8310-5": "37.2 /min"}
+    PatientContext.model_validate(ctx.model_dump())
+
+
+@pytest.mark.parametrize("parse_mode", ["strict", "lean"])
+def test_observations_are_typed_normalized_and_kept_per_reading(_load_fixture, parse_mode):
+    """Every reading becomes a Measurement in canonical units, oldest first."""
+    from optimed.adapters.fhir_hapi.repository import _convert
+
+    def lab(code, value, unit, ucum, when):
+        return {**_obs("example", code, value), "effectiveDateTime": when,
+                "valueQuantity": {"value": value, "unit": unit,
+                                  "system": "http://unitsofmeasure.org", "code": ucum}}
+
+    labs = [
+        lab("2823-3", 6.4, "mEq/L", "meq/L", "2025-01-02T08:00:00+02:00"),
+        lab("2823-3", 5.1, "mmol/l", "mmol/L", "2025-01-01T08:00:00Z"),
+        lab("2339-0", 450, "mg/dL", "mg/dL", "2025-01-02T07:00:00Z"),
+    ]
+    ctx = _convert(parse_mode, _load_fixture("patient_example.json"), [], labs)
+
+    assert [(m.code, m.unit) for m in ctx.observations] == [
+        ("2823-3", "mmol/L"), ("2823-3", "mmol/L"), ("2339-0", "mmol/L"),
+    ]
+    assert [m.value for m in ctx.readings("2823-3")] == [5.1, 6.4]
+    assert ctx.latest("2339-0").value == pytest.approx(24.98, abs=0.01)
+    assert ctx.observations[1].observed_at.isoformat() == "2025-01-02T06:00:00+00:00"
+    assert [h.name for h in ctx.critical_labs()] == ["Potassium"]
@@ -0,0 +1,100 @@
+# tests/unit/test_http_transport.py
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from optimed.adapters.http_transport.factory import TransportConfig, TransportFactory
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"          # keep-alive, so connections are reused
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_clients_share_one_pool(local_server):
+    factory = TransportFactory(TransportConfig(max_connections=4))
+    fhir = factory.client(base_url=local_server)
+    llm = factory.client(base_url=local_server)
+
+    assert (await fhir.get("/Patient/1")).json() == {"ok": True}
+    assert (await llm.get("/v1/messages")).status_code == 200
+
+    stats = factory.stats()
+    assert stats.requests == 2
+    assert stats.connections_opened == 1      # second request reused the socket
+    assert (stats.connections, stats.idle, stats.active) == (1, 1, 0)
+    assert stats.max_wait >= stats.mean_wait > 0
+
+    await fhir.aclose()
+    assert factory.stats().connections == 1   # still used by the other client
+    await llm.aclose()
+    assert factory.stats().connections == 0   # last client closed the pool
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_connection_ahead_of_first_request(local_server):
+    async with TransportFactory() as factory:
+        assert await factory.warm_up([local_server + "/metadata"]) == 1
+        assert factory.stats().idle == 1
+
+        async with factory.client(base_url=local_server) as client:
+            await client.get("/Patient/1")
+
+        assert factory.stats().connections_opened == 1
+
+
+@pytest.mark.asyncio
+async def test_in_flight_counts_until_the_response_body_is_closed(local_server):
+    async with TransportFactory() as factory:
+        async with factory.client(base_url=local_server) as client:
+            async with client.stream("GET", "/Patient/1") as response:
+                assert response.status_code == 200
+                assert factory.stats().in_flight == 1       # headers in, body not read
+                await response.aread()
+            assert factory.stats().in_flight == 0
+
+            await client.get("/Patient/2")
+            assert factory.stats().in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_adapters_share_the_default_factory():
+    from optimed.adapters.fhir_hapi.repository import HAPIFHIRRepository
+    from optimed.adapters.http_transport.factory import default_transport
+
+    refs = default_transport()._refs
+    a = HAPIFHIRRepository(base_url="https://stub-a")
+    b = HAPIFHIRRepository(base_url="https://stub-b")
+    assert default_transport() is default_transport()
+    assert default_transport()._refs == refs + 2
+    assert a._client._transport._factory is b._client._transport._factory is default_transport()
+
+    await a.close()
+    await b.close()
+    assert default_transport()._refs == refs
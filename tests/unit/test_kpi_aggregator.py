@@ -0,0 +1,71 @@
+# tests/unit/test_kpi_aggregator.py
+import random
+
+import pytest
+
+from optimed.adapters.kpi_sink.aggregator import DDSketch, KPIAggregator
+from optimed.core.domain import KPIEvent
+
+
+def test_ddsketch_quantiles_within_relative_error_and_unmerge():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(4, 0.5) for _ in range(10_000)]
+    a, b = DDSketch(DDSketch.log_gamma_for(0.01)), DDSketch(DDSketch.log_gamma_for(0.01))
+    for v in values[:5000]:
+        a.add(v)
+    for v in values[5000:]:
+        b.add(v)
+
+    a.merge(b)
+    ordered = sorted(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert a.quantile(q) == pytest.approx(exact, rel=0.02)
+
+    a.merge(b, sign=-1)
+    assert a.count == 5000
+    assert a.quantile(0.5) == pytest.approx(sorted(values[:5000])[2499], rel=0.02)
+
+
+def test_windows_roll_per_metric_and_source():
+    agg = KPIAggregator()
+    t0 = 1_000_000.0
+    for i in range(120):                       # one reading per second, 2 min
+        agg.add("heart_rate", float(60 + i), t0 + i, source="P1")
+    agg.add("heart_rate", 200.0, t0 + 119, source="P2")
+
+    one = agg.query("heart_rate", "P1", window="1m", now=t0 + 119)
+    assert one.count == 60
+    assert (one.min, one.max) == (120.0, 179.0)
+    assert one.mean == pytest.approx(149.5)
+    assert one.p50 == pytest.approx(149.5, rel=0.02)
+
+    five = agg.query("heart_rate", window="5m", now=t0 + 119)
+    assert five.count == 121 and five.max == 200.0
+
+    # ten minutes later everything has left the 5-minute window
+    assert agg.query("heart_rate", window="5m", now=t0 + 720).count == 0
+    assert agg.query("heart_rate", window="60m", now=t0 + 720).count == 121
+    assert agg.query("unknown").count == 0
+
+
+@pytest.mark.asyncio
+async def test_record_tees_into_downstream_sink():
+    class _Sink:
+        def __init__(self):
+            self.events, self.flushed = [], False
+
+        async def record(self, event):
+            self.events.append(event)
+
+        async def flush(self):
+            self.flushed = True
+
+    down = _Sink()
+    agg = KPIAggregator(downstream=down)
+    ev = KPIEvent(metric="spo2", value=97.0, unit="%", metric_source="P1")
+    await agg.record(ev)
+    await agg.flush()
+
+    assert down.events == [ev] and down.flushed
+    assert agg.query("spo2", "P1").count == 1
@@ -0,0 +1,74 @@
+# tests/unit/test_kpi_batch.py
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from optimed.adapters.kpi_sink.aggregator import KPIAggregator
+from optimed.adapters.kpi_sink.sink import BufferedKPIEventSink
+from optimed.adapters.kpi_sink.sqlite import SQLiteKPIBackend
+from optimed.core.domain import KPIEvent, KPIEventBatch
+
+T0 = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _events(n: int = 6) -> list[KPIEvent]:
+    return [
+        KPIEvent(
+            metric="heart_rate" if i % 2 == 0 else "spo2",
+            value=float(60 + i),
+            unit="bpm" if i % 2 == 0 else "%",
+            recorded_at=T0 + timedelta(seconds=i, microseconds=7),
+            metric_source=None if i == 5 else f"P{i % 3}",
+        )
+        for i in range(n)
+    ]
+
+
+def test_round_trip_filter_and_group():
+    events = _events()
+    batch = KPIEventBatch.from_events(events)
+
+    assert batch.to_events() == events
+    assert batch.metrics == ("heart_rate", "spo2")
+    assert batch.recorded_at_ns.dtype == np.int64 and batch.values.dtype == np.float64
+    with pytest.raises(ValueError):
+        batch.values[0] = 1.0                         # read-only columns
+
+    hr = batch.filter(metric="heart_rate", since=T0 + timedelta(seconds=1))
+    assert hr.values.tolist() == [62.0, 64.0]
+    assert len(batch.filter(metric="unknown")) == 0
+
+    groups = batch.group_by("metric_source")
+    assert groups[("spo2", None)].values.tolist() == [65.0]
+    assert groups[("heart_rate", "P0")].values.tolist() == [60.0]
+    assert sum(len(g) for g in groups.values()) == len(batch)
+
+
+def test_concat_recodes_vocabularies():
+    a = KPIEventBatch.from_events(_events()[:2])
+    b = KPIEventBatch.from_events(_events()[3:])
+    both = KPIEventBatch.concat([a, b])
+
+    assert both.to_events() == _events()[:2] + _events()[3:]
+
+
+@pytest.mark.asyncio
+async def test_sink_and_aggregator_accept_batches(tmp_path):
+    batch = KPIEventBatch.from_events(_events(40))
+
+    backend = SQLiteKPIBackend(str(tmp_path / "kpi.sqlite"))
+    sink = BufferedKPIEventSink(backend, batch_size=16, flush_interval=60)
+    agg = KPIAggregator(downstream=sink)
+
+    await agg.record_batch(batch)
+    assert backend.count() == 40
+    assert sink.stats.flushes == 3
+
+    one_by_one = KPIAggregator()
+    for e in _events(40):
+        one_by_one.add(e.metric, e.value, e.recorded_at.timestamp(), e.metric_source)
+    now = (T0 + timedelta(seconds=40)).timestamp()
+    for key in one_by_one.series():
+        assert agg.query(*key, window="5m", now=now) == one_by_one.query(*key, window="5m", now=now)
+    await sink.close()
@@ -0,0 +1,108 @@
+# tests/unit/test_kpi_sink.py
+import asyncio
+import random
+
+import pytest
+
+from optimed.adapters.kpi_sink.sink import BufferedKPIEventSink
+from optimed.adapters.kpi_sink.sqlite import SQLiteKPIBackend
+from optimed.core.domain import KPIEvent
+
+
+class _MemoryBackend:
+    def __init__(self, fail_first: bool = False):
+        self.batches: list[list[KPIEvent]] = []
+        self._fail = fail_first
+
+    async def write_many(self, events):
+        if self._fail:
+            self._fail = False
+            raise RuntimeError("backend down")
+        self.batches.append(list(events))
+
+    async def close(self):
+        pass
+
+
+def _ev(i: int) -> KPIEvent:
+    return KPIEvent(metric="heart_rate", value=float(i), unit="bpm", metric_source="P1")
+
+
+@pytest.mark.asyncio
+async def test_size_trigger_writes_full_batches_to_sqlite(tmp_path):
+    backend = SQLiteKPIBackend(str(tmp_path / "kpi.sqlite"))
+    sink = BufferedKPIEventSink(backend, batch_size=100, flush_interval=60)
+
+    for i in range(250):
+        await sink.record(_ev(i))
+    await asyncio.sleep(0.05)            # let the flusher pick up the batches
+
+    assert backend.count() == 200        # two full batches, 50 still buffered
+    assert sink.stats.queue_depth == 50
+    await sink.close()
+    assert sink.stats.written == 250
+    assert sink.stats.flushes == 3 and sink.stats.mean_flush_latency > 0
+
+
+@pytest.mark.asyncio
+async def test_interval_trigger_flushes_partial_batch():
+    backend = _MemoryBackend()
+    async with BufferedKPIEventSink(backend, batch_size=100, flush_interval=0.02) as sink:
+        await sink.record(_ev(1))
+        await asyncio.sleep(0.1)
+        assert [len(b) for b in backend.batches] == [1]
+
+
+@pytest.mark.asyncio
+async def test_overflow_policies():
+    drop = BufferedKPIEventSink(
+        _MemoryBackend(), max_queue=5, batch_size=5, flush_interval=60, overflow="drop_oldest",
+    )
+    sample = BufferedKPIEventSink(
+        _MemoryBackend(), max_queue=5, batch_size=5, flush_interval=60,
+        overflow="sample", rng=random.Random(0),
+    )
+    for sink in (drop, sample):
+        sink._task = asyncio.get_running_loop().create_future()   # no flusher
+        for i in range(20):
+            await sink.record(_ev(i))
+        assert sink.stats.queue_depth == 5 and sink.stats.dropped == 15
+
+    assert [e.value for e in drop._queue] == [15.0, 16.0, 17.0, 18.0, 19.0]
+    assert any(e.value >= 5 for e in sample._queue)      # overflow got sampled in
+
+
+@pytest.mark.asyncio
+async def test_block_waits_for_flush_and_failed_batches_are_retried():
+    backend = _MemoryBackend(fail_first=True)
+    sink = BufferedKPIEventSink(backend, max_queue=2, batch_size=2, flush_interval=0.01)
+
+    await sink.record(_ev(1))
+    await sink.record(_ev(2))
+    await asyncio.wait_for(sink.record(_ev(3)), timeout=1)   # blocked until a flush
+
+    await sink.close()
+    assert sink.stats.blocked == 1
+    assert sink.stats.failed_flushes == 1
+    assert [e.value for b in backend.batches for e in b] == [1.0, 2.0, 3.0]
+
+
+@pytest.mark.asyncio
+async def test_close_closes_backend_even_if_final_flush_fails():
+    class _Down(_MemoryBackend):
+        closed = False
+
+        async def write_many(self, events):
+            raise RuntimeError("backend down")
+
+        async def close(self):
+            self.closed = True
+
+    backend = _Down()
+    sink = BufferedKPIEventSink(backend, batch_size=10, flush_interval=60)
+    await sink.record(_ev(1))
+
+    with pytest.raises(RuntimeError):
+        await sink.close()
+    assert backend.closed
+    assert sink.stats.queue_depth == 1
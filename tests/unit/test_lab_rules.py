@@ -0,0 +1,68 @@
+# tests/unit/test_lab_rules.py
+import numpy as np
+import pytest
+
+from optimed.core.domain import (
+    DEFAULT_CRITICAL_LABS,
+    LabRuleEngine,
+    LabThreshold,
+    PatientContext,
+)
+
+
+def _ctx(pid: str, **labs: str) -> PatientContext:
+    return PatientContext(patient_id=pid, name=pid, age=50, sex="F", care_unit="ICU", labs=labs)
+
+
+def test_loinc_keyed_labs_with_units():
+    ctx = _ctx("P1", **{"2823-3": "6.4 mmol/L", "2339-0": "1.9 mmol/L"})
+
+    hits = ctx.critical_labs()
+    assert [(h.name, h.direction, h.value, h.limit) for h in hits] == [
+        ("Potassium", "high", 6.4, 6.0),
+        ("Glucose", "low", 1.9, 2.2),
+    ]
+    assert ctx.has_critical_lab()
+    assert ctx.critical_lab_msgs()[0].startswith("Potassium critical (high): 6.4 mmol/L")
+
+
+def test_normal_unknown_and_foreign_unit_values_are_not_hits():
+    ctx = _ctx("P1", **{"2823-3": "4.1 mmol/L", "2339-0": "450 mg/dL", "1234-5": "99", "K+": "n/a"})
+    assert ctx.critical_labs() == []
+    assert not ctx.has_critical_lab()
+
+
+def test_census_screen_matches_per_patient_evaluation():
+    rng = np.random.default_rng(0)
+    census = [_ctx(f"P{i}", **{"2823-3": f"{k:.1f} mmol/L"}) for i, k in enumerate(rng.uniform(2.0, 7.0, 500))]
+    engine = LabRuleEngine()
+
+    flags = engine.screen(census)
+    assert flags.tolist() == [bool(engine.evaluate(c)) for c in census]
+    assert {h.patient_id for h in engine.evaluate_many(census)} == {c.patient_id for c, f in zip(census, flags) if f}
+
+
+def test_custom_threshold_table():
+    engine = LabRuleEngine([LabThreshold(code="2524-7", name="Lactate", unit="mmol/L", high=4.0)])
+    ctx = _ctx("P1", **{"2524-7": "4.5 mmol/L", "2823-3": "7.0 mmol/L"})
+    assert [h.name for h in ctx.critical_labs(engine)] == ["Lactate"]
+
+    with pytest.raises(ValueError):
+        LabRuleEngine([*DEFAULT_CRITICAL_LABS, LabThreshold(code="2823-3", name="K again", unit="mmol/L")])
+
+
+def test_typed_observations_take_precedence_over_lab_strings():
+    from optimed.core.domain import Measurement, normalize_quantity
+
+    assert normalize_quantity("2339-0", 90.08, "mg/dl") == pytest.approx((5.0, "mmol/L"))
+    assert normalize_quantity("8310-5", 98.6, "°F") == pytest.approx((37.0, "Cel"))
+
+    ctx = PatientContext(
+        patient_id="P1", name="P1", age=50, sex="F", care_unit="ICU",
+        labs={"2823-3": "7.0 mmol/L"},                       # stale display string
+        observations=(
+            Measurement(code="2823-3", value=6.8, unit="mmol/L"),
+            Measurement(code="2823-3", value=4.2, unit="mmol/L"),  # latest wins
+        ),
+    )
+    assert ctx.critical_labs() == []
@@ -0,0 +1,91 @@
+# tests/unit/test_llm_cache.py
+import asyncio
+
+import pytest
+
+from optimed.adapters.llm_cache.client import CachingLLMClient
+from optimed.core.domain import ChatMessage, ChatRole
+
+
+class _CountingLLM:
+    model = "stub-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def chat(self, messages, temperature=0.7, max_tokens=None):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return ChatMessage(role=ChatRole.ASSISTANT, content=f"reply {self.calls}", metadata={"model": self.model})
+
+    async def chat_stream(self, messages, temperature=0.7, max_tokens=None):
+        reply = await self.chat(messages, temperature, max_tokens)
+        for word in reply.content.split(" "):
+            yield word
+        yield reply
+
+
+MSGS = [
+    ChatMessage(role=ChatRole.SYSTEM, content="You are a clinical assistant."),
+    ChatMessage(role=ChatRole.USER, content="Summarise patient P1."),
+]
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_hit_memory_and_temperature_bypasses():
+    inner = _CountingLLM()
+    llm = CachingLLMClient(inner)
+
+    first = await llm.chat(MSGS, temperature=0)
+    # same content, fresh ChatMessage objects (new timestamps) → still a hit
+    again = await llm.chat([m.model_copy(update={"timestamp": m.timestamp.replace(year=2030)}) for m in MSGS], temperature=0)
+    other = await llm.chat(MSGS, temperature=0, max_tokens=10)
+    await llm.chat(MSGS, temperature=0.7)
+    await llm.chat(MSGS, temperature=0.7)
+
+    assert again.content == first.content and again.metadata["cache"] == "memory"
+    assert other.content != first.content
+    assert inner.calls == 4
+    assert (llm.stats.memory_hits, llm.stats.misses, llm.stats.bypassed) == (1, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart_and_ttl_expires(tmp_path):
+    now = [1000.0]
+    path = str(tmp_path / "llm.sqlite")
+
+    inner = _CountingLLM()
+    llm = CachingLLMClient(inner, disk_path=path, ttl=60, clock=lambda: now[0])
+    await llm.chat(MSGS, temperature=0)
+    llm.close()
+
+    restarted = CachingLLMClient(inner, disk_path=path, ttl=60, clock=lambda: now[0])
+    reply = await restarted.chat(MSGS, temperature=0)
+    assert reply.metadata["cache"] == "disk" and inner.calls == 1
+
+    now[0] += 120
+    await restarted.chat(MSGS, temperature=0)
+    assert inner.calls == 2
+    restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_request():
+    inner = _CountingLLM()
+    llm = CachingLLMClient(inner)
+    replies = await asyncio.gather(*(llm.chat(MSGS, temperature=0) for _ in range(5)))
+    assert inner.calls == 1
+    assert {r.content for r in replies} == {"reply 1"}
+
+
+@pytest.mark.asyncio
+async def test_stream_miss_is_cached_and_hit_replays_once():
+    inner = _CountingLLM()
+    llm = CachingLLMClient(inner)
+
+    first = [i async for i in llm.chat_stream(MSGS, temperature=0)]
+    second = [i async for i in llm.chat_stream(MSGS, temperature=0)]
+
+    assert first[:-1] == ["reply", "1"]
+    assert second[0] == "reply 1" and second[-1].metadata["cache"] == "memory"
+    assert inner.calls == 1
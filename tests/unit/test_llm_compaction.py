@@ -0,0 +1,114 @@
+# tests/unit/test_llm_compaction.py
+import pytest
+
+from optimed.adapters.llm_compaction.client import SUMMARY_PREFIX, CompactingLLMClient
+from optimed.core.domain import ChatMessage, ChatRole
+
+
+class _RecordingLLM:
+    model = "stub-model"
+
+    def __init__(self):
+        self.sent = []
+        self.summaries = 0
+
+    async def chat(self, messages, temperature=0.7, max_tokens=None):
+        if messages[0].content.startswith("You condense"):
+            self.summaries += 1
+            return ChatMessage(role=ChatRole.ASSISTANT, content=f"summary {self.summaries}")
+        self.sent.append(list(messages))
+        return ChatMessage(role=ChatRole.ASSISTANT, content="answer")
+
+    async def chat_stream(self, messages, temperature=0.7, max_tokens=None):
+        reply = await self.chat(messages, temperature, max_tokens)
+        yield reply.content
+        yield reply
+
+
+def _thread(turns: int) -> list[ChatMessage]:
+    msgs = [ChatMessage(role=ChatRole.SYSTEM, content="You are a clinical assistant.")]
+    for i in range(turns):
+        role = ChatRole.USER if i % 2 == 0 else ChatRole.ASSISTANT
+        msgs.append(ChatMessage(role=role, content=f"turn {i} " + "x" * 400))
+    return msgs
+
+
+@pytest.mark.asyncio
+async def test_short_threads_pass_through_untouched():
+    inner = _RecordingLLM()
+    llm = CompactingLLMClient(inner, max_input_tokens=10_000)
+
+    reply = await llm.chat(_thread(4))
+
+    assert [m.content for m in inner.sent[0]] == [m.content for m in _thread(4)]
+    assert reply.metadata["compaction_tokens_saved"] == "0"
+    assert inner.summaries == 0
+
+
+@pytest.mark.asyncio
+async def test_old_turns_are_summarised_and_summary_is_reused():
+    inner = _RecordingLLM()
+    llm = CompactingLLMClient(inner, max_input_tokens=500, keep_recent=2)
+
+    thread = _thread(10)
+    reply = await llm.chat(thread)
+    sent = inner.sent[-1]
+
+    assert sent[0].role is ChatRole.SYSTEM
+    assert sent[1].content == SUMMARY_PREFIX + "summary 1"
+    assert [m.content for m in sent[2:]] == [m.content for m in thread[-2:]]
+    assert int(reply.metadata["compaction_tokens_saved"]) > 0
+
+    # same thread again → cached summary, no new summarizer call
+    await llm.chat(thread)
+    assert inner.summaries == 1
+    assert llm.stats.summary_cache_hits == 1
+
+    # one more turn still fits next to the cached summary → no summarizer call
+    longer = thread + [ChatMessage(role=ChatRole.USER, content="turn 10")]
+    async for item in llm.chat_stream(longer):
+        last = item
+    assert inner.summaries == 1
+    assert [m.content for m in inner.sent[-1][2:]] == [m.content for m in longer[-3:]]
+    assert "compaction_tokens_saved" in last.metadata
+    assert llm.stats.tokens_saved > 0
+
+    # past the budget again → rolling summary extends the cached one
+    longest = longer + _thread(5)[1:]
+    await llm.chat(longest)
+    assert inner.summaries == 2
+    assert inner.sent[-1][1].content == SUMMARY_PREFIX + "summary 2"
+
+
+@pytest.mark.asyncio
+async def test_compaction_goes_down_to_low_water_mark():
+    inner = _RecordingLLM()
+    llm = CompactingLLMClient(inner, max_input_tokens=1_000, low_water=0.5, keep_recent=1)
+
+    result = await llm.compact(_thread(12))
+
+    assert result.tokens_sent <= 500
+    assert len(result.messages) == 2 + 4     # system + summary + the 4 turns under the mark
+
+
+@pytest.mark.asyncio
+async def test_cache_control_messages_are_never_summarised():
+    inner = _RecordingLLM()
+    llm = CompactingLLMClient(inner, max_input_tokens=500, keep_recent=2)
+    context = ChatMessage(role=ChatRole.USER, content="<patient context>", metadata={"cache_control": "ephemeral"})
+    thread = _thread(10)
+    thread.insert(1, context)
+
+    await llm.chat(thread)
+    sent = inner.sent[-1]
+
+    assert sent[1] is context
+    assert sent[2].content.startswith(SUMMARY_PREFIX)
+
+
+@pytest.mark.asyncio
+async def test_request_that_cannot_fit_raises():
+    llm = CompactingLLMClient(_RecordingLLM(), max_input_tokens=300, keep_recent=4)
+
+    with pytest.raises(ValueError, match="max_input_tokens"):
+        await llm.chat(_thread(10))
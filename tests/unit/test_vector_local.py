@@ -0,0 +1,124 @@
+# tests/unit/test_vector_local.py
+import numpy as np
+import pytest
+
+from optimed.adapters.vector_local.store import LocalVectorStore
+
+
+def _clustered(n: int, dim: int = 16, clusters: int = 40, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    return (centres[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def _exact(x: np.ndarray, q: np.ndarray, k: int) -> list[int]:
+    xn = x / np.linalg.norm(x, axis=1, keepdims=True)
+    return np.argsort(-(xn @ (q / np.linalg.norm(q))))[:k].tolist()
+
+
+@pytest.mark.asyncio
+async def test_exact_search_upsert_and_filter():
+    store = LocalVectorStore(dim=3)
+    await store.upsert("a", [1, 0, 0], {"source": "nice", "lang": "en"})
+    await store.upsert("b", [0.9, 0.1, 0], {"source": "who"})
+    await store.upsert("c", [0, 1, 0], {"source": "nice"})
+
+    hits = await store.similarity_search([1, 0, 0], top_k=2)
+    assert [h[0] for h in hits] == ["a", "b"] and hits[0][1] == pytest.approx(1.0)
+    assert [h[0] for h in await store.similarity_search([1, 0, 0], top_k=5, filter_={"source": "nice"})] == ["a", "c"]
+    assert await store.similarity_search([1, 0, 0], filter_={"source": "nice", "lang": "de"}) == []
+
+    await store.upsert("a", [0, 0, 1], {"source": "who"})          # overwrite vector + metadata
+    assert len(store) == 3
+    assert [h[0] for h in await store.similarity_search([1, 0, 0], filter_={"source": "nice"})] == ["c"]
+    assert [h[0] for h in await store.similarity_search([0, 0, 1], top_k=1)] == ["a"]
+
+    with pytest.raises(ValueError):
+        await store.upsert("z", [0, 0, 0])
+
+
+def test_ivf_recall_and_incremental_adds():
+    x = _clustered(6000)
+    store = LocalVectorStore(dim=16, ivf_threshold=4000, nprobe=8)
+    store.add([f"v{i}" for i in range(5000)], x[:5000], [{"half": str(i % 2)} for i in range(5000)])
+    assert store.stats.trainings == 1
+    store.add([f"v{i}" for i in range(5000, 6000)], x[5000:])      # assigned, not retrained
+    assert store.stats.trainings == 1
+
+    queries = _clustered(50, seed=1)
+    recall = np.mean([
+        len({int(i[0][1:]) for i in hits} & set(_exact(x, q, 10))) / 10
+        for q, hits in zip(queries, store.search(queries, top_k=10))
+    ])
+    assert recall >= 0.9
+    assert store.stats.ivf_searches == 50 and store.stats.scored < 50 * 6000 / 2
+
+    # an exact duplicate of a late addition is found through the extra lists
+    assert store.search(x[5500], top_k=1)[0][0][0] == "v5500"
+    # large filters restrict IVF candidates instead of post-filtering
+    store._exact_filter_max = 100
+    hits = store.search(x[42], top_k=5, filter_={"half": "0"})[0]
+    assert hits[0][0] == "v42" and all(int(h[0][1:]) % 2 == 0 for h in hits)
+
+
+def test_save_and_open_restore_without_retraining(tmp_path):
+    x = _clustered(3000)
+    store = LocalVectorStore(dim=16, ivf_threshold=2000, path=str(tmp_path))
+    store.add([f"v{i}" for i in range(3000)], x, [{"k": str(i % 3)} for i in range(3000)])
+    before = store.search(x[:5], top_k=5, filter_={"k": "1"})
+    store.save()
+
+    again = LocalVectorStore.open(str(tmp_path))
+    assert isinstance(again._vecs, np.memmap)
+    assert len(again) == 3000 and again.stats.trainings == 0
+    assert again.search(x[:5], top_k=5, filter_={"k": "1"}) == before
+
+    again.add(["new"], x[:1] * -1)                 # copy-on-write: files untouched
+    assert again.search(-x[0], top_k=1)[0][0][0] == "new"
+    assert len(LocalVectorStore.open(str(tmp_path))) == 3000
+
+
+@pytest.mark.asyncio
+async def test_batched_port_methods_match_single_calls():
+    x = _clustered(500)
+    one, many = LocalVectorStore(dim=16), LocalVectorStore(dim=16)
+    for i, v in enumerate(x):
+        await one.upsert(f"v{i}", v.tolist(), {"k": str(i % 2)})
+    await many.upsert_many([f"v{i}" for i in range(500)], x, [{"k": str(i % 2)} for i in range(500)])
+
+    queries = _clustered(20, seed=3)
+    batched = await many.similarity_search_many(queries, top_k=3, filter_={"k": "1"})
+    assert len(batched) == 20
+    for q, hits in zip(queries, batched):
+        single = await one.similarity_search(q.tolist(), top_k=3, filter_={"k": "1"})
+        assert [i for i, _ in hits] == [i for i, _ in single]
+        assert [s for _, s in hits] == pytest.approx([s for _, s in single], abs=1e-6)
+
+    with pytest.raises(ValueError):
+        await many.upsert_many(["a", "b"], x[:3])
+
+
+@pytest.mark.parametrize("mode, ratio", [("float16", 2), ("int8", 3)])
+def test_quantized_storage_reranks_exactly(tmp_path, mode, ratio):
+    x = _clustered(5000)
+    plain = LocalVectorStore(dim=16)
+    quant = LocalVectorStore(dim=16, quantization=mode, ivf_threshold=3000, path=str(tmp_path))
+    ids = [f"v{i}" for i in range(5000)]
+    plain.add(ids, x)
+    quant.add(ids, x)
+    assert plain.memory_bytes / quant.memory_bytes >= ratio
+
+    queries = _clustered(30, seed=2)
+    truth = plain.search(queries, top_k=10)
+    got = quant.search(queries, top_k=10)
+    recall = np.mean([len({i for i, _ in g} & {i for i, _ in t}) / 10 for g, t in zip(got, truth)])
+    assert recall >= 0.9 and quant.stats.reranked > 0
+    # re-ranked scores are exact cosine similarities, not quantized ones
+    exact = dict(truth[0])
+    assert all(s == pytest.approx(exact[i], abs=1e-6) for i, s in got[0] if i in exact)
+
+    quant.save()
+    again = LocalVectorStore.open(str(tmp_path))
+    assert again.quantization == mode and again.search(queries, top_k=10) == got
+    again.add(["extra"], x[:1])                                  # grows the full-precision map
+    assert again.get("extra")[0] == pytest.approx(plain.get("v0")[0])
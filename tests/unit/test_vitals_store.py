@@ -0,0 +1,118 @@
+# tests/unit/test_vitals_store.py
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from optimed.adapters.vitals_store.store import VitalsRecordingRepository, VitalsStore
+from optimed.core.domain import EventType, InfoEvent, Measurement, PatientContext
+
+HR = "8867-4"
+T0 = 1_699_999_800.0          # on a 10-minute boundary
+
+
+def test_ring_wraps_and_range_stays_sorted():
+    store = VitalsStore(raw_capacity=100)
+    for i in range(250):
+        assert store.append("P1", HR, 60 + i % 40, T0 + i)
+    assert not store.append("P1", HR, 99, T0 + 10)          # older → ignored
+    assert store.append("P1", "1234-5", 1, T0) is False     # not a vital code
+
+    r = store.range("P1", HR, since=T0 + 200, until=T0 + 210)
+    assert r.times.tolist() == [T0 + i for i in range(200, 210)]
+    assert r.values.tolist() == [60 + i % 40 for i in range(200, 210)]
+    assert len(store.range("P1", HR, since=0).times) == 100  # only capacity retained
+    assert store.latest("P1", HR) == (T0 + 249, 60 + 249 % 40)
+    assert store.stats.duplicates == 1 and store.stats.ignored == 1
+
+
+def test_downsample_from_raw_and_from_rollups_agree():
+    rng = np.random.default_rng(0)
+    values = rng.uniform(50, 150, 3600)
+    full = VitalsStore(raw_capacity=4096)
+    short = VitalsStore(raw_capacity=600)       # raw covers only the last 10 min
+    for i, v in enumerate(values):
+        full.append("P1", HR, v, T0 + i)
+        short.append("P1", HR, v, T0 + i)
+
+    a = full.downsample("P1", HR, T0, bucket_seconds=600)
+    b = short.downsample("P1", HR, T0, bucket_seconds=600)
+    assert a.count.tolist() == b.count.tolist() == [600] * 6
+    for field in ("times", "min", "max", "mean"):
+        np.testing.assert_allclose(getattr(a, field), getattr(b, field))
+    np.testing.assert_allclose(a.mean[0], values[:600].mean())
+
+    with pytest.raises(ValueError):
+        short.downsample("P1", HR, T0, bucket_seconds=90)
+
+
+def test_snapshot_across_patients():
+    store = VitalsStore(raw_capacity=50)
+    for p in range(3):
+        for i in range(120):
+            store.append(f"P{p}", HR, 60 + p * 10 + i % 2, T0 + i)
+
+    snap = store.snapshot(HR, since=T0 + 60)
+    assert sorted(snap) == ["P0", "P1", "P2"]
+    s = snap["P1"]
+    assert (s.last, s.last_at, s.min, s.max) == (71, T0 + 119, 70, 71)
+    assert s.count == 60 and s.mean == pytest.approx(70.5)
+    assert store.snapshot(HR, since=T0, patient_ids=["P2", "nope"]).keys() == {"P2"}
+
+
+def test_vital_reading_events_are_ingested():
+    store = VitalsStore()
+    when = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+    ev = InfoEvent(
+        event_id="E1", patient_id="P1", type=EventType.VITAL_READING, created_at=when,
+        payload_json=json.dumps({"readings": [
+            {"code": "8310-5", "value": 98.6, "unit": "[degF]"},
+            {"code": HR, "value": 80, "observed_at": (when - timedelta(seconds=5)).isoformat()},
+            {"code": HR},                                   # no value → ignored
+        ]}),
+    )
+    assert store.ingest_event(ev) == 2
+    assert store.latest("P1", "8310-5") == (when.timestamp(), pytest.approx(37.0))
+    assert store.ingest_event(ev.model_copy(update={"type": EventType.LAB_RESULT})) == 0
+
+
+@pytest.mark.asyncio
+async def test_recording_repository_feeds_store():
+    when = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    ctx = PatientContext(
+        patient_id="P1", name="A", age=1, sex="F", care_unit="ICU",
+        observations=(
+            Measurement(code=HR, value=70, unit="/min", observed_at=when),
+            Measurement(code="2823-3", value=4.0, unit="mmol/L", observed_at=when),
+            Measurement(code=HR, value=72, unit="/min", observed_at=when + timedelta(minutes=1)),
+        ),
+    )
+
+    class Inner:
+        async def get_patient(self, pid):
+            return ctx
+
+    store = VitalsStore()
+    repo = VitalsRecordingRepository(Inner(), store)     # type: ignore[arg-type]
+    await repo.get_patient("P1")
+    await repo.get_patient("P1")                          # same readings again
+    assert store.range("P1", HR, since=when).values.tolist() == [70, 72]
+    assert store.stats.appended == 2 and store.stats.duplicates == 2
+
+
+def test_undated_observations_do_not_shadow_dated_ones():
+    when = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    ctx = PatientContext(
+        patient_id="P1", name="A", age=1, sex="F", care_unit="ICU",
+        observations=(
+            Measurement(code=HR, value=99, unit="/min"),
+            Measurement(code=HR, value=70, unit="/min", observed_at=when),
+            Measurement(code=HR, value=72, unit="/min", observed_at=when + timedelta(minutes=1)),
+        ),
+    )
+    store = VitalsStore()
+
+    assert store.ingest(ctx) == 2
+    assert store.stats.ignored == 1 and store.stats.duplicates == 0
+    assert store.latest("P1", HR) == (when.timestamp() + 60, 72)